@@ -0,0 +1,297 @@
+# Life | Suite de benchmarks | MJ
+#
+# Uso (desde la carpeta del proyecto):
+#   python benchmarks/bench.py                      -> corre y compara contra la linea base
+#   python benchmarks/bench.py --save-baseline      -> guarda la linea base actual
+#   python benchmarks/bench.py --sizes 1k,10k,100k,1m,10m --threshold 0.10
+#   python benchmarks/bench.py --only load,gl
+#
+# Micro: OBJ._load_file, OBJ.create_gl_list + render, ReportGenerator.generate.
+# Macro: asistente de seleccion (show_sim_categories -> mostrar_tratamiento) y arranque en frio.
+# Las mallas salen de meshgen.py, asi que no hacen falta los assets propietarios.
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+MESH_DIR = os.path.join(HERE, ".meshes")
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import meshgen  # noqa: E402
+
+SUITES = ("load", "gl", "report", "wizard", "startup")
+SIZE_ORDER = list(meshgen.SIZES)
+
+
+def timeit(fn, repeat: int, setup=None):
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "repeat": repeat,
+    }
+
+
+def _life():
+    import life
+    return life
+
+
+def _app():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+# ---------------------------------------------------------------------------
+def bench_load(results, sizes, kinds, repeat):
+    life = _life()
+    for kind in kinds:
+        for size in sizes:
+            path = meshgen.ensure_mesh(MESH_DIR, kind, size)
+
+            def run(obj, path=path):
+                obj._load_file(path)
+
+            def setup():
+                obj = life.OBJ.__new__(life.OBJ)
+                obj.filename = path
+                obj.vertices, obj.normals, obj.texcoords, obj.faces = [], [], [], []
+                obj.gl_list = None
+                return obj
+
+            r = timeit(run, repeat if SIZE_ORDER.index(size) < 3 else 1, setup)
+            r["bytes"] = os.path.getsize(path)
+            results[f"load/{kind}/{size}"] = r
+
+
+def bench_gl(results, sizes, kinds, repeat):
+    life = _life()
+    _app()
+    from PySide6.QtGui import QOpenGLContext, QOffscreenSurface
+    ctx = QOpenGLContext()
+    surface = QOffscreenSurface()
+    surface.create()
+    if not ctx.create() or not ctx.makeCurrent(surface):
+        results["gl"] = {"skipped": "No OpenGL context available"}
+        return
+    from OpenGL.GL import glFinish, glDeleteLists
+    for kind in kinds:
+        for size in sizes:
+            if SIZE_ORDER.index(size) > 3:
+                continue  # las listas de 10M no caben en drivers comunes
+            obj = life.OBJ(meshgen.ensure_mesh(MESH_DIR, kind, size))
+
+            def compile_list(_):
+                obj.create_gl_list()
+                glFinish()
+
+            def reset():
+                if obj.gl_list:
+                    glDeleteLists(obj.gl_list, 1)
+                obj.gl_list = None
+
+            results[f"gl_compile/{kind}/{size}"] = timeit(compile_list, repeat, reset)
+
+            def render():
+                for _ in range(10):
+                    obj.render()
+                glFinish()
+
+            r = timeit(render, repeat)
+            r["frames"] = 10
+            results[f"gl_render/{kind}/{size}"] = r
+            reset()
+    ctx.doneCurrent()
+
+
+def bench_report(results, repeat):
+    life = _life()
+    template = os.path.join(life.BASE_DIR, "docs", "life_report_template.docx")
+    with tempfile.TemporaryDirectory() as tmp:
+        old_base = life.BASE_DIR
+        if not os.path.isfile(template):
+            # Plantilla sintetica con la misma forma que la oficial
+            from docx import Document
+            os.makedirs(os.path.join(tmp, "docs"))
+            doc = Document()
+            table = doc.add_table(rows=0, cols=2)
+            for label in ("Fecha", "Numero de enfermedades", "Modelo", "Sistema", "Estado") * 8:
+                row = table.add_row().cells
+                row[0].text = label
+                row[1].text = "-"
+            doc.save(os.path.join(tmp, "docs", "life_report_template.docx"))
+            life.BASE_DIR = tmp
+        try:
+            rg = life.ReportGenerator(life.MetaProyecto())
+            rg.out_path = os.path.join(tmp, "bench_report.docx")
+            results["report/generate"] = timeit(rg.generate, repeat)
+        finally:
+            life.BASE_DIR = old_base
+
+
+def bench_wizard(results, repeat):
+    life = _life()
+    app = _app()
+    from PySide6.QtCore import QTimer
+
+    def dismiss_modals():
+        w = app.activeModalWidget()
+        if w is not None:
+            w.close()
+
+    closer = QTimer()
+    closer.timeout.connect(dismiss_modals)
+    closer.start(5)
+
+    win = life.MainWindow(None, life.MetaProyecto())
+    win.show()
+    app.processEvents()
+    steps = {
+        "wizard/show_sim_categories": lambda: win.show_sim_categories(),
+        "wizard/seleccionar_sistema": lambda: (win.lista.setCurrentRow(0), win.seleccionar_sistema()),
+        "wizard/seleccionar_edad": lambda: (win.lista.setCurrentRow(0), win.seleccionar_edad()),
+        "wizard/mostrar_tratamiento": lambda: (win.lista.setCurrentRow(0), win.mostrar_tratamiento()),
+    }
+    samples = {name: [] for name in steps}
+    for _ in range(repeat):
+        for name, step in steps.items():
+            t0 = time.perf_counter()
+            step()
+            app.processEvents()
+            samples[name].append(time.perf_counter() - t0)
+        if getattr(win, "disease_win", None) is not None:
+            win.disease_win.close()
+    for name, s in samples.items():
+        results[name] = {"median_s": statistics.median(s), "min_s": min(s), "max_s": max(s), "repeat": repeat}
+    total = [sum(x) for x in zip(*samples.values())]
+    results["wizard/total"] = {"median_s": statistics.median(total), "min_s": min(total), "max_s": max(total), "repeat": repeat}
+    closer.stop()
+    win.close()
+
+
+STARTUP_SNIPPET = r"""
+import time, sys
+t0 = time.perf_counter()
+import life
+t1 = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+win = life.MainWindow(None, life.MetaProyecto())
+win.show(); app.processEvents()
+t2 = time.perf_counter()
+print(f"{t1 - t0} {t2 - t1}")
+"""
+
+
+def bench_startup(results, repeat):
+    # El splash (5 s de sleep) se excluye: mide import + construccion de MainWindow
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    wall, imp, build = [], [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=ROOT, env=env,
+                             capture_output=True, text=True)
+        wall.append(time.perf_counter() - t0)
+        if out.returncode != 0:
+            results["startup"] = {"skipped": out.stderr.strip().splitlines()[-1:]}
+            return
+        a, b = out.stdout.strip().splitlines()[-1].split()
+        imp.append(float(a))
+        build.append(float(b))
+    for name, s in (("startup/cold_wall", wall), ("startup/import", imp), ("startup/main_window", build)):
+        results[name] = {"median_s": statistics.median(s), "min_s": min(s), "max_s": max(s), "repeat": repeat}
+
+
+# ---------------------------------------------------------------------------
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median_s" not in cur or "median_s" not in base:
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] > 0 else 1.0
+        cur["baseline_s"] = base["median_s"]
+        cur["ratio"] = round(ratio, 3)
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base["median_s"], cur["median_s"], ratio))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks de Lifeness Simulator.")
+    ap.add_argument("--only", default=",".join(SUITES), help="suites separadas por coma: " + ",".join(SUITES))
+    ap.add_argument("--sizes", default="1k,10k,100k", help="tamaños de malla: " + ",".join(SIZE_ORDER))
+    ap.add_argument("--kinds", default="sphere,torus,human")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=BASELINE_FILE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.15, help="regresion permitida (0.15 = 15%%)")
+    ap.add_argument("--out", default=os.path.join(ROOT, "bench_output.json"))
+    args = ap.parse_args()
+
+    suites = [s.strip() for s in args.only.split(",") if s.strip()]
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    results = {}
+    if "load" in suites:
+        bench_load(results, sizes, kinds, args.repeat)
+    if "gl" in suites:
+        bench_gl(results, sizes, kinds, args.repeat)
+    if "report" in suites:
+        bench_report(results, args.repeat)
+    if "wizard" in suites:
+        bench_wizard(results, args.repeat)
+    if "startup" in suites:
+        bench_startup(results, args.repeat)
+
+    payload = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "processor": platform.processor()},
+        "results": results,
+    }
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+    elif os.path.isfile(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+    for name, r in results.items():
+        if "median_s" in r:
+            extra = f"  x{r['ratio']:.2f}" if "ratio" in r else ""
+            print(f"{name:40s} {r['median_s'] * 1000:10.2f} ms{extra}")
+        else:
+            print(f"{name:40s} skipped ({r.get('skipped')})")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for name, base, cur, ratio in regressions:
+            print(f"  {name}: {base * 1000:.2f} ms -> {cur * 1000:.2f} ms (x{ratio:.2f})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
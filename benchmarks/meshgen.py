@@ -0,0 +1,184 @@
+# Life | Generador procedural de mallas OBJ para benchmarks | MJ
+#
+# Genera esferas, toros y un "humano proxy" (cabeza, torso y extremidades como
+# elipsoides) con la cantidad de triangulos pedida, de 1k hasta 10M. Las mallas
+# mezclan quads, triangulos y n-gonos (tapas de los polos) para cubrir todas
+# las ramas de OBJ._load_file sin depender de los assets propietarios.
+from __future__ import annotations
+import os
+import math
+import argparse
+import numpy as np
+
+# Tamaños estandar (triangulos equivalentes)
+SIZES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# Partes del humano proxy: (centro, radios, peso de triangulos)
+HUMAN_PARTS = [
+    ((0.0, 1.55, 0.0), (0.12, 0.15, 0.13), 0.12),   # cabeza
+    ((0.0, 1.05, 0.0), (0.22, 0.35, 0.13), 0.30),   # torso
+    ((-0.32, 1.10, 0.0), (0.05, 0.32, 0.05), 0.11), # brazo izq.
+    ((0.32, 1.10, 0.0), (0.05, 0.32, 0.05), 0.11),  # brazo der.
+    ((-0.11, 0.38, 0.0), (0.08, 0.40, 0.08), 0.18), # pierna izq.
+    ((0.11, 0.38, 0.0), (0.08, 0.40, 0.08), 0.18),  # pierna der.
+]
+
+
+class MeshData:
+    def __init__(self):
+        self.vertices = []   # arrays (n, 3)
+        self.normals = []    # arrays (n, 3)
+        self.texcoords = []  # arrays (n, 2)
+        self.faces = []      # listas de tuplas de indices base 0
+        self.offset = 0
+        self.triangles = 0
+
+    def add(self, verts, norms, uvs, faces):
+        self.vertices.append(verts)
+        self.normals.append(norms)
+        self.texcoords.append(uvs)
+        off = self.offset
+        for face in faces:
+            self.faces.append([i + off for i in face])
+            self.triangles += len(face) - 2
+        self.offset += len(verts)
+
+
+def ellipsoid(mesh: MeshData, center, radii, n_lat: int, n_lon: int):
+    # Anillos sin polos: los polos se cierran con un n-gono de n_lon lados
+    n_lat = max(3, n_lat)
+    n_lon = max(3, n_lon)
+    theta = np.linspace(0.0, math.pi, n_lat + 1)[1:-1]
+    phi = np.linspace(0.0, 2.0 * math.pi, n_lon, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing="ij")
+    unit = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1).reshape(-1, 3)
+    verts = unit * np.asarray(radii) + np.asarray(center)
+    norms = unit / np.asarray(radii)
+    norms /= np.linalg.norm(norms, axis=1, keepdims=True)
+    uvs = np.stack([(p / (2.0 * math.pi)).ravel(), (t / math.pi).ravel()], axis=-1)
+
+    rings = n_lat - 1
+    faces = []
+    for r in range(rings - 1):
+        a = r * n_lon
+        b = (r + 1) * n_lon
+        for j in range(n_lon):
+            k = (j + 1) % n_lon
+            faces.append((a + j, b + j, b + k, a + k))
+    faces.append(tuple(range(n_lon - 1, -1, -1)))                       # tapa superior
+    faces.append(tuple((rings - 1) * n_lon + j for j in range(n_lon)))  # tapa inferior
+    mesh.add(verts, norms, uvs, faces)
+
+
+def torus(mesh: MeshData, center, major: float, minor: float, n_major: int, n_minor: int):
+    n_major = max(3, n_major)
+    n_minor = max(3, n_minor)
+    u = np.linspace(0.0, 2.0 * math.pi, n_major, endpoint=False)
+    v = np.linspace(0.0, 2.0 * math.pi, n_minor, endpoint=False)
+    uu, vv = np.meshgrid(u, v, indexing="ij")
+    ring = major + minor * np.cos(vv)
+    verts = np.stack([ring * np.cos(uu), minor * np.sin(vv), ring * np.sin(uu)], axis=-1).reshape(-1, 3)
+    norms = np.stack([np.cos(vv) * np.cos(uu), np.sin(vv), np.cos(vv) * np.sin(uu)], axis=-1).reshape(-1, 3)
+    verts += np.asarray(center)
+    uvs = np.stack([(uu / (2.0 * math.pi)).ravel(), (vv / (2.0 * math.pi)).ravel()], axis=-1)
+    faces = []
+    for i in range(n_major):
+        i2 = (i + 1) % n_major
+        for j in range(n_minor):
+            j2 = (j + 1) % n_minor
+            faces.append((i * n_minor + j, i2 * n_minor + j, i2 * n_minor + j2, i * n_minor + j2))
+    mesh.add(verts, norms, uvs, faces)
+
+
+def _grid_for(triangles: int):
+    # Un elipsoide de n_lat x n_lon da ~2*n_lat*n_lon triangulos, con n_lon = 2*n_lat
+    n_lat = max(3, int(round(math.sqrt(max(triangles, 8) / 4.0))))
+    return n_lat, 2 * n_lat
+
+
+def make_sphere(triangles: int) -> MeshData:
+    mesh = MeshData()
+    n_lat, n_lon = _grid_for(triangles)
+    ellipsoid(mesh, (0.0, 0.0, 0.0), (1.0, 1.0, 1.0), n_lat, n_lon)
+    return mesh
+
+
+def make_torus(triangles: int) -> MeshData:
+    mesh = MeshData()
+    n_minor = max(3, int(round(math.sqrt(max(triangles, 8) / 6.0))))
+    n_major = 3 * n_minor
+    torus(mesh, (0.0, 0.0, 0.0), 1.0, 0.35, n_major, n_minor)
+    return mesh
+
+
+def make_human(triangles: int) -> MeshData:
+    mesh = MeshData()
+    for center, radii, weight in HUMAN_PARTS:
+        n_lat, n_lon = _grid_for(int(triangles * weight))
+        ellipsoid(mesh, center, radii, n_lat, n_lon)
+    return mesh
+
+
+GENERATORS = {
+    "sphere": make_sphere,
+    "torus": make_torus,
+    "human": make_human,
+}
+
+
+def write_obj(mesh: MeshData, path: str):
+    # Esferas con "v//vn", el resto con "v/vt/vn" para ejercitar ambos caminos del parser
+    full = "sphere" not in os.path.basename(path)
+    verts = np.concatenate(mesh.vertices)
+    norms = np.concatenate(mesh.normals)
+    uvs = np.concatenate(mesh.texcoords)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"# Life meshgen | tris:{mesh.triangles}\n")
+        np.savetxt(f, verts, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, norms, fmt="vn %.6f %.6f %.6f")
+        if full:
+            np.savetxt(f, uvs, fmt="vt %.6f %.6f")
+        chunk = []
+        for face in mesh.faces:
+            if full:
+                chunk.append("f " + " ".join(f"{i + 1}/{i + 1}/{i + 1}" for i in face))
+            else:
+                chunk.append("f " + " ".join(f"{i + 1}//{i + 1}" for i in face))
+            if len(chunk) >= 100_000:
+                f.write("\n".join(chunk) + "\n")
+                chunk = []
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+    os.replace(tmp, path)
+
+
+def ensure_mesh(out_dir: str, kind: str, size: str) -> str:
+    # Reutiliza la malla si ya fue generada
+    path = os.path.join(out_dir, f"{kind}_{size}.obj")
+    if not os.path.isfile(path):
+        mesh = GENERATORS[kind](SIZES[size])
+        write_obj(mesh, path)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Genera mallas OBJ procedurales para benchmarks.")
+    ap.add_argument("--out", default=os.path.join(os.path.dirname(__file__), ".meshes"))
+    ap.add_argument("--kinds", default="sphere,torus,human")
+    ap.add_argument("--sizes", default="1k,10k,100k")
+    args = ap.parse_args()
+    for kind in args.kinds.split(","):
+        for size in args.sizes.split(","):
+            print(ensure_mesh(args.out, kind.strip(), size.strip().lower()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Life | Reproductor headless de escenarios de interfaz | MJ
+#
+# Uso (desde la carpeta del proyecto):
+#   python benchmarks/replay.py                                   -> escenario por defecto (scenarios/wizard.json)
+#   python benchmarks/replay.py ruta/scenario_20251028_101500.json --budget-ms 150
+#
+# Los escenarios se graban desde la app con "Analisis -> Grabar Escenario" y se guardan
+# en Documents/Lifeness Simulator/scenarios. Cada paso se reproduce bajo la plataforma
+# offscreen de Qt y se mide la latencia desde la entrada hasta el primer repintado y
+# hasta que la interfaz queda en reposo. Los cuadros de dialogo modales se cierran solos.
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+DEFAULT_SCENARIO = os.path.join(HERE, "scenarios", "wizard.json")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from PySide6 import QtCore  # noqa: E402
+from PySide6.QtCore import Qt, QEvent, QTimer  # noqa: E402
+from PySide6.QtWidgets import QApplication, QDialog  # noqa: E402
+from PySide6.QtTest import QTest  # noqa: E402
+
+KEY_RE = re.compile(r"^(\w+)\.(\w+)(?:\[(.+)\])?$")
+
+
+class PaintProbe(QtCore.QObject):
+    # Registra los repintados y cierra los dialogos modales. Los widgets que se repintan
+    # solos (visor GL a 30 ms, textos parpadeantes) se marcan como animados y no cuentan.
+    def __init__(self):
+        super().__init__()
+        self.last_paint = 0.0
+        self.paints = 0
+        self.modal_time = 0.0
+        self.modals = 0
+        self.history = {}
+        self.animated = set()
+
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype == QEvent.Paint:
+            now = time.perf_counter()
+            key = id(obj)
+            if key in self.animated:
+                return False
+            times = self.history.setdefault(key, [])
+            times.append(now)
+            del times[:-4]
+            if len(times) == 4 and times[-1] - times[0] < 0.6:
+                self.animated.add(key)
+                return False
+            self.last_paint = now
+            self.paints += 1
+        elif etype == QEvent.Show and isinstance(obj, QDialog) and obj.isModal():
+            self.modals += 1
+            shown = time.perf_counter()
+
+            def dismiss(dlg=obj, shown=shown):
+                self.modal_time += time.perf_counter() - shown
+                dlg.done(QDialog.Accepted)
+            QTimer.singleShot(0, dismiss)
+        return False
+
+
+class StallProbe(QtCore.QObject):
+    # Latido de 5 ms: un hueco mayor al umbral es un bloqueo del event loop
+    def __init__(self, threshold_ms: float):
+        super().__init__()
+        self.threshold = threshold_ms / 1000.0
+        self.last = time.perf_counter()
+        self.stalls = []
+        self.step = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start(5)
+
+    def beat(self):
+        now = time.perf_counter()
+        gap = now - self.last
+        if gap > self.threshold:
+            self.stalls.append({"step": self.step, "ms": round(gap * 1000, 2)})
+        self.last = now
+
+
+def find_window(app, cls_name, windows):
+    if cls_name in windows:
+        return windows[cls_name]
+    for w in app.topLevelWidgets():
+        if type(w).__name__ == cls_name and w.isVisible():
+            return w
+    return None
+
+
+def resolve(app, key, windows):
+    m = KEY_RE.match(key)
+    if not m:
+        raise LookupError(f"Bad target: {key}")
+    cls_name, attr, item = m.groups()
+    win = find_window(app, cls_name, windows)
+    if win is None:
+        raise LookupError(f"Window not open: {cls_name}")
+    target = getattr(win, attr)
+    if item is not None:
+        target = target[item]
+    return target
+
+
+def settle(app, probe, idle_ms: float, timeout_s: float):
+    # Procesa eventos hasta que pasen idle_ms sin repintados
+    start = time.perf_counter()
+    while True:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+        now = time.perf_counter()
+        if now - max(probe.last_paint, start) > idle_ms / 1000.0 or now - start > timeout_s:
+            return
+
+
+def run_step(app, step, windows, probe):
+    action = step["action"]
+    target = resolve(app, step["target"], windows)
+    if action == "click":
+        if not target.isEnabled():
+            raise LookupError(f"Disabled: {step['target']}")
+        QTest.mouseClick(target, Qt.LeftButton)
+    elif action == "select":
+        items = target.findItems(step["text"], Qt.MatchExactly)
+        if not items:
+            raise LookupError(f"Item not found: {step['text']}")
+        rect = target.visualItemRect(items[0])
+        QTest.mouseClick(target.viewport(), Qt.LeftButton, Qt.NoModifier, rect.center())
+    elif action == "drag":
+        # Cada valor del arrastre se mide por separado: un cruce de umbral no debe bloquear
+        per_value = []
+        for value in step["values"]:
+            t0 = time.perf_counter()
+            target.setValue(value)
+            app.processEvents()
+            per_value.append(round((time.perf_counter() - t0) * 1000, 2))
+        return {"per_value_ms": per_value, "max_value_ms": max(per_value, default=0.0)}
+    else:
+        raise LookupError(f"Unknown action: {action}")
+    return {}
+
+
+def replay(scenario, idle_ms, stall_ms, timeout_s):
+    import life
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    probe = PaintProbe()
+    app.installEventFilter(probe)
+    stalls = StallProbe(stall_ms)
+
+    if scenario.get("setup", {}).get("activated"):
+        # Activacion simulada: no toca el activation.json real del usuario
+        fake = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({"user": "replay", "key": "-"}, fake)
+        fake.close()
+        life.ACTIVATION_FILE = fake.name
+    main = life.MainWindow(None, life.MetaProyecto())
+    main.show()
+    windows = {"MainWindow": main}
+    settle(app, probe, idle_ms, timeout_s)
+
+    results = []
+    for i, step in enumerate(scenario["steps"]):
+        name = f"{i:02d} {step['action']} {step['target']}" + (f" '{step['text']}'" if "text" in step else "")
+        stalls.step = name
+        probe.modal_time = 0.0
+        paints_before = probe.paints
+        t0 = time.perf_counter()
+        entry = {"step": name}
+        try:
+            entry.update(run_step(app, step, windows, probe))
+        except LookupError as e:
+            entry["skipped"] = str(e)
+            results.append(entry)
+            continue
+        handled = time.perf_counter()
+        first_paint = None
+        while time.perf_counter() - handled < timeout_s:
+            app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+            if probe.paints > paints_before:
+                first_paint = probe.last_paint
+                break
+        settle(app, probe, idle_ms, timeout_s)
+        done = max(probe.last_paint, handled)
+        entry.update({
+            "handler_ms": round((handled - t0) * 1000, 2),
+            "repaint_ms": round(((first_paint or handled) - t0) * 1000, 2),
+            "settle_ms": round((done - t0) * 1000, 2),
+            "modal_ms": round(probe.modal_time * 1000, 2),
+        })
+        results.append(entry)
+    stalls.timer.stop()
+    app.removeEventFilter(probe)
+    for w in app.topLevelWidgets():
+        w.close()
+    if scenario.get("setup", {}).get("activated"):
+        os.unlink(life.ACTIVATION_FILE)
+    return results, stalls.stalls
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reproduce escenarios de interfaz y mide su latencia.")
+    ap.add_argument("scenario", nargs="?", default=DEFAULT_SCENARIO)
+    ap.add_argument("--idle-ms", type=float, default=50.0, help="tiempo sin repintados para dar un paso por terminado")
+    ap.add_argument("--stall-ms", type=float, default=100.0, help="hueco del event loop considerado bloqueo")
+    ap.add_argument("--timeout", type=float, default=10.0)
+    ap.add_argument("--budget-ms", type=float, default=None, help="falla si un paso supera este tiempo hasta repintar")
+    ap.add_argument("--top", type=int, default=5)
+    ap.add_argument("--out", default=os.path.join(ROOT, "replay_output.json"))
+    args = ap.parse_args()
+
+    with open(args.scenario, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    results, stalls = replay(scenario, args.idle_ms, args.stall_ms, args.timeout)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"scenario": args.scenario, "steps": results, "stalls": stalls}, f, indent=2, ensure_ascii=False)
+
+    print(f"{'step':60s} {'repaint':>10s} {'settle':>10s} {'modal':>8s}")
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['step'][:60]:60s} skipped ({r['skipped']})")
+        else:
+            print(f"{r['step'][:60]:60s} {r['repaint_ms']:8.1f}ms {r['settle_ms']:8.1f}ms {r['modal_ms']:6.1f}ms")
+    measured = [r for r in results if "repaint_ms" in r]
+    print(f"\nSlowest {args.top} steps (input -> repaint):")
+    for r in sorted(measured, key=lambda r: r["repaint_ms"], reverse=True)[:args.top]:
+        print(f"  {r['repaint_ms']:8.1f} ms  {r['step']}")
+    print(f"\nEvent-loop stalls over {args.stall_ms:.0f} ms: {len(stalls)}")
+    for s in sorted(stalls, key=lambda s: s["ms"], reverse=True)[:args.top]:
+        print(f"  {s['ms']:8.1f} ms  {s['step']}")
+    if args.budget_ms is not None:
+        over = [r for r in measured if r["repaint_ms"] > args.budget_ms]
+        if over:
+            print(f"\n{len(over)} step(s) over the {args.budget_ms:.0f} ms budget")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
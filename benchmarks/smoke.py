@@ -0,0 +1,49 @@
+# Life | Pruebas de humo | MJ
+#
+# Uso (desde la carpeta del proyecto):
+#   python benchmarks/smoke.py
+#   python -m pytest -q benchmarks/smoke.py
+#
+# Recorren caminos de dibujo que el replay no ejercita (impostores) con mallas
+# procedurales, asi que no hacen falta los assets propietarios.
+from __future__ import annotations
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, ROOT)
+
+import life  # noqa: E402
+from PySide6 import QtGui  # noqa: E402
+from PySide6.QtCore import QRect  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+
+def test_impostor_draw():
+    QApplication.instance() or QApplication(sys.argv[:1])
+    atlas = life.ImpostorAtlas.build(life.ProceduralModels.sphere(16), 8, 32)
+    image = QtGui.QImage(64, 64, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    painter = QtGui.QPainter(image)
+    try:
+        for yaw in (0.0, 22.5, 350.0):
+            atlas.draw(painter, image.rect(), yaw, life.ImpostorAtlas.REF_ZOOM)
+    finally:
+        painter.end()
+    # La esfera queda centrada: el centro del sprite tiene que estar cubierto
+    assert image.pixelColor(32, 32).alpha() > 0
+    assert image.pixelColor(0, 0).alpha() == 0
+
+
+def main():
+    for name, fn in sorted(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print("ok", name)
+
+
+if __name__ == "__main__":
+    main()
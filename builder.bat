@@ -13,12 +13,18 @@ rmdir /s /q dist
 rmdir /s /q build
 del Life.spec
 
-REM Crear el ejecutable
-pyinstaller --noconsole --onefile --icon=assets\icons\ico2.ico --add-data "assets;assets" --add-data "docs;docs" --name "Life" life.py
+REM Empaquetar assets y docs en life.pak (mallas y cuadros precompilados, se lee con mmap)
+python pack_assets.py
+if errorlevel 1 exit /b 1
+
+REM Crear el ejecutable: sin --add-data, el onefile ya no extrae los assets en cada arranque
+pyinstaller --noconsole --onefile --icon=assets\icons\ico2.ico --name "Life" life.py
+copy /y life.pak dist\life.pak
 
 echo.
 echo ==========================================================================================
 echo     Matthias, your executable was Successfully created!
 echo     You can find it in: "C:\Lifeness Project\lifeness_simulator\life\dist\Life.exe"
+echo     Keep life.pak next to Life.exe when distributing it.
 echo ==========================================================================================
 pause
@@ -2,19 +2,29 @@
 
 # Utilities
 from __future__ import annotations
+import io
 import os
 import sys
 import json, webbrowser
 import time
 import math
 import shutil
+import ctypes
+import hashlib
+import mmap
+import struct
 import logging
+import weakref
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
+from collections import OrderedDict
 from pathlib import Path
 from logging.handlers import RotatingFileHandler
 from dataclasses import dataclass, field
+import numpy as np
 from PIL import Image, ImageSequence
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 from platformdirs import user_documents_dir
 
@@ -24,8 +34,10 @@ from PySide6.QtWidgets import (QApplication, QGraphicsOpacityEffect, QMainWindow
 from PySide6.QtGui import QFont, QAction, QIcon, QPixmap, QMovie, QColor
 from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer, QRect
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
+import shiboken6
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from OpenGL.GL.shaders import compileProgram, compileShader
 
 # DOCX
 from docx import Document
@@ -37,6 +49,9 @@ BASE_LOG = user_documents_dir()
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 LOGS_DIR = os.path.join(BASE_LOG, "Lifeness Simulator/logs")
 ACTIVATION_FILE = os.path.join(BASE_LOG, "Lifeness Simulator", "activation.json")
+SCENARIOS_DIR = os.path.join(BASE_LOG, "Lifeness Simulator", "scenarios")
+CONFIG_FILE = os.path.join(BASE_LOG, "Lifeness Simulator", "config.json")
+CACHE_DIR = os.path.join(BASE_LOG, "Lifeness Simulator", "cache")
 
 os.makedirs(ASSETS_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -64,15 +79,249 @@ class MetaProyecto:
     idioma: str = "es"
     descripcion: str = "Simulation that transforms"
 
+@dataclass
+class LifeConfig: # Ajustes tecnicos, se sobreescriben desde Documents/Lifeness Simulator/config.json
+    stall_watchdog: bool = True
+    stall_threshold_ms: float = 250.0
+    profiler_interval_ms: float = 10.0
+    cpu_budget_mb: float = 0.0               # 0 = sin limite
+    gpu_budget_mb: float = 0.0
+    release_cpu_after_upload: bool = False   # libera listas de OBJ al compilar la display list
+    debug_gl_leaks: bool = False             # reporta nombres GL y objetos vivos al cerrar visores
+    window_pool: bool = True                 # reutiliza DiseasePatogen/ExtraWindow en vez de reconstruirlas
+    disease_windows_max: int = 1             # ventanas de enfermedad abiertas a la vez (LRU)
+    shader_pipeline: bool = True             # GLSL 3.3 con luz por pixel; False = fixed-function
+    impostor_mode: bool = False              # equipos muy lentos: sprites por yaw en vez de geometria
+    impostor_frames: int = 36
+    impostor_size: int = 256
+    viewer_backend: str = "auto"             # "auto" | "gl" | "software" (rasterizador NumPy)
+    software_frame_ms: float = 40.0          # tiempo de cuadro objetivo del visor software
+    visibility_sectors: int = 16             # sectores de yaw con triangulos visibles precalculados; 0 = desactivado
+    particle_count: int = 20000              # globulos/esporas por escena (el visor software usa un cuarto)
+    procedural_lod: str = "medium"           # detalle de patogenos y ADN procedurales: "low" | "medium" | "high"
+
+    @classmethod
+    def load(cls) -> "LifeConfig":
+        cfg = cls()
+        if os.path.isfile(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for key, value in data.items():
+                    if hasattr(cfg, key):
+                        setattr(cfg, key, value)
+                    else:
+                        logger.warning("config.json: unknown key %s", key)
+            except Exception as e:
+                logger.warning("config.json not loaded: %s", e)
+        return cfg
+
+CONFIG = LifeConfig.load()
+ASSET_LOADER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="life-loader") # parseo de assets fuera del hilo GUI
+# Precalculos largos (conjuntos de visibilidad: ~40 s con 1M triangulos) en su propio hilo para no trabar BVH, prefetch y streaming
+PRECOMPUTE_LOADER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="life-precompute")
+
+def shiboken_alive(obj) -> bool: # False si Qt ya borro el objeto C++ (WA_DeleteOnClose)
+    return shiboken6.isValid(obj)
+
+def stack_lines(frame, limit: int = 48) -> List[str]: # Pila de un frame, de afuera hacia adentro
+    lines = []
+    while frame is not None and len(lines) < limit:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        lines.append(f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    lines.reverse()
+    return lines
+
+# ---------------------------------------------------------------------------
+class ResourceTracker: # Contabilidad de memoria CPU/GPU por asset y ventana
+    def __init__(self):
+        self.entries: Dict[int, dict] = {}
+        self.lock = threading.Lock()
+        self._enforce_pending = False
+
+    def register(self, obj, kind: str, name: str, owner=None, cpu: int = 0, gpu: int = 0):
+        key = id(obj)
+        with self.lock:
+            self.entries[key] = {
+                "kind": kind, "name": name, "cpu": cpu, "gpu": gpu,
+                "owner": weakref.ref(owner) if owner is not None else None,
+                "obj": weakref.ref(obj), "last_used": time.monotonic(),
+            }
+        weakref.finalize(obj, self.unregister, key)
+        self.schedule_enforce()
+
+    def update(self, obj, cpu: Optional[int] = None, gpu: Optional[int] = None):
+        entry = self.entries.get(id(obj))
+        if entry is None:
+            return
+        if cpu is not None:
+            entry["cpu"] = cpu
+        if gpu is not None:
+            entry["gpu"] = gpu
+        self.schedule_enforce()
+
+    def touch(self, obj):
+        entry = self.entries.get(id(obj))
+        if entry is not None:
+            entry["last_used"] = time.monotonic()
+
+    def unregister(self, key: int):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    @staticmethod
+    def owner_label(entry) -> str:
+        widget = entry["owner"]() if entry["owner"] else None
+        if widget is None:
+            return "(sin ventana)"
+        try:
+            win = widget.window()
+        except RuntimeError:
+            return "(ventana cerrada)"
+        return f"{type(win).__name__} #{id(win) & 0xFFFF:04x}"
+
+    def snapshot(self) -> List[dict]:
+        with self.lock:
+            rows = [dict(e, window=self.owner_label(e)) for e in self.entries.values()]
+        return sorted(rows, key=lambda r: r["cpu"] + r["gpu"], reverse=True)
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        out: Dict[str, Dict[str, int]] = {}
+        for row in self.snapshot():
+            t = out.setdefault(row["window"], {"cpu": 0, "gpu": 0})
+            t["cpu"] += row["cpu"]
+            t["gpu"] += row["gpu"]
+        return out
+
+    def usage(self) -> Tuple[int, int]: # (cpu, gpu) en bytes de lo que sigue vivo
+        with self.lock:
+            live = [e for e in self.entries.values() if e["obj"]() is not None]
+        return sum(e["cpu"] for e in live), sum(e["gpu"] for e in live)
+
+    def schedule_enforce(self):
+        # Se aplaza al event loop: la eviccion necesita hacer current otros contextos GL
+        app = QApplication.instance()
+        if app is None or self._enforce_pending or not (CONFIG.cpu_budget_mb or CONFIG.gpu_budget_mb):
+            return
+        if threading.current_thread() is not threading.main_thread():
+            return # lo registrado desde ASSET_LOADER se revisa en la siguiente llamada del hilo GUI
+        self._enforce_pending = True
+        QTimer.singleShot(0, self.enforce_budgets)
+
+    def enforce_budgets(self):
+        self._enforce_pending = False
+        mb = 1024 * 1024
+        with self.lock:
+            live = [e for e in self.entries.values() if e["obj"]() is not None]
+        lru = sorted(live, key=lambda e: e["last_used"])
+        cpu = sum(e["cpu"] for e in live)
+        gpu = sum(e["gpu"] for e in live)
+        if CONFIG.cpu_budget_mb and cpu > CONFIG.cpu_budget_mb * mb:
+            # Primero: soltar copias CPU de lo que ya esta en la GPU
+            for e in lru:
+                obj = e["obj"]()
+                if e["gpu"] and e["cpu"] and hasattr(obj, "release_cpu"):
+                    cpu -= e["cpu"]
+                    obj.release_cpu()
+                    if cpu <= CONFIG.cpu_budget_mb * mb:
+                        break
+        if CONFIG.gpu_budget_mb and gpu > CONFIG.gpu_budget_mb * mb:
+            for e in lru[:-1]:  # el recurso mas reciente (el que se esta mostrando) no se toca
+                obj = e["obj"]()
+                widget = e["owner"]() if e["owner"] else None
+                if not e["gpu"] or not hasattr(obj, "release_gl") or widget is None:
+                    continue
+                try:
+                    widget.makeCurrent()
+                    obj.release_gl()
+                    widget.doneCurrent()
+                except RuntimeError:
+                    continue
+                gpu -= e["gpu"]
+                logger.info("Evicted %s from GPU (%s)", e["name"], self.owner_label(e))
+                if gpu <= CONFIG.gpu_budget_mb * mb:
+                    break
+
+RESOURCES = ResourceTracker()
+
+class GLLeakTracker: # Modo debug: nombres GL sin liberar y objetos Python vivos por clase de ventana
+    def __init__(self):
+        self.names: Dict[tuple, str] = {}   # (tipo, nombre, id del visor) -> clase de ventana
+        self.objects = weakref.WeakSet()
+
+    @property
+    def enabled(self) -> bool:
+        return CONFIG.debug_gl_leaks
+
+    @staticmethod
+    def window_class(widget) -> str:
+        try:
+            return type(widget.window()).__name__
+        except (RuntimeError, AttributeError):
+            return "(destruida)"
+
+    def alloc(self, kind: str, name: int, widget):
+        if self.enabled and widget is not None:
+            self.names[(kind, int(name), id(widget))] = self.window_class(widget)
+
+    def free(self, kind: str, name: int, widget):
+        if widget is not None:
+            self.names.pop((kind, int(name), id(widget)), None)
+
+    def watch(self, obj):
+        if self.enabled:
+            self.objects.add(obj)
+
+    def watch_window(self, window, viewer):
+        # El reporte se hace cuando Qt destruye la ventana (WA_DeleteOnClose)
+        if self.enabled:
+            name, vid = type(window).__name__, id(viewer)
+            window.destroyed.connect(lambda *_: QTimer.singleShot(0, lambda: self.report(f"close {name}", [vid])))
+
+    def report(self, reason: str, closed_ids=()):
+        if not self.enabled:
+            return
+        import gc
+        gc.collect()
+        closed = set(closed_ids)
+        leaked: Dict[str, Dict[str, int]] = {}
+        for (kind, _, owner), cls in self.names.items():
+            if owner in closed:
+                per = leaked.setdefault(cls, {})
+                per[kind] = per.get(kind, 0) + 1
+        live: Dict[str, int] = {}
+        for obj in list(self.objects):
+            if isinstance(obj, QtCore.QObject) and not shiboken_alive(obj):
+                continue # solo queda el wrapper de Python, el objeto Qt ya no existe
+            live[type(obj).__name__] = live.get(type(obj).__name__, 0) + 1
+        lines = [f"GL leak check ({reason}): {len(self.names)} live GL names"]
+        for cls, kinds in sorted(leaked.items()):
+            lines.append(f"  LEAK {cls}: " + ", ".join(f"{k}={n}" for k, n in sorted(kinds.items())))
+        lines.append("  live objects: " + ", ".join(f"{k}={n}" for k, n in sorted(live.items())))
+        for line in lines:
+            (logger.warning if "LEAK" in line else logger.info)(line)
+        try:
+            with open(os.path.join(LOGS_DIR, "gl_leak_report.txt"), "a", encoding="utf-8") as f:
+                f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} " + "\n".join(lines) + "\n")
+        except OSError:
+            pass
+
+GL_LEAKS = GLLeakTracker()
+
 # ---------------------------------------------------------------------------
 class OBJ:
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, owner=None):
         self.filename = filename
         self.vertices: List[List[float]] = []
         self.normals: List[List[float]] = []
         self.texcoords: List[List[float]] = []
         self.faces: List[List[tuple]] = []
         self.gl_list = None
+        self.cpu_released = False
+        self.owner = weakref.ref(owner) if owner is not None else None
+        GL_LEAKS.watch(self)
         if os.path.isfile(filename):
             try:
                 self._load_file(filename)
@@ -81,6 +330,48 @@ class OBJ:
                 logger.exception("Error OBJ %s: %s", filename, e)
         else:
             logger.warning("OBJ not found: %s", filename)
+        RESOURCES.register(self, "mesh", os.path.basename(filename), owner, cpu=self.cpu_bytes())
+
+    def cpu_bytes(self) -> int:
+        # Estimacion: cada fila es una lista/tupla de Python con floats o ints en caja
+        total = 0
+        for rows, item in ((self.vertices, 24), (self.normals, 24), (self.texcoords, 24)):
+            if rows:
+                total += sys.getsizeof(rows) + len(rows) * (sys.getsizeof(rows[0]) + len(rows[0]) * item)
+        if self.faces:
+            corners = sum(len(f) for f in self.faces)
+            total += sys.getsizeof(self.faces) + len(self.faces) * sys.getsizeof(self.faces[0])
+            total += corners * (sys.getsizeof((0, 0, 0)) + 3 * 28)
+        return total
+
+    def gpu_bytes(self) -> int:
+        # Display list: posicion + normal + uv en float32 por esquina
+        return sum(len(f) for f in self.faces) * 8 * 4 if self.gl_list else 0
+
+    def release_cpu(self):
+        # Se reemplazan las listas (no se vacian) por si otra instancia las comparte
+        if self.gl_list is None or self.cpu_released:
+            return
+        self.vertices, self.normals, self.texcoords, self.faces = [], [], [], []
+        self.cpu_released = True
+        RESOURCES.update(self, cpu=0)
+        logger.info("CPU copy released: %s", self.filename)
+
+    def release_gl(self): # Requiere el contexto GL dueño como current
+        if self.gl_list:
+            try:
+                glDeleteLists(self.gl_list, 1)
+                GL_LEAKS.free("list", self.gl_list, self.owner() if self.owner else None)
+            except Exception as e:
+                logger.warning("glDeleteLists %s: %s", self.filename, e)
+        self.gl_list = None
+        RESOURCES.update(self, gpu=0)
+
+    def _reload(self):
+        # Tras liberar CPU y GPU la malla se vuelve a leer del disco al necesitarse
+        self._load_file(self.filename)
+        self.cpu_released = False
+        RESOURCES.update(self, cpu=self.cpu_bytes())
 
     def _load_file(self, filename: str):
         with open(filename, "r", encoding="utf-8", errors="ignore") as f:
@@ -107,6 +398,8 @@ class OBJ:
     def create_gl_list(self):
         if self.gl_list is not None:
             return
+        if self.cpu_released:
+            self._reload()
         try:
             self.gl_list = glGenLists(1)
             glNewList(self.gl_list, GL_COMPILE)
@@ -133,6 +426,10 @@ class OBJ:
                             glVertex3fv(self.vertices[vi])
                     glEnd()
             glEndList()
+            GL_LEAKS.alloc("list", self.gl_list, self.owner() if self.owner else None)
+            RESOURCES.update(self, gpu=self.gpu_bytes())
+            if CONFIG.release_cpu_after_upload:
+                self.release_cpu()
         except Exception as e:
             logger.exception("Error making GL Lists %s: %s", self.filename, e)
             try:
@@ -146,11 +443,2860 @@ class OBJ:
         if self.gl_list is None:
             self.create_gl_list()
         if self.gl_list:
+            RESOURCES.touch(self)
             try:
                 glCallList(self.gl_list)
             except Exception as e:
                 logger.exception("Error en glCallList: %s", e)
 
+class BackgroundTextures: # Texturas del fondo GIF de un visor (handle para RESOURCES)
+    _decoded: Dict[str, list] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, tex_ids: List[int]):
+        self.tex_ids = list(tex_ids)
+
+    @classmethod
+    def frames(cls, path: str) -> list:
+        # Cuadros RGB del GIF decodificados una sola vez (o ya decodificados en life.pak); cada visor arma sus texturas o QImages
+        with cls._lock:
+            frames = cls._decoded.get(path)
+            if frames is None:
+                frames = ASSET_PACK.frames(path) if ASSET_PACK is not None else None
+                if frames is None:
+                    with Image.open(path) as gif:
+                        frames = [frame.convert("RGB") for frame in ImageSequence.Iterator(gif)]
+                cls._decoded[path] = frames
+        return frames
+
+    def free(self, widget=None): # Requiere el contexto GL dueño como current
+        if self.tex_ids:
+            glDeleteTextures(self.tex_ids)
+            for tex in self.tex_ids:
+                GL_LEAKS.free("texture", tex, widget)
+        self.tex_ids = []
+        RESOURCES.update(self, gpu=0)
+
+# ---------------------------------------------------------------------------
+@dataclass
+class MeshArrays: # Malla triangulada en arrays NumPy (float32 / uint32), lista para VBO
+    positions: np.ndarray
+    normals: np.ndarray
+    indices: np.ndarray  # (M, 3)
+
+    @property
+    def triangles(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.normals.nbytes + self.indices.nbytes
+
+    @classmethod
+    def from_obj(cls, obj: "OBJ") -> "MeshArrays":
+        # Triangulacion en abanico; cada par (v, vn) distinto es un vertice del buffer
+        corners, tris = [], []
+        for face in obj.faces:
+            base = len(corners)
+            corners.extend((vi, ni) for vi, _, ni in face)
+            tris.extend((base, base + k, base + k + 1) for k in range(1, len(face) - 1))
+        if not corners or not obj.vertices:
+            return cls(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.float32), np.zeros((0, 3), np.uint32))
+        pairs = np.asarray(corners, dtype=np.int64)
+        unique, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        verts = np.asarray(obj.vertices, dtype=np.float32)
+        positions = verts[np.clip(unique[:, 0], 0, len(verts) - 1)]
+        indices = inverse.reshape(-1)[np.asarray(tris, dtype=np.int64)].astype(np.uint32)
+        if obj.normals and (unique[:, 1] >= 0).all():
+            normals = np.asarray(obj.normals, dtype=np.float32)[np.clip(unique[:, 1], 0, len(obj.normals) - 1)]
+        else:
+            normals = cls.smooth_normals(positions, indices)
+        return cls(positions, normals, indices)
+
+    @staticmethod
+    def smooth_normals(positions: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        tri = positions[indices]
+        face_n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        normals = np.zeros_like(positions)
+        for k in range(3):
+            np.add.at(normals, indices[:, k], face_n)
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        return (normals / np.maximum(length, 1e-12)).astype(np.float32)
+
+    @classmethod
+    def revolve(cls, radii, heights, segments: int) -> "MeshArrays":
+        # Superficie de revolucion alrededor de Y a partir de un perfil (r, y) de arriba hacia abajo
+        r = np.asarray(radii, dtype=np.float32)
+        y = np.asarray(heights, dtype=np.float32)
+        phi = np.linspace(0.0, 2.0 * math.pi, segments, endpoint=False, dtype=np.float32)
+        positions = np.stack([r[:, None] * np.cos(phi)[None, :], np.repeat(y[:, None], segments, axis=1),
+                              r[:, None] * np.sin(phi)[None, :]], axis=-1).reshape(-1, 3)
+        k, j = np.meshgrid(np.arange(len(r) - 1), np.arange(segments), indexing="ij")
+        a, b = k * segments + j, k * segments + (j + 1) % segments
+        c, d = a + segments, b + segments
+        indices = np.concatenate([np.stack([a, d, c], -1).reshape(-1, 3), np.stack([a, b, d], -1).reshape(-1, 3)]).astype(np.uint32) # CCW desde afuera
+        return cls(positions, cls.smooth_normals(positions, indices), indices)
+
+    def save(self, path: str):
+        np.savez(path, positions=self.positions, normals=self.normals, indices=self.indices)
+
+    @classmethod
+    def load(cls, path: str) -> "MeshArrays":
+        with np.load(path) as data:
+            return cls(data["positions"], data["normals"], data["indices"])
+
+    @classmethod
+    def compiled(cls, obj: "OBJ") -> "MeshArrays":
+        # Version triangulada de un OBJ, guardada en CACHE_DIR para no retriangular en cada arranque
+        if isinstance(obj, ProceduralOBJ):
+            return obj.arrays
+        cache = mesh_cache_path([obj.filename], ".mesh.npz")
+        if os.path.isfile(cache):
+            try:
+                return cls.load(cache)
+            except Exception as e:
+                logger.warning("Mesh cache unreadable %s: %s", cache, e)
+        if obj.cpu_released:
+            obj._reload()
+        mesh = cls.from_obj(obj)
+        if mesh.triangles:
+            mesh.save(cache)
+        return mesh
+
+class MeshFormats: # GLB, PLY binario y STL binario -> MeshArrays: np.frombuffer sobre el archivo, sin parseo por elemento
+    GLB_MAGIC = 0x46546C67  # "glTF"
+    GLB_JSON, GLB_BIN = 0x4E4F534A, 0x004E4942
+    GLTF_TYPES = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+    GLTF_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}
+    PLY_TYPES = {"char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1", "short": "i2", "int16": "i2", "ushort": "u2",
+                 "uint16": "u2", "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4", "float": "f4", "float32": "f4",
+                 "double": "f8", "float64": "f8"}
+    STL_RECORD = np.dtype([("normal", "<f4", 3), ("v", "<f4", (3, 3)), ("attr", "<u2")])  # 50 bytes por triangulo
+
+    @classmethod
+    def load(cls, path: str, data: Optional[bytes] = None) -> MeshArrays:
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        return MESH_FORMATS[os.path.splitext(path)[1].lower()](memoryview(data))
+
+    @staticmethod
+    def _finish(positions: np.ndarray, normals: Optional[np.ndarray], indices: np.ndarray) -> MeshArrays:
+        # Sin copia si el archivo ya trae float32 / uint32; normales suavizadas si faltan
+        positions = positions.astype(np.float32, copy=False)
+        indices = indices.reshape(-1, 3).astype(np.uint32, copy=False)
+        if len(indices) and int(indices.max()) >= len(positions):
+            raise ValueError("triangle indices out of range")
+        if normals is None:
+            normals = MeshArrays.smooth_normals(positions, indices)
+        return MeshArrays(positions, normals.astype(np.float32, copy=False), indices)
+
+    @staticmethod
+    def _node_matrix(node: dict) -> np.ndarray:
+        if "matrix" in node:
+            return np.array(node["matrix"], np.float64).reshape(4, 4).T # glTF guarda por columnas
+        x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+        rot = np.array([[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+        m = np.eye(4)
+        m[:3, :3] = rot * np.asarray(node.get("scale", (1.0, 1.0, 1.0)))
+        m[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+        return m
+
+    @classmethod
+    def glb(cls, buf: memoryview) -> MeshArrays:
+        # glTF 2.0 binario: los accessors son vistas (con stride) sobre el chunk BIN; los nodos aplican su transformacion
+        magic, version, length = struct.unpack_from("<III", buf, 0)
+        if magic != cls.GLB_MAGIC or version != 2:
+            raise ValueError("not a glTF 2.0 binary")
+        doc, binary, offset = None, None, 12
+        while offset + 8 <= min(length, len(buf)):
+            size, kind = struct.unpack_from("<II", buf, offset)
+            if kind == cls.GLB_JSON:
+                doc = json.loads(bytes(buf[offset + 8:offset + 8 + size]))
+            elif kind == cls.GLB_BIN and binary is None:
+                binary = buf[offset + 8:offset + 8 + size]
+            offset += 8 + size
+        if doc is None:
+            raise ValueError("GLB without a JSON chunk")
+        if doc.get("extensionsRequired"):
+            raise ValueError(f"glTF extensions not supported: {', '.join(doc['extensionsRequired'])}")
+
+        def accessor(index: int) -> np.ndarray:
+            a = doc["accessors"][index]
+            if "sparse" in a or "bufferView" not in a:
+                raise ValueError("sparse glTF accessors not supported")
+            view = doc["bufferViews"][a["bufferView"]]
+            if view.get("buffer", 0) != 0 or binary is None:
+                raise ValueError("external glTF buffers not supported")
+            dtype = np.dtype(cls.GLTF_TYPES[a["componentType"]])
+            width = cls.GLTF_WIDTHS[a["type"]]
+            stride = view.get("byteStride") or dtype.itemsize * width
+            return np.ndarray((a["count"], width), dtype, buffer=binary, offset=view.get("byteOffset", 0) + a.get("byteOffset", 0),
+                              strides=(stride, dtype.itemsize))
+
+        nodes = doc.get("nodes", [])
+        scenes = doc.get("scenes")
+        roots = scenes[doc.get("scene", 0)].get("nodes", []) if scenes else [i for i, n in enumerate(nodes) if "mesh" in n]
+        placed, stack = [], [(i, np.eye(4)) for i in roots]
+        while stack:
+            i, parent = stack.pop()
+            world = parent @ cls._node_matrix(nodes[i])
+            if "mesh" in nodes[i]:
+                placed.append((nodes[i]["mesh"], world))
+            stack.extend((c, world) for c in nodes[i].get("children", ()))
+        if not placed and doc.get("meshes"):
+            placed = [(0, np.eye(4))]
+        parts = []
+        for mesh_index, world in placed:
+            for prim in doc["meshes"][mesh_index]["primitives"]:
+                if prim.get("mode", 4) != 4 or "POSITION" not in prim["attributes"]:
+                    continue # solo listas de triangulos
+                pos = accessor(prim["attributes"]["POSITION"])
+                nrm = accessor(prim["attributes"]["NORMAL"]) if "NORMAL" in prim["attributes"] else None
+                idx = accessor(prim["indices"]) if "indices" in prim else np.arange(len(pos), dtype=np.uint32)
+                if not np.allclose(world, np.eye(4)):
+                    pos = pos @ world[:3, :3].T + world[:3, 3]
+                    if nrm is not None:
+                        nrm = nrm @ np.linalg.inv(world[:3, :3])
+                        nrm = nrm / np.maximum(np.linalg.norm(nrm, axis=1, keepdims=True), 1e-12)
+                parts.append(cls._finish(pos, nrm, idx))
+        if not parts:
+            raise ValueError("GLB without triangle meshes")
+        if len(parts) == 1:
+            return parts[0]
+        offsets = np.cumsum([0] + [len(m.positions) for m in parts[:-1]]).astype(np.uint32)
+        return MeshArrays(np.concatenate([m.positions for m in parts]), np.concatenate([m.normals for m in parts]),
+                          np.concatenate([m.indices + off for m, off in zip(parts, offsets)]))
+
+    @classmethod
+    def ply(cls, buf: memoryview) -> MeshArrays:
+        # PLY binario: cada elemento es un dtype estructurado; las caras, si son todas triangulos, tambien
+        head = bytes(buf[:min(len(buf), 65536)])
+        end = head.find(b"end_header")
+        if not head.startswith(b"ply") or end < 0:
+            raise ValueError("not a PLY file")
+        offset = head.index(b"\n", end) + 1
+        elements, endian = [], None
+        for line in head[:end].decode("ascii", "replace").splitlines():
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "format":
+                endian = {"binary_little_endian": "<", "binary_big_endian": ">"}.get(words[1])
+                if endian is None:
+                    raise ValueError("ASCII PLY not supported: export as binary")
+            elif words[0] == "element":
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == "property" and elements:
+                if words[1] == "list":
+                    elements[-1][2].append((words[4], (cls.PLY_TYPES[words[2]], cls.PLY_TYPES[words[3]])))
+                else:
+                    elements[-1][2].append((words[2], cls.PLY_TYPES[words[1]]))
+        vertex, faces = None, None
+        for name, count, props in elements:
+            if vertex is not None and faces is not None:
+                break
+            lists = [p for p, t in props if isinstance(t, tuple)]
+            if not lists:
+                dtype = np.dtype([(p, endian + t) for p, t in props])
+                data = np.frombuffer(buf, dtype, count, offset)
+                offset += dtype.itemsize * count
+                if name == "vertex":
+                    vertex = data
+                continue
+            if name != "face" or len(lists) != 1:
+                raise ValueError(f"PLY element '{name}' with list properties not supported")
+            faces, offset = cls._ply_faces(buf, offset, count, props, endian)
+        if vertex is None or faces is None:
+            raise ValueError("PLY without vertex or face elements")
+        fields = vertex.dtype.names
+        positions = np.stack([vertex["x"], vertex["y"], vertex["z"]], axis=1)
+        normals = np.stack([vertex["nx"], vertex["ny"], vertex["nz"]], axis=1) if {"nx", "ny", "nz"} <= set(fields) else None
+        return cls._finish(positions, normals, faces)
+
+    @classmethod
+    def _ply_faces(cls, buf: memoryview, offset: int, count: int, props: list, endian: str) -> tuple:
+        # Camino rapido: todas triangulos -> registro de tamaño fijo. Si no, se recorre cara por cara y se abanica
+        fields = []
+        for p, t in props:
+            fields += [(p + "_n", endian + t[0]), (p, endian + t[1], 3)] if isinstance(t, tuple) else [(p, endian + t)]
+        dtype = np.dtype(fields)
+        key = next(p for p, t in props if isinstance(t, tuple))
+        try:
+            data = np.frombuffer(buf, dtype, count, offset)
+            if (data[key + "_n"] == 3).all():
+                return data[key], offset + dtype.itemsize * count
+        except ValueError:
+            pass # buffer mas corto: hay poligonos de mas de 3 lados
+        tris = []
+        for _ in range(count):
+            for p, t in props:
+                if isinstance(t, tuple):
+                    n_type, i_type = np.dtype(t[0]), np.dtype(t[1])
+                    n = struct.unpack_from(endian + n_type.char, buf, offset)[0]
+                    poly = struct.unpack_from(f"{endian}{n}{i_type.char}", buf, offset + n_type.itemsize)
+                    tris.extend((poly[0], poly[k], poly[k + 1]) for k in range(1, n - 1))
+                    offset += n_type.itemsize + n * i_type.itemsize
+                else:
+                    offset += np.dtype(t).itemsize
+        return np.array(tris, np.uint32).reshape(-1, 3), offset
+
+    @classmethod
+    def stl(cls, buf: memoryview) -> MeshArrays:
+        # STL binario repite cada vertice por triangulo: se sueldan por posicion para compartir normales suavizadas
+        if len(buf) < 84:
+            raise ValueError("not an STL file")
+        count = struct.unpack_from("<I", buf, 80)[0]
+        if len(buf) < 84 + count * cls.STL_RECORD.itemsize:
+            raise ValueError("ASCII STL not supported: export as binary" if bytes(buf[:5]) == b"solid" else "truncated STL")
+        corners = np.frombuffer(buf, cls.STL_RECORD, count, 84)["v"].reshape(-1, 3)
+        order = np.lexsort(corners.T) # ordenar y marcar cambios: ~7x mas rapido que np.unique(axis=0)
+        ordered = corners[order]
+        new = np.ones(len(ordered), bool)
+        new[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+        inverse = np.empty(len(corners), np.uint32)
+        inverse[order] = np.cumsum(new) - 1
+        return cls._finish(ordered[new], None, inverse)
+
+MESH_FORMATS = {".glb": MeshFormats.glb, ".ply": MeshFormats.ply, ".stl": MeshFormats.stl}  # ademas de .obj
+
+def perspective_matrix(fovy: float, aspect: float, near: float, far: float) -> np.ndarray:
+    # Igual que gluPerspective, en filas (se sube con transpose=GL_TRUE)
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    return np.array([
+        [f / aspect, 0.0, 0.0, 0.0],
+        [0.0, f, 0.0, 0.0],
+        [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+        [0.0, 0.0, -1.0, 0.0],
+    ], dtype=np.float32)
+
+
+def view_matrix(zoom: float, yaw: float) -> np.ndarray:
+    # glTranslatef(0, 0, zoom) + glRotatef(yaw, 0, 1, 0)
+    c, s = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+    return np.array([
+        [c, 0.0, s, 0.0],
+        [0.0, 1.0, 0.0, 0.0],
+        [-s, 0.0, c, zoom],
+        [0.0, 0.0, 0.0, 1.0],
+    ], dtype=np.float32)
+
+
+def mesh_cache_path(sources: List[str], suffix: str) -> str:
+    # Clave por ruta + tamaño + fecha: si el asset cambia se recompila solo
+    h = hashlib.sha1()
+    for src in sources:
+        h.update(os.path.abspath(src).encode("utf-8"))
+        entry = ASSET_PACK.lookup(src) if ASSET_PACK is not None else None
+        if entry is not None:
+            # Lo que se carga es la malla compilada (soldada) del pack: no comparte cache con el OBJ parseado
+            h.update(f"{entry['sha1']}:{entry.get('build', 0)}".encode())
+        elif os.path.isfile(src):
+            st = os.stat(src)
+            h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    stem = os.path.splitext(os.path.basename(sources[0]))[0] if sources else "mesh"
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"{stem}_{h.hexdigest()[:16]}{suffix}")
+
+
+# ---------------------------------------------------------------------------
+# life.pak: assets y docs en un solo archivo mapeado en memoria; el exe onefile ya no los extrae en cada arranque
+PACK_FILE = os.path.join(os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else BASE_DIR, "life.pak")
+PACK_ROOTS = ("assets", "docs")
+
+class AssetPack: # Indice JSON + payloads alineados; mallas y cuadros se leen con np.frombuffer sobre el mmap
+    HEADER = struct.Struct("<8sIQQ")  # magia, version, offset y largo del indice
+    MAGIC = b"LIFEPAK1"
+    VERSION = 1
+    ALIGN = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, offset, length = self.HEADER.unpack_from(self.map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"not a life.pak v{self.VERSION}")
+        self.index: Dict[str, dict] = json.loads(self.map[offset:offset + length].decode("utf-8"))
+
+    @classmethod
+    def open_default(cls) -> Optional["AssetPack"]:
+        if not os.path.isfile(PACK_FILE):
+            return None
+        try:
+            pack = cls(PACK_FILE)
+            logger.info("Asset pack: %s (%d assets)", PACK_FILE, len(pack.index))
+            return pack
+        except Exception as e:
+            logger.warning("Asset pack not usable %s: %s", PACK_FILE, e)
+            return None
+
+    @staticmethod
+    def asset_id(path: str) -> str:
+        # "assets/anatomy/male.obj": relativa a BASE_DIR con "/"; las rutas relativas ya lo son
+        if os.path.isabs(path):
+            path = os.path.relpath(path, BASE_DIR)
+        return os.path.normpath(path).replace(os.sep, "/")
+
+    def lookup(self, path: str, suffix: str = "") -> Optional[dict]:
+        # Entrada del pack, salvo que el archivo en disco sea otro (desarrollo con assets editados)
+        entry = self.index.get(self.asset_id(path) + suffix)
+        if entry is not None and os.path.isfile(path):
+            st = os.stat(path)
+            if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+                return None
+        return entry
+
+    def raw(self, path: str) -> Optional[bytes]:
+        entry = self.lookup(path)
+        if entry is None or entry["kind"] != "raw":
+            return None
+        return self.map[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def mesh(self, path: str, lod: str = "") -> Optional[MeshArrays]:
+        # Vistas de solo lectura sobre el archivo: el SO pagina lo que se use. lod: "" (completa), "lod1", "lod2"
+        entry = self.lookup(path, f"#{lod}" if lod else "")
+        if entry is None or entry["kind"] != "mesh":
+            return None
+        v, t, off = entry["vertices"], entry["triangles"], entry["offset"]
+        return MeshArrays(np.frombuffer(self.map, np.float32, v * 3, off).reshape(v, 3),
+                          np.frombuffer(self.map, np.float32, v * 3, off + v * 12).reshape(v, 3),
+                          np.frombuffer(self.map, np.uint32, t * 3, off + v * 24).reshape(t, 3))
+
+    def frames(self, path: str) -> Optional[list]:
+        # Cuadros RGB ya decodificados de un GIF
+        entry = self.lookup(path, "#frames")
+        if entry is None:
+            return None
+        w, h = entry["width"], entry["height"]
+        size = w * h * 3
+        view = memoryview(self.map)
+        return [Image.frombuffer("RGB", (w, h), view[entry["offset"] + i * size:entry["offset"] + (i + 1) * size], "raw", "RGB", 0, 1)
+                for i in range(entry["count"])]
+
+    @classmethod
+    def build(cls, out_path: str, roots=PACK_ROOTS, compiled: Optional[Dict[str, dict]] = None) -> int:
+        # Arma el pack con lo que dejo AssetCompiler (mallas, LODs, cuadros) y el resto tal cual; .tmp y reemplazo al final
+        if compiled is None:
+            compiled = AssetCompiler().run(roots)
+        index: Dict[str, dict] = {}
+        tmp = out_path + ".tmp"
+        with open(tmp, "wb") as out:
+            out.write(b"\0" * cls.HEADER.size)
+            for root in roots:
+                for folder, _, files in sorted(os.walk(os.path.join(BASE_DIR, root))):
+                    for name in sorted(files):
+                        path = os.path.join(folder, name)
+                        aid = cls.asset_id(path)
+                        item = compiled.get(aid) or AssetCompiler.describe_file(path) # catalog.json se escribe despues de compilar
+                        payloads = []
+                        if item["entries"]:
+                            with open(item["blob"], "rb") as blob:
+                                for suffix, kind, offset, length, meta in item["entries"]:
+                                    blob.seek(offset)
+                                    payloads.append((suffix, kind, blob.read(length), meta))
+                        if not any(p[0] == "" for p in payloads):
+                            with open(path, "rb") as f:
+                                payloads.insert(0, ("", "raw", f.read(), {}))
+                        for suffix, kind, data, meta in payloads:
+                            out.write(b"\0" * (-out.tell() % cls.ALIGN))
+                            index[aid + suffix] = dict(meta, kind=kind, offset=out.tell(), length=len(data),
+                                                       size=item["size"], mtime_ns=item["mtime_ns"], sha1=item["sha1"])
+                            out.write(data)
+            offset = out.tell()
+            blob = json.dumps(index, separators=(",", ":")).encode("utf-8")
+            out.write(blob)
+            out.seek(0)
+            out.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, offset, len(blob)))
+        os.replace(tmp, out_path)
+        logger.info("Asset pack written: %s (%d entries, %.1f MB)", out_path, len(index), os.path.getsize(out_path) / 1e6)
+        return len(index)
+
+class AssetCompiler: # Build offline: cada OBJ y GIF se compila en un pool de procesos; incremental por hash de contenido
+    VERSION = 1  # subir si cambia la compilacion: invalida los compilados y las caches de malla derivadas del pack
+    COMPILED = (".obj", ".gif") + tuple(MESH_FORMATS)
+    WELD_EPS = 1e-6    # vertices a menos de esto y con la misma normal se sueldan
+    LOD_CELLS = (64, 24)  # celdas por lado del agrupamiento de vertices de lod1 y lod2
+    LOD_MIN_TRIS = 2000   # mallas mas chicas no llevan LODs
+
+    def __init__(self, cache_dir: str = os.path.join(CACHE_DIR, "compiled"), workers: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.rebuilt: List[str] = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def describe_file(path: str, sha1: Optional[str] = None) -> dict:
+        st = os.stat(path)
+        if sha1 is None:
+            with open(path, "rb") as f:
+                sha1 = hashlib.sha1(f.read()).hexdigest()
+        return {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1, "entries": None, "problems": []}
+
+    @staticmethod
+    def weld(mesh: MeshArrays, eps: float) -> MeshArrays:
+        # Une vertices con la misma posicion (a eps) y normal; conserva el orden de primera aparicion
+        key = np.concatenate([np.round(mesh.positions / eps), np.round(mesh.normals * 1e4)], axis=1).astype(np.int64)
+        _, first, inverse = np.unique(key, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+        indices = remap[inverse.reshape(-1)][mesh.indices].astype(np.uint32)
+        return MeshArrays(mesh.positions[first[order]], mesh.normals[first[order]], indices)
+
+    @staticmethod
+    def drop_degenerate(mesh: MeshArrays) -> MeshArrays:
+        i = mesh.indices
+        tri = mesh.positions[i]
+        area = np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1)
+        keep = (i[:, 0] != i[:, 1]) & (i[:, 1] != i[:, 2]) & (i[:, 0] != i[:, 2]) & (area > 0.0)
+        return MeshArrays(mesh.positions, mesh.normals, i[keep])
+
+    @staticmethod
+    def compact(mesh: MeshArrays) -> MeshArrays:
+        # Quita vertices que ningun triangulo usa
+        used = np.unique(mesh.indices)
+        remap = np.zeros(len(mesh.positions), np.uint32)
+        remap[used] = np.arange(len(used), dtype=np.uint32)
+        return MeshArrays(mesh.positions[used], mesh.normals[used], remap[mesh.indices])
+
+    @classmethod
+    def cluster(cls, mesh: MeshArrays, cells: int) -> MeshArrays:
+        # LOD por agrupamiento de vertices: una grilla de cells^3, un vertice (promedio) por celda ocupada
+        lo = mesh.positions.min(axis=0)
+        size = max(float(np.max(mesh.positions.max(axis=0) - lo)), 1e-9) / cells
+        cell = np.minimum(((mesh.positions - lo) / size).astype(np.int64), cells)
+        key = (cell[:, 0] * (cells + 1) + cell[:, 1]) * (cells + 1) + cell[:, 2]
+        _, inverse = np.unique(key, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        count = np.bincount(inverse)
+        positions = np.stack([np.bincount(inverse, mesh.positions[:, k]) for k in range(3)], axis=1) / count[:, None]
+        indices = inverse[mesh.indices]
+        indices = indices[(indices[:, 0] != indices[:, 1]) & (indices[:, 1] != indices[:, 2]) & (indices[:, 0] != indices[:, 2])]
+        _, first = np.unique(np.sort(indices, axis=1), axis=0, return_index=True) # un triangulo por terna, conserva el sentido
+        indices = indices[np.sort(first)].astype(np.uint32)
+        positions = positions.astype(np.float32)
+        return cls.compact(MeshArrays(positions, MeshArrays.smooth_normals(positions, indices), indices))
+
+    @classmethod
+    def compile_mesh(cls, path: str, problems: List[str]) -> List[tuple]:
+        # Parseo, triangulacion, soldado, normales, validacion y LODs -> [(sufijo, tipo, bytes, metadatos)]
+        if path.lower().endswith(".obj"):
+            obj = OBJ(path)
+            nv, nn = len(obj.vertices), len(obj.normals)
+            bad = sum(1 for face in obj.faces for vi, _, ni in face if not 0 <= vi < nv or ni >= nn)
+            if bad:
+                problems.append(f"{bad} face corners reference missing vertices or normals")
+            mesh, loaded_bytes = MeshArrays.from_obj(obj), obj.cpu_bytes()
+        else:
+            mesh = MeshFormats.load(path) # los formatos binarios cargan directo a arrays
+            loaded_bytes = mesh.nbytes
+        if not mesh.triangles:
+            problems.append("no triangles: packed as a raw file")
+            return []
+        if not np.isfinite(mesh.positions).all():
+            problems.append("non-finite vertex positions: packed as a raw file")
+            return []
+        length = np.linalg.norm(mesh.normals, axis=1)
+        broken = ~np.isfinite(length) | (length < 1e-6)
+        if broken.any():
+            problems.append(f"{int(broken.sum())} zero or invalid normals regenerated")
+            normals = mesh.normals.copy()
+            normals[broken] = MeshArrays.smooth_normals(mesh.positions, mesh.indices)[broken]
+            mesh = MeshArrays(mesh.positions, normals, mesh.indices)
+        welded = cls.compact(cls.drop_degenerate(cls.weld(mesh, cls.WELD_EPS)))
+        if welded.triangles < mesh.triangles:
+            problems.append(f"{mesh.triangles - welded.triangles} degenerate triangles removed")
+        out, prev = [], welded
+        bounds = [welded.positions.min(axis=0).tolist(), welded.positions.max(axis=0).tolist()]
+        levels = [("", welded, {"bounds": bounds, "obj_bytes": loaded_bytes, "welded": len(mesh.positions) - len(welded.positions)})]
+        for k, cells in enumerate(cls.LOD_CELLS, 1):
+            if prev.triangles < cls.LOD_MIN_TRIS:
+                break
+            lod = cls.cluster(welded, cells)
+            if not lod.triangles or lod.triangles > 0.7 * prev.triangles:
+                continue
+            levels.append((f"#lod{k}", lod, {}))
+            prev = lod
+        for suffix, m, meta in levels:
+            data = m.positions.astype(np.float32).tobytes() + m.normals.astype(np.float32).tobytes() + m.indices.astype(np.uint32).tobytes()
+            out.append((suffix, "mesh", data, dict(meta, vertices=len(m.positions), triangles=m.triangles, build=cls.VERSION)))
+        return out
+
+    @staticmethod
+    def compile_gif(path: str) -> List[tuple]:
+        # Cuadros RGB ya decodificados; el GIF original tambien va al pack (QMovie lo lee)
+        with Image.open(path) as gif:
+            frames = [frame.convert("RGB") for frame in ImageSequence.Iterator(gif)]
+        return [("#frames", "frames", b"".join(fr.tobytes() for fr in frames),
+                 {"width": frames[0].width, "height": frames[0].height, "count": len(frames)})]
+
+    @classmethod
+    def compile_file(cls, path: str, sha1: str, cache_dir: str) -> dict:
+        # Corre en un proceso del pool: deja <sha1>.vN.bin con los payloads y <sha1>.vN.json con su indice (al final)
+        t0 = time.perf_counter()
+        problems: List[str] = []
+        try:
+            payloads = cls.compile_gif(path) if path.lower().endswith(".gif") else cls.compile_mesh(path, problems)
+        except Exception as e:
+            payloads = []
+            problems.append(f"compile error: {e}")
+        stem = os.path.join(cache_dir, f"{sha1}.v{cls.VERSION}")
+        entries, offset = [], 0
+        with open(stem + ".bin.tmp", "wb") as f:
+            for suffix, kind, data, meta in payloads:
+                entries.append([suffix, kind, offset, len(data), meta])
+                f.write(data)
+                offset += len(data)
+        os.replace(stem + ".bin.tmp", stem + ".bin")
+        record = {"entries": entries, "problems": problems, "seconds": time.perf_counter() - t0}
+        with open(stem + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(stem + ".json.tmp", stem + ".json")
+        return dict(record, blob=stem + ".bin")
+
+    def cached(self, sha1: str) -> Optional[dict]:
+        stem = os.path.join(self.cache_dir, f"{sha1}.v{self.VERSION}")
+        if not (os.path.isfile(stem + ".json") and os.path.isfile(stem + ".bin")):
+            return None
+        try:
+            with open(stem + ".json", "r", encoding="utf-8") as f:
+                return dict(json.load(f), blob=stem + ".bin")
+        except ValueError:
+            return None
+
+    def run(self, roots=PACK_ROOTS, force: bool = False) -> Dict[str, dict]:
+        # -> id -> {"path", "size", "mtime_ns", "sha1", "entries", "blob", "problems"}; "entries" None = se copia tal cual
+        # Tamaño y fecha iguales al manifiesto evitan releer el archivo; un hash ya compilado no se recompila
+        t0 = time.perf_counter()
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        out: Dict[str, dict] = {}
+        todo: List[str] = []
+        skip = AssetPack.asset_id(CATALOG_FILE)
+        for root in roots:
+            for folder, _, files in sorted(os.walk(os.path.join(BASE_DIR, root))):
+                for name in sorted(files):
+                    path = os.path.join(folder, name)
+                    aid = AssetPack.asset_id(path)
+                    if aid == skip or name.endswith(".tmp"):
+                        continue
+                    st, old = os.stat(path), manifest.get(aid)
+                    same = old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns
+                    item = out[aid] = self.describe_file(path, old["sha1"] if same else None)
+                    if os.path.splitext(name)[1].lower() not in self.COMPILED:
+                        continue
+                    cached = None if force else self.cached(item["sha1"])
+                    if cached is None:
+                        todo.append(aid)
+                    else:
+                        item.update(cached)
+        if todo:
+            todo.sort(key=lambda a: out[a]["size"], reverse=True) # los mas grandes primero: el pool termina parejo
+            workers = min(self.workers, len(todo))
+            logger.info("Compiling %d assets on %d processes", len(todo), workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(AssetCompiler.compile_file, out[a]["path"], out[a]["sha1"], self.cache_dir): a for a in todo}
+                for future in as_completed(futures):
+                    aid = futures[future]
+                    out[aid].update(future.result())
+                    logger.info("Compiled %s in %.2f s", aid, out[aid]["seconds"])
+        for aid, item in out.items():
+            for problem in item["problems"]:
+                logger.warning("Asset %s: %s", aid, problem)
+        with open(self.manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({aid: {k: item[k] for k in ("size", "mtime_ns", "sha1")} for aid, item in out.items()}, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+        logger.info("Assets compiled: %d files, %d rebuilt, %.2f s", len(out), len(todo), time.perf_counter() - t0)
+        self.rebuilt = todo
+        return out
+
+# pack_assets.py pone LIFE_NO_PACK: compila desde el disco y en Windows no se puede reemplazar un life.pak mapeado
+ASSET_PACK = None if os.environ.get("LIFE_NO_PACK") else AssetPack.open_default()
+
+def asset_exists(path: str) -> bool:
+    return os.path.isfile(path) or (ASSET_PACK is not None and ASSET_PACK.lookup(path) is not None)
+
+def load_obj(path: str, owner=None, lod: str = "") -> "OBJ":
+    # Malla precompilada del pack si esta (lod "lod1"/"lod2" si se pide y existe); si no, el archivo completo del disco
+    # (GLB/PLY/STL directo a arrays, OBJ parseado).
+    # El tiempo de parseo afina las estimaciones del catalogo
+    t0 = time.perf_counter()
+    if ASSET_PACK is not None:
+        mesh = ASSET_PACK.mesh(path, lod) if lod else None
+        if mesh is not None:
+            return PackedOBJ(f"{path}#{lod}", mesh, owner)
+        mesh = ASSET_PACK.mesh(path)
+        if mesh is not None:
+            return PackedOBJ(path, mesh, owner)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in MESH_FORMATS:
+        # Un GLB/PLY/STL corrupto lanza en vez de volver vacio: load_model conserva el modelo actual
+        data = ASSET_PACK.raw(path) if ASSET_PACK is not None else None
+        return PackedOBJ(path, MeshFormats.load(path, data), owner, ext[1:])
+    obj = OBJ(path, owner)
+    if os.path.isfile(path):
+        ASSET_CATALOG.record_load(os.path.getsize(path), time.perf_counter() - t0)
+    return obj
+
+def asset_pixmap(path: str) -> QPixmap:
+    pixmap = QPixmap()
+    data = ASSET_PACK.raw(path) if ASSET_PACK is not None else None
+    if data is None or not pixmap.loadFromData(data):
+        pixmap = QPixmap(path)
+    return pixmap
+
+def asset_icon(path: str) -> QIcon:
+    return QIcon(path) if os.path.isfile(path) else QIcon(asset_pixmap(path)) # del disco conserva todos los tamaños del .ico
+
+def asset_movie(path: str, parent=None) -> QMovie:
+    # QMovie lee del pack a traves de un QBuffer que vive con la pelicula
+    data = ASSET_PACK.raw(path) if ASSET_PACK is not None else None
+    if data is None:
+        return QMovie(path, parent=parent)
+    movie = QMovie(parent=parent)
+    buffer = QtCore.QBuffer(movie)
+    buffer.setData(QtCore.QByteArray(data))
+    buffer.open(QtCore.QIODevice.ReadOnly)
+    movie.setDevice(buffer)
+    return movie
+
+def asset_file(path: str):
+    # Ruta si esta en disco; si no, un BytesIO con el contenido del pack (python-docx acepta ambos)
+    data = ASSET_PACK.raw(path) if ASSET_PACK is not None and not os.path.isfile(path) else None
+    return io.BytesIO(data) if data is not None else path
+
+# ---------------------------------------------------------------------------
+# Catalogo de assets: la UI y los cargadores saben cuanto pesa un modelo sin abrirlo
+CATALOG_FILE = os.path.join(ASSETS_DIR, "catalog.json")
+CATALOG_ENTRIES = {  # nombre -> (ruta por defecto, grupo de ExtraWindow, etiqueta, descripcion); las medidas las genera AssetCatalog.build
+    "male": ("assets/anatomy/male.obj", None, "Cuerpo masculino", ""),
+    "female": ("assets/anatomy/female.obj", None, "Cuerpo femenino", ""),
+    "muscle": ("assets/anatomy/male_muscle.obj", None, "Músculo", ""),
+    "skeleton": ("assets/anatomy/male_skeleton.obj", None, "Esqueleto", ""),
+    "heart": ("assets/extra_parts/heart/heart.obj", "Modelos 3D Extras", "Corazón",
+              "Representación 3D del corazón humano, mostrando cavidades y arterias principales."),
+    "dna": ("procedural:dna", "Modelos 3D Extras", "ADN", "Modelo 3D de la doble hélice del ADN, base de la información genética."),
+    "ear": ("assets/extra_parts/ear/ear.obj", "Modelos 3D Extras", "Oreja", "Representación aumentada de la oreja izquierda humana."),
+    "sperm": ("assets/extra_parts/reproductive_sys/sperm.obj", "Modelos 3D Extras", "Espermatozoide",
+              "Representación microscópica del espermatozoide humano, vista aumentada."),
+    "red_cells": ("assets/extra_parts/blood/red_cells.obj", "Modelos 3D Extras", "Globulo Rojo",
+                  "Representación microscópica del globulo rojo plasmado en 3D."),
+    "coronavirus": ("procedural:coronavirus", "Modelos 3D Extras", "Coronavirus",
+                    "Cápside del SARS-CoV-2 con sus espigas (proteína S) y proteínas de membrana."),
+    "spores": ("procedural:spores", "Modelos 3D Extras", "Hongo",
+               "Cabeza de Aspergillus: vesícula y cadenas de esporas (conidios) listas para dispersarse."),
+    "brain": ("assets/extra_parts/brain.obj", "Anatomia Esqueletica", "Cerebro",
+              "Modelo 3D del cerebro humano con divisiones hemisféricas y lóbulos cerebrales."),
+    "bones": ("assets/extra_parts/bones.obj", "Anatomia Esqueletica", "Huesos",
+              "Estructura ósea básica del cuerpo humano, modelo anatómico de referencia."),
+    "espore": ("assets/patogens/hongus/espore.obj", None, "Espora", ""),
+}
+
+class AssetCatalog: # Medidas por asset (triangulos, caja, bytes, hash, LODs) generadas con pack_assets.py
+    VERSION = 1
+    parse_rate = 20e6  # bytes de OBJ por segundo; se ajusta con cada carga real
+
+    def __init__(self, assets: Optional[Dict[str, dict]] = None):
+        self.assets = assets or {}
+
+    @classmethod
+    def load(cls, path: str = CATALOG_FILE) -> "AssetCatalog":
+        # Del disco o de life.pak; sin catalogo generado solo quedan las entradas escritas a mano
+        try:
+            data = ASSET_PACK.raw(path) if ASSET_PACK is not None else None
+            if data is None and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+            if data is None:
+                return cls()
+            payload = json.loads(data)
+            if payload.get("version") != cls.VERSION:
+                logger.warning("Asset catalog %s is v%s, expected v%d: ignored", path, payload.get("version"), cls.VERSION)
+                return cls()
+            assets = payload["assets"]
+        except Exception as e:
+            logger.warning("Asset catalog not usable %s: %s", path, e)
+            return cls()
+        # Un archivo editado despues de generar el catalogo pierde sus medidas (se vuelve a medir al empaquetar)
+        stale = [name for name, e in assets.items()
+                 if e["bytes"] and os.path.isfile(os.path.join(BASE_DIR, e["path"])) and os.path.getsize(os.path.join(BASE_DIR, e["path"])) != e["bytes"]]
+        for name in stale:
+            del assets[name]
+        logger.info("Asset catalog: %d assets%s", len(assets), f" ({len(stale)} stale)" if stale else "")
+        return cls(assets)
+
+    def entry(self, name: str) -> dict:
+        path, group, label, description = CATALOG_ENTRIES.get(name, (name, None, name, ""))
+        return dict({"path": path, "group": group, "label": label, "description": description}, **self.assets.get(name, {}))
+
+    def path(self, name: str) -> str:
+        path = self.entry(name)["path"]
+        return path if path.startswith("procedural:") else os.path.join(BASE_DIR, path)
+
+    def group(self, group: str) -> List[str]:
+        return [name for name, (_, g, _, _) in CATALOG_ENTRIES.items() if g == group]
+
+    def available(self, name: str) -> bool:
+        path = self.path(name)
+        return path.startswith("procedural:") or asset_exists(path)
+
+    def lod(self, name: str, lod: Optional[str] = None) -> Optional[dict]:
+        # {"vertices", "triangles"} de un nivel; por defecto el que se cargaria: el de CONFIG para procedurales, "full" para archivos
+        e = self.assets.get(name)
+        if e is None:
+            return None
+        if lod is not None:
+            return e["lods"].get(lod)
+        return e["lods"].get(CONFIG.procedural_lod) or e["lods"].get("full") or next(iter(e["lods"].values()), None)
+
+    def levels(self, name: str) -> List[str]:
+        # Niveles cargables ahora, del mas detallado al mas liviano, empezando por el de defecto.
+        # Los LOD de archivos solo estan en life.pak: sin pack se parsea el OBJ completo
+        e, default = self.assets.get(name), self.lod(name)
+        if e is None or default is None:
+            return []
+        packed = not e["bytes"] or (ASSET_PACK is not None and ASSET_PACK.lookup(self.path(name)) is not None)
+        lods = [(lod, m) for lod, m in e["lods"].items() if packed or lod == "full"]
+        return [lod for lod, m in sorted(lods, key=lambda kv: -kv[1]["triangles"]) if m["triangles"] <= default["triangles"]]
+
+    def triangles(self, name: str) -> Optional[int]:
+        lod = self.lod(name)
+        return lod["triangles"] if lod else None
+
+    def estimate(self, name: str, lod: Optional[str] = None) -> Tuple[int, int]:
+        # (cpu, gpu) en bytes una vez cargado: arrays si viene del pack o es procedural, listas de OBJ si se parsea
+        e, level = self.assets.get(name), self.lod(name, lod)
+        if e is None or level is None:
+            return 0, 0
+        packed = ASSET_PACK is not None and ASSET_PACK.lookup(self.path(name)) is not None
+        if packed or not e["bytes"]:
+            cpu = level["vertices"] * 24 + level["triangles"] * 12
+        else:
+            cpu = e["obj_bytes"]
+        return cpu, level["vertices"] * GpuMesh.STRIDE + level["triangles"] * 12
+
+    def estimate_ms(self, name: str) -> float:
+        # Solo el parseo de un OBJ del disco tarda: el pack, lo procedural y GLB/PLY/STL ya estan en arrays
+        e = self.assets.get(name)
+        if e is None or not e["bytes"] or not e["path"].lower().endswith(".obj") or \
+                (ASSET_PACK is not None and ASSET_PACK.lookup(self.path(name)) is not None):
+            return 0.0
+        return e["bytes"] / self.parse_rate * 1000.0
+
+    def record_load(self, size: int, seconds: float):
+        if size > 1_000_000 and seconds > 0:
+            AssetCatalog.parse_rate = 0.7 * AssetCatalog.parse_rate + 0.3 * size / seconds
+
+    def fits(self, name: str, lod: Optional[str] = None) -> bool:
+        # Antes de abrir el asset: ¿entra en los presupuestos de config.json junto con lo ya cargado?
+        if not (CONFIG.cpu_budget_mb or CONFIG.gpu_budget_mb):
+            return True
+        need_cpu, need_gpu = self.estimate(name, lod)
+        cpu, gpu = RESOURCES.usage()
+        mb = 1024 * 1024
+        return (not CONFIG.cpu_budget_mb or cpu + need_cpu <= CONFIG.cpu_budget_mb * mb) and \
+               (not CONFIG.gpu_budget_mb or gpu + need_gpu <= CONFIG.gpu_budget_mb * mb)
+
+    def pick_lod(self, name: str) -> Optional[str]:
+        # Nivel mas detallado que entra en el presupuesto; None si ni el mas liviano entra. Sin medidas: el de defecto
+        levels = self.levels(name)
+        if not levels:
+            return "" if self.fits(name) else None
+        return next((lod for lod in levels if self.fits(name, lod)), None)
+
+    def describe(self, name: str) -> str:
+        # "10.2k triángulos · 2.3 MB" para tooltips y textos de carga; vacio si no hay medidas
+        tris = self.triangles(name)
+        if tris is None:
+            return ""
+        cpu, gpu = self.estimate(name)
+        return f"{tris / 1000:.1f}k triángulos · {(cpu + gpu) / 1e6:.1f} MB"
+
+    @staticmethod
+    def _measure(mesh: MeshArrays) -> dict:
+        lo, hi = mesh.positions.min(axis=0), mesh.positions.max(axis=0)
+        return {"vertices": len(mesh.positions), "triangles": mesh.triangles, "bounds": [lo.tolist(), hi.tolist()]}
+
+    @classmethod
+    def _resolve(cls, path: str) -> Optional[str]:
+        # Ruta por defecto o, si el asset se movio o llego en otro formato (heart.glb por heart.obj),
+        # el primer archivo de malla con el mismo nombre bajo assets/
+        if os.path.isfile(os.path.join(BASE_DIR, path)):
+            return path
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for folder, _, files in sorted(os.walk(ASSETS_DIR)):
+            for ext in tuple(MESH_FORMATS) + (".obj",):
+                if stem + ext in files:
+                    return AssetPack.asset_id(os.path.join(folder, stem + ext))
+        return None
+
+    @classmethod
+    def _measure_compiled(cls, item: dict) -> dict:
+        # Medidas de una entrada de AssetCompiler.run: sin reabrir el asset
+        meshes = {suffix: meta for suffix, kind, _, _, meta in item["entries"] or () if kind == "mesh"}
+        full = meshes.get("", {"vertices": 0, "triangles": 0, "bounds": None, "obj_bytes": 0})
+        lods = {(suffix[1:] or "full"): {"vertices": m["vertices"], "triangles": m["triangles"]} for suffix, m in meshes.items()}
+        return {"path": AssetPack.asset_id(item["path"]), "bytes": item["size"], "sha1": item["sha1"],
+                "vertices": full["vertices"], "triangles": full["triangles"], "bounds": full["bounds"],
+                "obj_bytes": full["obj_bytes"],
+                "lods": lods or {"full": {"vertices": 0, "triangles": 0}}}
+
+    @classmethod
+    def build(cls, out_path: str = CATALOG_FILE, compiled: Optional[Dict[str, dict]] = None) -> int:
+        # Entradas de CATALOG_ENTRIES y cualquier otra malla compilada bajo assets/; lo ausente queda fuera
+        if compiled is None:
+            compiled = AssetCompiler().run(("assets",))
+        assets: Dict[str, dict] = {}
+        known = set()
+        for name, (path, _, _, _) in CATALOG_ENTRIES.items():
+            if path.startswith("procedural:"):
+                kind = path.split(":", 1)[1]
+                lods = {lod: ProceduralModels.baked(kind, lod) for lod in PROCEDURAL_DETAIL}
+                mesh = lods["medium"]
+                assets[name] = dict(cls._measure(mesh), path=path, bytes=0, sha1=f"procedural:{kind}:v{ProceduralModels.VERSION}",
+                                    obj_bytes=0,
+                                    lods={lod: {"vertices": len(m.positions), "triangles": m.triangles} for lod, m in lods.items()})
+                continue
+            path = cls._resolve(path)
+            if path is not None and path in compiled:
+                known.add(path)
+                assets[name] = cls._measure_compiled(compiled[path])
+        for aid, item in compiled.items():
+            if os.path.splitext(aid)[1].lower() in (".obj",) + tuple(MESH_FORMATS) and aid.startswith("assets/") and aid not in known:
+                assets[aid] = cls._measure_compiled(item)
+        tmp = out_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": cls.VERSION, "assets": assets}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, out_path)
+        logger.info("Asset catalog written: %s (%d assets)", out_path, len(assets))
+        return len(assets)
+
+ASSET_CATALOG = AssetCatalog.load()
+
+class GpuMesh: # VBO (posicion + normal intercalados) + EBO; un rango = una llamada de dibujo
+    STRIDE = 24
+
+    def __init__(self, mesh: MeshArrays, owner=None, name: str = "mesh", regions: Optional[np.ndarray] = None):
+        self.owner = weakref.ref(owner) if owner is not None else None
+        self.count = mesh.triangles
+        interleaved = np.ascontiguousarray(np.hstack([mesh.positions, mesh.normals]), dtype=np.float32)
+        indices = np.ascontiguousarray(mesh.indices, dtype=np.uint32)
+        self.vbo, self.ebo = (int(b) for b in glGenBuffers(2))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, interleaved.nbytes, interleaved, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        widget = self.owner() if self.owner else None
+        gpu = interleaved.nbytes + indices.nbytes
+        self.rbo = 0 # mascara de regiones por vertice (uint8), atributo 2 del LitPipeline
+        self.mbo = 0 # deltas de morph targets (atributos 5-12), se suben al primer cuadro animado
+        self.morphs: Optional[MorphTargets] = None
+        self.vertices = len(mesh.positions)
+        if regions is not None and len(regions) == len(mesh.positions):
+            regions = np.ascontiguousarray(regions, dtype=np.uint8)
+            self.rbo = int(glGenBuffers(1))
+            glBindBuffer(GL_ARRAY_BUFFER, self.rbo)
+            glBufferData(GL_ARRAY_BUFFER, regions.nbytes, regions, GL_STATIC_DRAW)
+            GL_LEAKS.alloc("buffer", self.rbo, widget)
+            gpu += regions.nbytes
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        GL_LEAKS.alloc("buffer", self.vbo, widget)
+        GL_LEAKS.alloc("buffer", self.ebo, widget)
+        self.base_gpu = gpu
+        RESOURCES.register(self, "vbo", name, widget, gpu=gpu)
+
+    def draw_ranges(self, ranges: List[tuple], generic: bool = False):
+        # ranges: [(primer triangulo, cantidad)]; los contiguos se fusionan en una sola llamada
+        # generic: atributos 0/1 para LitPipeline en vez de los punteros fixed-function
+        if not self.vbo:
+            return
+        merged = []
+        for first, count in sorted(ranges):
+            if merged and merged[-1][0] + merged[-1][1] == first:
+                merged[-1] = (merged[-1][0], merged[-1][1] + count)
+            elif count > 0:
+                merged.append((first, count))
+        if generic:
+            if self.rbo:
+                glBindBuffer(GL_ARRAY_BUFFER, self.rbo)
+                glEnableVertexAttribArray(2)
+                glVertexAttribIPointer(2, 1, GL_UNSIGNED_BYTE, 0, ctypes.c_void_p(0))
+            else:
+                glVertexAttribI1ui(2, 0)
+            if self.mbo:
+                # Por vertice: k deltas de posicion y luego k de normal; las ranuras libres quedan en cero
+                k = self.morphs.count
+                glBindBuffer(GL_ARRAY_BUFFER, self.mbo)
+                for i in range(k):
+                    for loc, offset in ((5 + i, i * 12), (9 + i, (k + i) * 12)):
+                        glEnableVertexAttribArray(loc)
+                        glVertexAttribPointer(loc, 3, GL_FLOAT, GL_FALSE, k * 24, ctypes.c_void_p(offset))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        if generic:
+            glEnableVertexAttribArray(0)
+            glEnableVertexAttribArray(1)
+            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(0))
+            glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(12))
+        else:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_NORMAL_ARRAY)
+            glVertexPointer(3, GL_FLOAT, self.STRIDE, ctypes.c_void_p(0))
+            glNormalPointer(GL_FLOAT, self.STRIDE, ctypes.c_void_p(12))
+        if len(merged) == 1:
+            glDrawElements(GL_TRIANGLES, merged[0][1] * 3, GL_UNSIGNED_INT, ctypes.c_void_p(merged[0][0] * 12))
+        elif merged:
+            # Muchos tramos (conjuntos de visibilidad): una sola llamada
+            counts = np.array([c * 3 for _, c in merged], dtype=np.int32)
+            offsets = (ctypes.c_void_p * len(merged))(*[f * 12 for f, _ in merged])
+            glMultiDrawElements(GL_TRIANGLES, counts, GL_UNSIGNED_INT, offsets, len(merged))
+        if generic:
+            glDisableVertexAttribArray(1)
+            glDisableVertexAttribArray(0)
+            if self.rbo:
+                glDisableVertexAttribArray(2)
+            if self.mbo:
+                for i in range(self.morphs.count):
+                    glDisableVertexAttribArray(5 + i)
+                    glDisableVertexAttribArray(9 + i)
+        else:
+            glDisableClientState(GL_NORMAL_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        RESOURCES.touch(self)
+
+    def render(self, generic: bool = False):
+        self.draw_ranges([(0, self.count)], generic)
+
+    def set_morphs(self, morphs: "MorphTargets") -> bool:
+        # Una sola subida por juego de objetivos; False si no coincide con los vertices de este buffer
+        if morphs is self.morphs:
+            return bool(self.mbo)
+        if not self.vbo or morphs.positions.shape[1] != self.vertices:
+            return False
+        data = np.ascontiguousarray(np.concatenate([morphs.positions, morphs.normals]).transpose(1, 0, 2), dtype=np.float32)
+        widget = self.owner() if self.owner else None
+        if not self.mbo:
+            self.mbo = int(glGenBuffers(1))
+            GL_LEAKS.alloc("buffer", self.mbo, widget)
+        glBindBuffer(GL_ARRAY_BUFFER, self.mbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.morphs = morphs
+        RESOURCES.update(self, gpu=self.base_gpu + data.nbytes)
+        return True
+
+    def draw_instanced(self, instances: int):
+        # Atributos 0/1 de la malla; los de instancia (3, 4) los deja ligados ParticleRenderer
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glEnableVertexAttribArray(0)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(0))
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(12))
+        glVertexAttribI1ui(2, 0)
+        glDrawElementsInstanced(GL_TRIANGLES, self.count * 3, GL_UNSIGNED_INT, None, instances)
+        glDisableVertexAttribArray(1)
+        glDisableVertexAttribArray(0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        RESOURCES.touch(self)
+
+    def release_gl(self): # Requiere el contexto GL dueño como current
+        widget = self.owner() if self.owner else None
+        if self.vbo:
+            glDeleteBuffers(2, [self.vbo, self.ebo])
+            GL_LEAKS.free("buffer", self.vbo, widget)
+            GL_LEAKS.free("buffer", self.ebo, widget)
+        if self.rbo:
+            glDeleteBuffers(1, [self.rbo])
+            GL_LEAKS.free("buffer", self.rbo, widget)
+        if self.mbo:
+            glDeleteBuffers(1, [self.mbo])
+            GL_LEAKS.free("buffer", self.mbo, widget)
+        self.vbo = self.ebo = self.rbo = self.mbo = 0
+        self.morphs = None
+        RESOURCES.update(self, gpu=0)
+
+
+# Capas de la malla anatomica compuesta, en orden de buffer (las que se combinan quedan contiguas)
+ANATOMY_LAYERS = [(layer, ASSET_CATALOG.path(name)) for layer, name in
+                  (("skin", "male"), ("muscle", "muscle"), ("skeleton", "skeleton"), ("bones", "bones"), ("brain", "brain"))]
+
+class CompositeMesh: # Varias capas en un solo buffer de vertices/indices con rango de dibujo por capa
+    _shared: Optional[Future] = None
+
+    def __init__(self, mesh: MeshArrays, layers: Dict[str, tuple]):
+        self.mesh = mesh
+        self.layers = layers  # nombre -> (primer triangulo, cantidad)
+        self.regions: Optional[np.ndarray] = None
+        RESOURCES.register(self, "composite", "+".join(layers) or "composite", cpu=mesh.nbytes)
+
+    @classmethod
+    def shared(cls) -> Future:
+        # Una sola carga por proceso; cada visor sube su propio GpuMesh
+        if cls._shared is None:
+            cls._shared = ASSET_LOADER.submit(cls.load_or_build, ANATOMY_LAYERS)
+        return cls._shared
+
+    @classmethod
+    def build(cls, layer_paths: List[tuple]) -> "CompositeMesh":
+        parts, layers, v_off, t_off = [], {}, 0, 0
+        for name, path in layer_paths:
+            if not asset_exists(path):
+                continue
+            obj = load_obj(path)
+            arrays = obj.arrays if isinstance(obj, PackedOBJ) else MeshArrays.from_obj(obj)
+            parts.append((arrays, v_off))
+            layers[name] = (t_off, arrays.triangles)
+            v_off += len(arrays.positions)
+            t_off += arrays.triangles
+        if not parts:
+            raise FileNotFoundError("No anatomy layers found")
+        mesh = MeshArrays(
+            np.concatenate([a.positions for a, _ in parts]).astype(np.float32),
+            np.concatenate([a.normals for a, _ in parts]).astype(np.float32),
+            np.concatenate([a.indices + np.uint32(off) for a, off in parts]).astype(np.uint32),
+        )
+        return cls(mesh, layers)
+
+    def save(self, path: str):
+        names = list(self.layers)
+        np.savez(path, positions=self.mesh.positions, normals=self.mesh.normals, indices=self.mesh.indices,
+                 layer_names=np.array(names), layer_ranges=np.array([self.layers[n] for n in names], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> "CompositeMesh":
+        with np.load(path) as data:
+            mesh = MeshArrays(data["positions"], data["normals"], data["indices"])
+            layers = {str(n): (int(a), int(b)) for n, (a, b) in zip(data["layer_names"], data["layer_ranges"])}
+        return cls(mesh, layers)
+
+    @classmethod
+    def load_or_build(cls, layer_paths: List[tuple]) -> Optional["CompositeMesh"]:
+        sources = [p for _, p in layer_paths]
+        cache = mesh_cache_path(sources, ".lmesh.npz")
+        try:
+            if os.path.isfile(cache):
+                comp = cls.load(cache)
+                logger.info("Composite mesh from cache: %s", cache)
+            else:
+                comp = cls.build(layer_paths)
+                comp.save(cache)
+                logger.info("Composite mesh built (%d tris, layers: %s)", comp.mesh.triangles, ", ".join(comp.layers))
+            comp.regions = RegionMasks.load_or_compute(comp.mesh, sources, comp.layers)
+            return comp
+        except Exception as e:
+            logger.warning("Composite mesh not available: %s", e)
+            return None
+
+
+class CompositeLayer: # Adaptador: una capa de la malla compuesta se dibuja como un OBJ
+    def __init__(self, gpu: GpuMesh, composite: CompositeMesh, names: List[str]):
+        self.gpu = gpu
+        self.ranges = [composite.layers[n] for n in names if n in composite.layers]
+
+    def render(self, generic: bool = False):
+        self.gpu.draw_ranges(self.ranges, generic)
+
+    def release_gl(self):
+        pass # el buffer es del GpuMesh compartido por todas las capas
+
+
+# Regiones anatomicas: un bit por region en una mascara uint8 por vertice
+REGION_BITS = {"lungs": 1, "liver": 2, "skin": 4, "bones": 8}
+SYSTEM_DISEASES = {  # enfermedad que el asistente ofrece para cada sistema
+    "Sistema respiratorio": "COVID-19",
+    "Sistema digestivo": "Hepatitis",
+    "Sistema circulatorio": "Anemia",
+    "Sistema nervioso": "Epilepsia",
+    "Sistema endocrino": "Obesidad",
+    "Sistema inmunológico": "Esclerosis múltiple",
+    "Sistema urinario": "Síndrome nefrótico",
+    "Sistema tegumentario": "Dermatitis",
+    "Sistema muscular": "Tétanos",
+    "Sistema óseo": "Osteoporosis"
+}
+DISEASE_REGIONS = {"COVID-19": "lungs", "Hepatitis": "liver", "Dermatitis": "skin", "Osteoporosis": "bones"}
+DISEASE_TINTS = {
+    "COVID-19": (1.0, 0.25, 0.2),
+    "Hepatitis": (0.95, 0.75, 0.1),   # ictericia
+    "Dermatitis": (1.0, 0.35, 0.35),
+    "Osteoporosis": (0.55, 0.65, 1.0),
+}
+# Volumenes en vista frontal (x, y) en fracciones de la altura del cuerpo: x desde el centro, y desde los pies
+REGION_VOLUMES = {
+    "lungs": [((-0.055, 0.73), (0.05, 0.085)), ((0.055, 0.73), (0.05, 0.085))],
+    "liver": [((-0.05, 0.635), (0.075, 0.035))],
+    "bones": [((0.0, 0.62), (0.025, 0.2)), ((0.0, 0.52), (0.12, 0.045)),
+              ((-0.05, 0.28), (0.04, 0.03)), ((0.05, 0.28), (0.04, 0.03))],  # columna, pelvis, rodillas
+}
+REGION_MASK_VERSION = 1
+
+class RegionMasks: # Mascaras de region por vertice, calculadas una vez y guardadas junto a la malla compilada
+    @staticmethod
+    def compute(mesh: MeshArrays, layers: Optional[Dict[str, tuple]] = None) -> np.ndarray:
+        pos = mesh.positions
+        masks = np.zeros(len(pos), dtype=np.uint8)
+        if not len(pos):
+            return masks
+        layer_verts = {}
+        for name, (first, count) in (layers or {}).items():
+            layer_verts[name] = np.unique(mesh.indices[first:first + count].ravel())
+        # Marco del cuerpo: la piel si es una malla compuesta, si no la malla entera
+        frame = pos[layer_verts["skin"]] if "skin" in layer_verts and len(layer_verts["skin"]) else pos
+        lo, hi = frame.min(axis=0), frame.max(axis=0)
+        height = max(float(hi[1] - lo[1]), 1e-6)
+        x = (pos[:, 0] - (lo[0] + hi[0]) * 0.5) / height
+        y = (pos[:, 1] - lo[1]) / height
+        for region, volumes in REGION_VOLUMES.items():
+            hit = np.zeros(len(pos), dtype=bool)
+            for (cx, cy), (rx, ry) in volumes:
+                hit |= ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1.0
+            masks[hit] |= REGION_BITS[region]
+        if layers:
+            if "skin" in layer_verts:
+                masks[layer_verts["skin"]] |= REGION_BITS["skin"]
+            bones = [layer_verts[n] for n in ("skeleton", "bones") if n in layer_verts]
+            if bones:
+                # Con capas oseas reales el hueso se marca por capa, no por volumen
+                masks &= np.uint8(~REGION_BITS["bones"] & 0xFF)
+                masks[np.concatenate(bones)] |= REGION_BITS["bones"]
+        else:
+            masks |= REGION_BITS["skin"] # malla de superficie: todo es piel
+        return masks
+
+    @classmethod
+    def load_or_compute(cls, mesh: MeshArrays, sources: List[str], layers: Optional[Dict[str, tuple]] = None) -> np.ndarray:
+        cache = mesh_cache_path(sources, f".regions.v{REGION_MASK_VERSION}.npy")
+        if os.path.isfile(cache):
+            try:
+                masks = np.load(cache)
+                if len(masks) == len(mesh.positions):
+                    return masks
+            except Exception as e:
+                logger.warning("Region cache unreadable %s: %s", cache, e)
+        masks = cls.compute(mesh, layers)
+        np.save(cache, masks)
+        return masks
+
+    @staticmethod
+    def for_disease(enfermedad_id: Optional[str]) -> int:
+        # 0 = sin region conocida: la reaccion tiñe todo el cuerpo
+        return REGION_BITS.get(DISEASE_REGIONS.get(enfermedad_id or ""), 0)
+
+
+# Morph targets: poses clave como deltas por vertice, mezcladas en el vertex shader con pesos por cuadro
+MORPH_SLOTS = 4  # objetivos que mezcla LIT_VERTEX_SHADER (atributos 5-8 posicion, 9-12 normal)
+MORPH_ANIMATIONS = {  # animacion -> objetivos, en el orden de los pesos
+    "heartbeat": ("systole", "diastole"),
+    "breathing": ("inhale",),
+    "gender": ("partner",),  # malla masculina <-> femenina si comparten topologia; pesos desde set_morph_weights
+}
+MODEL_ANIMATIONS = {"heart": "heartbeat"}  # nombre del archivo sin extension (heart.obj, heart.glb...)
+HEART_RATE_BPM = 72.0
+BREATHS_PER_MIN = 14.0
+DISEASE_BREATHING = {"COVID-19": 28.0}  # taquipnea
+
+class MorphTargets: # Deltas (k, V, 3) de posicion y normal alineados con los vertices de MeshArrays.compiled
+    def __init__(self, names: List[str], positions: np.ndarray, normals: np.ndarray):
+        self.names = list(names)
+        self.positions = positions.astype(np.float32)
+        self.normals = normals.astype(np.float32)
+
+    @property
+    def count(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _heartbeat(mesh: MeshArrays) -> Dict[str, np.ndarray]:
+        # Sistole: los ventriculos se contraen hacia el centro y giran (torsion), mas en el apex; diastole: llenado
+        pos = mesh.positions.astype(np.float64)
+        centre = pos.mean(axis=0)
+        rel = pos - centre
+        lo, hi = pos[:, 1].min(), pos[:, 1].max()
+        apex = 1.0 - (pos[:, 1] - lo) / max(hi - lo, 1e-6)  # 1 abajo (apex), 0 arriba (auriculas)
+        squeeze = (0.05 + 0.09 * apex)[:, None]
+        twist = np.radians(6.0) * apex
+        c, sn = np.cos(twist), np.sin(twist)
+        turned = np.stack([rel[:, 0] * c - rel[:, 2] * sn, rel[:, 1], rel[:, 0] * sn + rel[:, 2] * c], axis=1)
+        systole = turned * (1.0 - squeeze) - rel
+        diastole = rel * (0.06 * apex)[:, None]
+        return {"systole": systole, "diastole": diastole}
+
+    @staticmethod
+    def _breathing(mesh: MeshArrays) -> Dict[str, np.ndarray]:
+        # Inspiracion: torax y abdomen se expanden hacia afuera del eje del torso (mismo marco que RegionMasks)
+        pos = mesh.positions.astype(np.float64)
+        lo, hi = pos.min(axis=0), pos.max(axis=0)
+        height = max(hi[1] - lo[1], 1e-6)
+        cx, cz = (lo[0] + hi[0]) * 0.5, (lo[2] + hi[2]) * 0.5
+        x = (pos[:, 0] - cx) / height
+        y = (pos[:, 1] - lo[1]) / height
+        chest = np.exp(-((y - 0.72) / 0.07) ** 2) + 0.6 * np.exp(-((y - 0.6) / 0.05) ** 2)
+        torso = np.clip(1.0 - (np.abs(x) - 0.1) / 0.05, 0.0, 1.0)  # los brazos no se inflan
+        out = np.stack([pos[:, 0] - cx, np.zeros(len(pos)), pos[:, 2] - cz], axis=1)
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+        out[:, 1] = 0.25  # el pecho tambien sube un poco
+        return {"inhale": out * (0.012 * height * chest * torso)[:, None]}
+
+    @staticmethod
+    def _blend_shape(mesh: MeshArrays, other: MeshArrays) -> Dict[str, np.ndarray]:
+        if mesh.positions.shape != other.positions.shape or not np.array_equal(mesh.indices, other.indices):
+            raise ValueError("meshes do not share topology")
+        return {"partner": other.positions.astype(np.float64) - mesh.positions}
+
+    @classmethod
+    def build(cls, obj: OBJ, animation: str, partner: Optional[OBJ] = None) -> "MorphTargets":
+        mesh = MeshArrays.compiled(obj)
+        if animation == "heartbeat":
+            poses = cls._heartbeat(mesh)
+        elif animation == "breathing":
+            poses = cls._breathing(mesh)
+        elif animation == "gender" and partner is not None:
+            poses = cls._blend_shape(mesh, MeshArrays.compiled(partner))
+        else:
+            raise ValueError(f"no morph targets for {animation}")
+        names = [n for n in MORPH_ANIMATIONS[animation] if n in poses][:MORPH_SLOTS]
+        # Delta de normales: suavizadas de la pose menos suavizadas en reposo (vale tambien si el OBJ trae normales propias)
+        rest = MeshArrays.smooth_normals(mesh.positions, mesh.indices)
+        deltas = np.stack([poses[n] for n in names]).astype(np.float32)
+        normals = np.stack([MeshArrays.smooth_normals(mesh.positions + d, mesh.indices) - rest for d in deltas])
+        return cls(names, deltas, normals)
+
+    def apply(self, mesh: MeshArrays, weights: np.ndarray) -> MeshArrays:
+        # Version CPU de la mezcla (visor software); comparte los indices con la malla en reposo
+        w = weights[:self.count].astype(np.float32)
+        positions = mesh.positions + np.tensordot(w, self.positions, axes=1)
+        normals = mesh.normals + np.tensordot(w, self.normals, axes=1)
+        return MeshArrays(positions, normals, mesh.indices)
+
+    @staticmethod
+    def weights(animation: str, t: float, rate: Optional[float] = None) -> Dict[str, float]:
+        # Linea de tiempo por defecto: ciclo cardiaco (sistole ~35 %) o respiracion sinusoidal
+        if animation == "heartbeat":
+            u = (t * (rate or HEART_RATE_BPM) / 60.0) % 1.0
+            if u < 0.35:
+                return {"systole": math.sin(math.pi * u / 0.35), "diastole": 0.0}
+            return {"systole": 0.0, "diastole": 0.8 * math.sin(math.pi * (u - 0.35) / 0.65)}
+        if animation == "breathing":
+            return {"inhale": 0.5 - 0.5 * math.cos(2.0 * math.pi * t * (rate or BREATHS_PER_MIN) / 60.0)}
+        return {}
+
+
+REGION_LABELS = {"lungs": "Pulmones", "liver": "Hígado", "bones": "Huesos", "skin": "Piel"}  # de mas a menos especifica
+LAYER_LABELS = {"skin": "Piel", "muscle": "Músculo", "skeleton": "Esqueleto", "bones": "Huesos", "brain": "Cerebro"}
+
+class MeshBVH: # BVH de triangulos (arrays planos) para ray casting en CPU; se guarda junto a la malla compilada
+    LEAF_SIZE = 32
+
+    def __init__(self, bmin, bmax, left, start, count, order):
+        self.bmin, self.bmax = bmin, bmax      # (N, 3) cajas por nodo
+        self.left = left                       # hijo izquierdo (el derecho es left + 1); -1 = hoja
+        self.start, self.count = start, count  # rango de la hoja dentro de order
+        self.order = order                     # triangulos ordenados por hoja
+        self._nodes = []
+        self.tri_v0 = self.tri_e1 = self.tri_e2 = None
+
+    @classmethod
+    def build(cls, mesh: MeshArrays) -> "MeshBVH":
+        # Division por la mediana del eje mas largo; las cajas internas se arman de abajo hacia arriba
+        tri = mesh.positions[mesh.indices]
+        tmin, tmax, cent = tri.min(axis=1), tri.max(axis=1), tri.mean(axis=1)
+        m = len(mesh.indices)
+        order = np.arange(m, dtype=np.int64)
+        bmin, bmax, left, start, count = [None], [None], [-1], [0], [m]
+        stack = [0] if m else []
+        while stack:
+            node = stack.pop()
+            s, e = start[node], start[node] + count[node]
+            ids = order[s:e]
+            if e - s <= cls.LEAF_SIZE:
+                bmin[node], bmax[node] = tmin[ids].min(axis=0), tmax[ids].max(axis=0)
+                continue
+            c = cent[ids]
+            axis = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+            half = (e - s) // 2
+            order[s:e] = ids[np.argpartition(c[:, axis], half)]
+            child = len(left)
+            bmin += [None, None]
+            bmax += [None, None]
+            left += [-1, -1]
+            start += [s, s + half]
+            count += [half, e - s - half]
+            left[node] = child
+            stack += [child, child + 1]
+        for node in range(len(left) - 1, -1, -1):
+            child = left[node]
+            if child >= 0:
+                bmin[node] = np.minimum(bmin[child], bmin[child + 1])
+                bmax[node] = np.maximum(bmax[child], bmax[child + 1])
+        if not m:
+            bmin[0] = bmax[0] = np.zeros(3, np.float32)
+        return cls(np.array(bmin, np.float32), np.array(bmax, np.float32), np.array(left, np.int32),
+                   np.array(start, np.int64), np.array(count, np.int64), order)
+
+    def save(self, path: str):
+        np.savez(path, bmin=self.bmin, bmax=self.bmax, left=self.left, start=self.start, count=self.count, order=self.order)
+
+    @classmethod
+    def load(cls, path: str) -> "MeshBVH":
+        with np.load(path) as d:
+            return cls(d["bmin"], d["bmax"], d["left"], d["start"], d["count"], d["order"])
+
+    @classmethod
+    def load_or_build(cls, mesh: MeshArrays, sources: List[str]) -> "MeshBVH":
+        cache = mesh_cache_path(sources, ".bvh.npz")
+        bvh = None
+        if os.path.isfile(cache):
+            try:
+                bvh = cls.load(cache)
+                if len(bvh.order) != mesh.triangles:
+                    bvh = None
+            except Exception as e:
+                logger.warning("BVH cache unreadable %s: %s", cache, e)
+        if bvh is None:
+            t0 = time.perf_counter()
+            bvh = cls.build(mesh)
+            bvh.save(cache)
+            logger.info("BVH built: %d tris, %d nodes (%.2f s)", mesh.triangles, len(bvh.left), time.perf_counter() - t0)
+        bvh.attach(mesh)
+        return bvh
+
+    def attach(self, mesh: MeshArrays):
+        # Triangulos en orden de hoja (v0, e1, e2) para Moller-Trumbore vectorizado; nodos como tuplas Python
+        tri = mesh.positions[mesh.indices[self.order]].astype(np.float32)
+        self.tri_v0 = tri[:, 0]
+        self.tri_e1 = tri[:, 1] - tri[:, 0]
+        self.tri_e2 = tri[:, 2] - tri[:, 0]
+        self._nodes = list(zip(*(self.bmin[:, k].tolist() for k in range(3)), *(self.bmax[:, k].tolist() for k in range(3)),
+                               self.left.tolist(), self.start.tolist(), self.count.tolist()))
+
+    def intersect(self, origin, direction, enabled: Optional[np.ndarray] = None) -> Optional[tuple]:
+        # -> (distancia, triangulo) del impacto mas cercano; enabled filtra triangulos (capas ocultas)
+        if not self._nodes:
+            return None
+        ox, oy, oz = (float(v) for v in origin)
+        ix, iy, iz = (1.0 / float(v) if abs(v) > 1e-12 else 1e12 for v in direction)
+        o = np.asarray(origin, np.float32)
+        d = np.asarray(direction, np.float32)
+        nodes = self._nodes
+
+        def slab(n):
+            tx0, tx1 = (n[0] - ox) * ix, (n[3] - ox) * ix
+            ty0, ty1 = (n[1] - oy) * iy, (n[4] - oy) * iy
+            tz0, tz1 = (n[2] - oz) * iz, (n[5] - oz) * iz
+            near = max(min(tx0, tx1), min(ty0, ty1), min(tz0, tz1), 0.0)
+            far = min(max(tx0, tx1), max(ty0, ty1), max(tz0, tz1))
+            return near if near <= far else None
+
+        best_t, best = math.inf, -1
+        stack = [0] if slab(nodes[0]) is not None else []
+        while stack:
+            n = nodes[stack.pop()]
+            child = n[6]
+            if child < 0:
+                t, k = self._intersect_leaf(o, d, n[7], n[8], enabled)
+                if t < best_t:
+                    best_t, best = t, k
+                continue
+            a, b = slab(nodes[child]), slab(nodes[child + 1])
+            a = a if a is not None and a < best_t else None
+            b = b if b is not None and b < best_t else None
+            if a is not None and b is not None:
+                stack += [child + 1, child] if a <= b else [child, child + 1]  # el mas cercano primero
+            elif a is not None:
+                stack.append(child)
+            elif b is not None:
+                stack.append(child + 1)
+        return (best_t, int(self.order[best])) if best >= 0 else None
+
+    def _intersect_leaf(self, o, d, s: int, c: int, enabled):
+        v0, e1, e2 = self.tri_v0[s:s + c], self.tri_e1[s:s + c], self.tri_e2[s:s + c]
+        p = np.cross(d, e2)
+        det = np.einsum("ij,ij->i", e1, p)
+        ok = np.abs(det) > 1e-12
+        inv = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+        tv = o - v0
+        u = np.einsum("ij,ij->i", tv, p) * inv
+        q = np.cross(tv, e1)
+        v = (q @ d) * inv
+        t = np.einsum("ij,ij->i", e2, q) * inv
+        hit = ok & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t > 1e-6)
+        if enabled is not None:
+            hit &= enabled[self.order[s:s + c]]
+        if not hit.any():
+            return math.inf, -1
+        t = np.where(hit, t, np.inf)
+        k = int(np.argmin(t))
+        return float(t[k]), s + k
+
+
+@dataclass
+class PickResult:
+    triangle: int
+    distance: float
+    point: tuple
+    layer: Optional[str] = None
+    regions: List[str] = field(default_factory=list)  # de mas a menos especifica
+    region_mask: int = 0
+
+    @property
+    def label(self) -> str:
+        names = [REGION_LABELS[r] for r in self.regions]
+        if self.layer and LAYER_LABELS.get(self.layer) not in names:
+            names.append(LAYER_LABELS.get(self.layer, self.layer))
+        return " · ".join(names) or "Sin región"
+
+
+class PickTarget: # Malla + BVH + regiones de lo que muestra el visor; se arma en ASSET_LOADER
+    def __init__(self, mesh: MeshArrays, bvh: MeshBVH, regions: Optional[np.ndarray], layers: Optional[Dict[str, tuple]] = None):
+        self.mesh = mesh
+        self.bvh = bvh
+        self.regions = regions
+        self.layers = layers or {}
+        self._enabled: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def for_obj(cls, obj: OBJ) -> "PickTarget":
+        mesh = MeshArrays.compiled(obj)
+        return cls(mesh, MeshBVH.load_or_build(mesh, [obj.filename]), RegionMasks.load_or_compute(mesh, [obj.filename]))
+
+    @classmethod
+    def for_composite(cls, comp: CompositeMesh) -> "PickTarget":
+        sources = [p for _, p in ANATOMY_LAYERS]
+        return cls(comp.mesh, MeshBVH.load_or_build(comp.mesh, sources), comp.regions, comp.layers)
+
+    def enabled_for(self, ranges: Optional[List[tuple]]) -> Optional[np.ndarray]:
+        if not ranges:
+            return None
+        key = tuple(sorted(ranges))
+        if key not in self._enabled:
+            mask = np.zeros(self.mesh.triangles, dtype=bool)
+            for first, count in key:
+                mask[first:first + count] = True
+            self._enabled[key] = mask
+        return self._enabled[key]
+
+    def pick(self, origin: np.ndarray, direction: np.ndarray, ranges: Optional[List[tuple]] = None) -> Optional[PickResult]:
+        hit = self.bvh.intersect(origin, direction, self.enabled_for(ranges))
+        if hit is None:
+            return None
+        dist, tri = hit
+        point = tuple(float(v) for v in origin + direction * dist)
+        layer = next((n for n, (first, count) in self.layers.items() if first <= tri < first + count), None)
+        mask = 0
+        if self.regions is not None:
+            mask = int(np.bitwise_or.reduce(self.regions[self.mesh.indices[tri]]))
+        regions = [r for r in REGION_LABELS if mask & REGION_BITS[r]]
+        return PickResult(tri, dist, point, layer, regions, mask)
+
+# ---------------------------------------------------------------------------
+# Luz por pixel (equivalente a GL_LIGHT0 + GL_COLOR_MATERIAL) y pulsacion de la reaccion en la GPU.
+# El CPU solo sube u_time por cuadro; el costo no depende de la cantidad de triangulos.
+# Cortes anatomicos: planos (a, b, c, d) en coordenadas del modelo, se conserva a*x + b*y + c*z + d >= 0
+MAX_CLIP_PLANES = 3
+SECTION_AXES = {"sagittal": 0, "transverse": 1, "coronal": 2}  # eje normal al plano de corte
+SECTION_LABELS = {"Sin corte": None, "Sagital": "sagittal", "Coronal": "coronal", "Transversal": "transverse"}
+CAP_COLOR = (0.8, 0.36, 0.32) # tapa de la superficie cortada
+
+LIT_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 a_position;
+layout(location = 1) in vec3 a_normal;
+layout(location = 2) in uint a_regions;
+layout(location = 5) in vec3 a_morph_position[4];
+layout(location = 9) in vec3 a_morph_normal[4];
+uniform mat4 u_projection;
+uniform mat4 u_model_view;
+uniform uint u_region_mask;
+uniform uint u_highlight_mask;
+uniform vec4 u_morph_weights;
+uniform vec4 u_clip_planes[3];
+out float gl_ClipDistance[3];
+out vec3 v_eye_pos;
+out vec3 v_normal;
+out float v_region;
+out float v_highlight;
+void main() {
+    vec3 position = a_position;
+    vec3 normal = a_normal;
+    for (int i = 0; i < 4; ++i) {
+        position += u_morph_weights[i] * a_morph_position[i];
+        normal += u_morph_weights[i] * a_morph_normal[i];
+    }
+    for (int i = 0; i < 3; ++i) {
+        gl_ClipDistance[i] = dot(u_clip_planes[i], vec4(position, 1.0));
+    }
+    vec4 eye = u_model_view * vec4(position, 1.0);
+    v_eye_pos = eye.xyz;
+    v_normal = mat3(u_model_view) * normal;
+    v_region = (u_region_mask == 0u || (a_regions & u_region_mask) != 0u) ? 1.0 : 0.0;
+    v_highlight = (a_regions & u_highlight_mask) != 0u ? 1.0 : 0.0;
+    gl_Position = u_projection * eye;
+}
+"""
+
+LIT_FRAGMENT_SHADER = """
+#version 330 core
+in vec3 v_eye_pos;
+in vec3 v_normal;
+in float v_region;
+in float v_highlight;
+uniform vec4 u_color;
+uniform vec3 u_light_pos;
+uniform float u_time;
+uniform float u_reaction;
+uniform vec3 u_reaction_tint;
+uniform float u_reaction_intensity;
+out vec4 frag_color;
+void main() {
+    vec3 n = normalize(v_normal);
+    if (!gl_FrontFacing) n = -n;
+    vec3 l = normalize(u_light_pos - v_eye_pos);
+    vec3 h = normalize(l + normalize(-v_eye_pos));
+    float diffuse = max(dot(n, l), 0.0);
+    float specular = 0.25 * pow(max(dot(n, h), 0.0), 32.0);
+    float pulse = v_region * u_reaction * u_reaction_intensity * (0.25 + 0.5 * (0.5 + 0.5 * sin(u_time * 5.0)));
+    vec3 base = mix(u_color.rgb, u_reaction_tint, clamp(pulse, 0.0, 1.0));
+    base = mix(base, vec3(0.35, 0.8, 1.0), 0.45 * v_highlight);
+    frag_color = vec4(base * (0.2 + 0.8 * diffuse) + vec3(specular), u_color.a);
+}
+"""
+
+class LitPipeline: # Programa GLSL 3.3 del visor; los OBJ se dibujan desde un GpuMesh propio
+    UNIFORMS = ("u_projection", "u_model_view", "u_color", "u_light_pos", "u_time",
+                "u_reaction", "u_reaction_tint", "u_reaction_intensity", "u_region_mask", "u_highlight_mask",
+                "u_morph_weights", "u_clip_planes")
+    LIGHT_POS = (4.0, 4.0, 10.0)
+
+    def __init__(self, owner):
+        self.owner = weakref.ref(owner)
+        self.program = int(compileProgram(
+            compileShader(LIT_VERTEX_SHADER, GL_VERTEX_SHADER),
+            compileShader(LIT_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            validate=False,  # sin VAO/buffers ligados la validacion falla en algunos drivers
+        ))
+        GL_LEAKS.alloc("program", self.program, owner)
+        self.loc = {name: glGetUniformLocation(self.program, name) for name in self.UNIFORMS}
+        self.meshes: Dict[int, tuple] = {}  # id(OBJ) -> (OBJ, GpuMesh); GpuMesh None si prepare fallo
+        self.pending: Dict[int, tuple] = {} # id(OBJ) -> (OBJ, Future de prepare) mientras se arma en ASSET_LOADER
+        self.active = False
+        self.quad_vbo = 0 # tapas de corte: 4 vertices por llamada
+
+    @classmethod
+    def create(cls, owner) -> Optional["LitPipeline"]:
+        # None = contexto sin GLSL 3.3 (o desactivado en config.json): el visor sigue en fixed-function
+        if not CONFIG.shader_pipeline:
+            return None
+        fmt = owner.context().format()
+        if (fmt.majorVersion(), fmt.minorVersion()) < (3, 3):
+            logger.info("OpenGL %d.%d: fixed-function pipeline", fmt.majorVersion(), fmt.minorVersion())
+            return None
+        try:
+            return cls(owner)
+        except Exception as e:
+            logger.warning("GLSL pipeline not available, using fixed-function: %s", e)
+            return None
+
+    def begin(self, projection: np.ndarray, model_view: np.ndarray, reaction_t: Optional[float],
+              tint=(1.0, 0.2, 0.2), intensity: float = 1.0, region_mask: int = 0, highlight_mask: int = 0):
+        glUseProgram(self.program)
+        self.active = True
+        glUniformMatrix4fv(self.loc["u_projection"], 1, GL_TRUE, projection)
+        glUniformMatrix4fv(self.loc["u_model_view"], 1, GL_TRUE, model_view)
+        glUniform3f(self.loc["u_light_pos"], *self.LIGHT_POS)
+        glUniform1f(self.loc["u_reaction"], 0.0 if reaction_t is None else 1.0)
+        glUniform1f(self.loc["u_time"], reaction_t or 0.0)
+        glUniform3f(self.loc["u_reaction_tint"], *tint)
+        glUniform1f(self.loc["u_reaction_intensity"], intensity)
+        glUniform1ui(self.loc["u_region_mask"], region_mask)
+        glUniform1ui(self.loc["u_highlight_mask"], highlight_mask)
+        glUniform4f(self.loc["u_morph_weights"], 0.0, 0.0, 0.0, 0.0)
+        self.set_clip_planes([])
+
+    def end(self):
+        if self.active:
+            glUseProgram(0)
+            self.active = False
+
+    @staticmethod
+    def prepare(obj: OBJ) -> tuple:
+        # En ASSET_LOADER: triangulado (o cache) y mascaras de region; en paintGL solo queda la subida
+        mesh = MeshArrays.compiled(obj)
+        return mesh, RegionMasks.load_or_compute(mesh, [obj.filename])
+
+    def mesh_for(self, obj: OBJ) -> Optional[GpuMesh]:
+        # None mientras prepare corre: un modelo grande no congela el hilo GUI en su primer cuadro
+        entry = self.meshes.get(id(obj))
+        if entry is not None and entry[0] is obj and (entry[1] is None or entry[1].vbo):
+            return entry[1]
+        job = self.pending.get(id(obj))
+        if job is None or job[0] is not obj or job[1].cancelled():
+            job = (obj, ASSET_LOADER.submit(self.prepare, obj))
+            self.pending[id(obj)] = job
+        if not job[1].done():
+            return None
+        del self.pending[id(obj)]
+        try:
+            mesh, regions = job[1].result()
+        except Exception as e:
+            logger.warning("GLSL mesh not available for %s, using fixed-function: %s", os.path.basename(obj.filename), e)
+            self.meshes[id(obj)] = (obj, None) # no se reintenta en cada cuadro
+            return None
+        gpu = GpuMesh(mesh, self.owner(), os.path.basename(obj.filename), regions)
+        self.meshes[id(obj)] = (obj, gpu)
+        return gpu
+
+    def _draw_fixed(self, obj: OBJ, color):
+        # Camino anterior mientras tanto: la display list si ya existe (armarla aca seria la misma espera).
+        # Si prepare fallo el modelo queda aca: render arma la display list una vez
+        entry = self.meshes.get(id(obj))
+        if not obj.gl_list and (entry is None or entry[0] is not obj):
+            return
+        glUseProgram(0)
+        glEnable(GL_LIGHTING)
+        glColor4f(*color)
+        obj.render()
+        glDisable(GL_LIGHTING)
+        glUseProgram(self.program)
+
+    def draw(self, model, color, clip=None, morph=None):
+        # clip(model, rangos) -> rangos: recorte por visibilidad del visor
+        # morph: (MorphTargets, pesos) de un OBJ; los deltas se suben una vez y cada cuadro solo cambia el uniform
+        glUniform4f(self.loc["u_color"], *color)
+        if isinstance(model, OBJ):
+            gpu = self.mesh_for(model)
+            if gpu is None:
+                self._draw_fixed(model, color)
+                return
+            ranges = [(0, gpu.count)]
+        else:
+            gpu, ranges = model.gpu, model.ranges
+        if morph is not None and gpu.set_morphs(morph[0]):
+            weights = np.zeros(MORPH_SLOTS, dtype=np.float32)
+            weights[:len(morph[1])] = morph[1]
+            glUniform4f(self.loc["u_morph_weights"], *weights.tolist())
+        gpu.draw_ranges(clip(model, ranges) if clip is not None else ranges, generic=True)
+        if morph is not None:
+            glUniform4f(self.loc["u_morph_weights"], 0.0, 0.0, 0.0, 0.0)
+
+    def set_clip_planes(self, planes: List[np.ndarray]):
+        # Mover un corte solo cambia este uniform; los planos sin usar quedan deshabilitados
+        data = np.zeros((MAX_CLIP_PLANES, 4), dtype=np.float32)
+        data[:, 3] = 1.0
+        for i, plane in enumerate(planes[:MAX_CLIP_PLANES]):
+            data[i] = plane
+        glUniform4fv(self.loc["u_clip_planes"], MAX_CLIP_PLANES, data)
+
+    def draw_quad(self, corners: np.ndarray, normal: np.ndarray, color):
+        # Poligono chico en coordenadas del modelo (tapa de un corte), con el programa ya activo
+        data = np.ascontiguousarray(np.hstack([corners, np.repeat(normal[None, :], len(corners), axis=0)]), dtype=np.float32)
+        if not self.quad_vbo:
+            self.quad_vbo = int(glGenBuffers(1))
+            GL_LEAKS.alloc("buffer", self.quad_vbo, self.owner())
+        glUniform4f(self.loc["u_color"], color[0], color[1], color[2], 1.0)
+        glBindBuffer(GL_ARRAY_BUFFER, self.quad_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        glEnableVertexAttribArray(0)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, GpuMesh.STRIDE, ctypes.c_void_p(0))
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, GpuMesh.STRIDE, ctypes.c_void_p(12))
+        glVertexAttribI1ui(2, 0)
+        glDrawArrays(GL_TRIANGLE_FAN, 0, len(corners))
+        glDisableVertexAttribArray(1)
+        glDisableVertexAttribArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def forget(self, obj): # Con el contexto current
+        self.pending.pop(id(obj), None)
+        entry = self.meshes.pop(id(obj), None)
+        if entry is not None and entry[1] is not None:
+            entry[1].release_gl()
+
+    def release_gl(self): # Con el contexto current
+        self.end()
+        for _, gpu in self.meshes.values():
+            if gpu is not None:
+                gpu.release_gl()
+        self.meshes = {}
+        self.pending = {}
+        if self.quad_vbo:
+            glDeleteBuffers(1, [self.quad_vbo])
+            GL_LEAKS.free("buffer", self.quad_vbo, self.owner())
+            self.quad_vbo = 0
+        if self.program:
+            glDeleteProgram(self.program)
+            GL_LEAKS.free("program", self.program, self.owner())
+        self.program = 0
+
+# ---------------------------------------------------------------------------
+MODEL_COLOR = (0.9, 0.88, 0.85) # color base del modelo en todos los visores
+
+class SoftRasterizer: # Rasterizador NumPy para equipos sin OpenGL: setup de triangulos, z-buffer y Lambert
+    MAX_CANDIDATES = 1 << 21  # pixeles candidatos por lote (memoria acotada)
+    LIGHT_DIR = np.array([4.0, 4.0, 10.0], dtype=np.float32) / np.float32(math.sqrt(132.0))  # como GL_LIGHT0
+    EMPTY = np.iinfo(np.int64).max
+
+    def __init__(self):
+        self._tris: Dict[tuple, np.ndarray] = {}
+
+    def triangles(self, mesh: MeshArrays, ranges: Optional[List[tuple]]) -> np.ndarray:
+        key = (id(mesh.indices), tuple(sorted(ranges)) if ranges is not None else None) # las poses de un morph comparten indices
+        idx = self._tris.get(key)
+        if idx is None:
+            if ranges is None:
+                idx = mesh.indices
+            else:
+                idx = np.concatenate([mesh.indices[f:f + c] for f, c in key[1]] or [mesh.indices[:0]])
+            self._tris = {k: v for k, v in list(self._tris.items())[-7:] if k[0] == id(mesh.indices)} # sectores recientes
+            self._tris[key] = idx
+        return idx
+
+    def render(self, mesh: MeshArrays, ranges: Optional[List[tuple]], projection: np.ndarray, view: np.ndarray,
+               width: int, height: int, colors: np.ndarray, planes: Optional[List[np.ndarray]] = None):
+        # -> (rgb (h, w, 3) float32, profundidad (h, w) entera, cubierto (h, w) bool)
+        # colors: (3,) para toda la malla o (N, 3) por vertice
+        # planes: cortes; se descartan los triangulos del lado quitado y el interior visible se pinta como tapa
+        rgb = np.zeros((height * width, 3), dtype=np.float32)
+        idx = self.triangles(mesh, ranges)
+        if planes:
+            plane = np.asarray(planes, dtype=np.float32)
+            kept = (mesh.positions @ plane[:, :3].T + plane[:, 3]) >= 0.0
+            idx = idx[kept[idx].any(axis=1).all(axis=1)]
+        key_buf, (ea, eb, ec, ax, ay) = self.zbuffer(mesh, idx, projection, view, width, height)
+        covered = key_buf != self.EMPTY
+        pix = np.nonzero(covered)[0]
+        if not len(pix):
+            return rgb.reshape(height, width, 3), (key_buf >> 32).reshape(height, width), covered.reshape(height, width)
+        tri = key_buf[pix] & 0xFFFFFFFF
+        # Sombreado: baricentricas del triangulo ganador, normal interpolada y Lambert de dos caras
+        cx = (pix % width).astype(np.float32) + 0.5 - ax[tri]
+        cy = (pix // width).astype(np.float32) + 0.5 - ay[tri]
+        w0 = ea[0, tri] * cx + eb[0, tri] * cy + ec[0, tri]
+        w1 = ea[1, tri] * cx + eb[1, tri] * cy + ec[1, tri]
+        bary = np.stack([w0, w1, 1.0 - w0 - w1], axis=1)[:, :, None]
+        vi = idx[tri]
+        n = (mesh.normals[vi] * bary).sum(axis=1) @ view[:3, :3].T.astype(np.float32)
+        n /= np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-12)
+        lambert = np.abs(n @ self.LIGHT_DIR)
+        col = (colors[vi] * bary).sum(axis=1) if colors.ndim == 2 else colors[None, :]
+        rgb[pix] = col * (0.2 + 0.8 * lambert)[:, None]
+        if planes:
+            # Cara trasera visible = interior del solido a traves del corte: misma tapa que el stencil del visor GL
+            tris, inv = np.unique(tri, return_inverse=True)
+            corner = mesh.positions[idx[tris]]
+            face = np.cross(corner[:, 1] - corner[:, 0], corner[:, 2] - corner[:, 0])
+            face[(face * mesh.normals[idx[tris]].sum(axis=1)).sum(axis=1) < 0.0] *= -1.0 # hacia afuera aunque el OBJ mezcle el orden
+            rot = view[:3, :3].astype(np.float32)
+            eye = corner.mean(axis=1) @ rot.T + view[:3, 3]
+            back = ((face @ rot.T) * eye).sum(axis=1) > 0.0
+            cap = pix[back[inv.reshape(-1)]]
+            shade = 0.2 + 0.8 * abs(float((rot @ plane[0, :3]) @ self.LIGHT_DIR))
+            rgb[cap] = np.asarray(CAP_COLOR, dtype=np.float32) * shade
+        return rgb.reshape(height, width, 3), (key_buf >> 32).reshape(height, width), covered.reshape(height, width)
+
+    def visible(self, mesh: MeshArrays, idx: np.ndarray, projection: np.ndarray, view: np.ndarray, size: int,
+                tolerance: float = 1e-3) -> np.ndarray:
+        # Posiciones (dentro de idx) de los triangulos que ganan un pixel del z-buffer o que tienen una
+        # esquina o el centro por delante de el (triangulos mas chicos que un pixel)
+        key_buf, _ = self.zbuffer(mesh, idx, projection, view, size, size)
+        won = np.zeros(len(idx), dtype=bool)
+        won[key_buf[key_buf != self.EMPTY] & 0xFFFFFFFF] = True
+        depth = key_buf >> 32
+        sx, sy, sz, ok_v = self.project(mesh, projection, view, size, size)
+        tx, ty, tz = sx[idx.T], sy[idx.T], sz[idx.T]
+        points = [(tx[i], ty[i], tz[i]) for i in range(3)] + [(tx.mean(axis=0), ty.mean(axis=0), tz.mean(axis=0))]
+        for px, py, pz in points:
+            pix = np.clip(py.astype(np.int64), 0, size - 1) * size + np.clip(px.astype(np.int64), 0, size - 1)
+            zq = ((pz - tolerance + 1.0) * (0.5 * ((1 << 24) - 1))).astype(np.int64)
+            won |= zq <= depth[pix]
+        okt = ok_v[idx.T]
+        return np.flatnonzero(won & okt[0] & okt[1] & okt[2])
+
+    def project(self, mesh: MeshArrays, projection: np.ndarray, view: np.ndarray, width: int, height: int):
+        # -> (x, y en pixeles, z NDC, w valido) por vertice
+        mvp = (projection @ view).astype(np.float32)
+        clip = mesh.positions @ mvp[:3, :3].T + mvp[:3, 3]
+        w = mesh.positions @ mvp[3, :3] + mvp[3, 3]
+        ok_v = w > 1e-4  # sin recorte contra el plano cercano: esos triangulos se descartan
+        w = np.where(ok_v, w, 1.0)
+        sx = (clip[:, 0] / w + 1.0) * (0.5 * width)
+        sy = (1.0 - clip[:, 1] / w) * (0.5 * height)
+        return sx, sy, clip[:, 2] / w, ok_v
+
+    def zbuffer(self, mesh: MeshArrays, idx: np.ndarray, projection: np.ndarray, view: np.ndarray, width: int, height: int):
+        # -> (clave por pixel: profundidad << 32 | triangulo, funciones de borde (ea, eb, ec, ax, ay) por triangulo)
+        key_buf = np.full(height * width, self.EMPTY, dtype=np.int64)
+        if not len(idx):
+            empty = np.zeros((3, 0), np.float32)
+            return key_buf, (empty, empty, empty, empty[0], empty[0])
+        sx, sy, sz, ok_v = self.project(mesh, projection, view, width, height)
+        # Columnas por esquina: las reducciones sobre un eje de 3 son lentas en NumPy
+        tx, ty, tz = sx[idx.T], sy[idx.T], sz[idx.T]  # (3, M)
+        xmin, xmax = np.minimum(np.minimum(tx[0], tx[1]), tx[2]), np.maximum(np.maximum(tx[0], tx[1]), tx[2])
+        ymin, ymax = np.minimum(np.minimum(ty[0], ty[1]), ty[2]), np.maximum(np.maximum(ty[0], ty[1]), ty[2])
+        area = (tx[1] - tx[0]) * (ty[2] - ty[0]) - (tx[2] - tx[0]) * (ty[1] - ty[0])
+        # Pixeles cuyo centro cae en la caja del triangulo
+        x0 = np.ceil(xmin - 0.5).astype(np.int32)
+        x1 = np.minimum(np.floor(xmax - 0.5), width - 1).astype(np.int32)
+        y0 = np.ceil(ymin - 0.5).astype(np.int32)
+        y1 = np.minimum(np.floor(ymax - 0.5), height - 1).astype(np.int32)
+        okt = ok_v[idx.T]
+        keep = okt[0] & okt[1] & okt[2] & (np.abs(area) > 1e-9) & (x1 >= np.maximum(x0, 0)) & (y1 >= np.maximum(y0, 0))
+        # Funciones de borde ya divididas por el area (w_i = a_i*dx + b_i*dy + c_i) y z como plano en pantalla,
+        # relativas a la primera esquina: en float32 las coordenadas absolutas pierden la profundidad
+        # de los triangulos chicos (la cara de atras le gana a la de adelante)
+        inv_area = (1.0 / np.where(keep, area, 1.0)).astype(np.float32)
+        ax, ay = tx[0], ty[0]
+        lx, ly = tx - ax, ty - ay
+        ea = np.empty((3, len(idx)), np.float32)
+        eb = np.empty_like(ea)
+        ec = np.empty_like(ea)
+        for i, (j, k) in enumerate(((1, 2), (2, 0), (0, 1))):
+            ea[i] = (ly[j] - ly[k]) * inv_area
+            eb[i] = (lx[k] - lx[j]) * inv_area
+            ec[i] = (lx[j] * ly[k] - lx[k] * ly[j]) * inv_area
+        za = ea[1] * (tz[1] - tz[0]) + ea[2] * (tz[2] - tz[0])
+        zb = eb[1] * (tz[1] - tz[0]) + eb[2] * (tz[2] - tz[0])
+        zc = tz[0]
+
+        sel = np.nonzero(keep)[0]
+        span = np.maximum(x1[sel] - x0[sel], y1[sel] - y0[sel]) + 1
+        bucket = np.ceil(np.log2(np.maximum(span, 1))).astype(np.int32)
+        for b in np.unique(bucket):
+            # Lotes por tamaño de caja (potencias de 2): K x K pixeles candidatos por triangulo
+            k = 1 << int(b)
+            group = sel[bucket == b]
+            oy, ox = np.divmod(np.arange(k * k, dtype=np.int32), k)
+            step = max(1, self.MAX_CANDIDATES // (k * k))
+            for s in range(0, len(group), step):
+                g = group[s:s + step]
+                px = x0[g][:, None] + ox[None, :]
+                py = y0[g][:, None] + oy[None, :]
+                inside = (px <= x1[g][:, None]) & (py <= y1[g][:, None]) & (px >= 0) & (py >= 0)
+                cx = px.astype(np.float32) + (0.5 - ax[g][:, None])
+                cy = py.astype(np.float32) + (0.5 - ay[g][:, None])
+                for i in range(3):
+                    inside &= ea[i, g][:, None] * cx + eb[i, g][:, None] * cy + ec[i, g][:, None] >= 0.0
+                rows, cols = np.nonzero(inside)
+                if not len(rows):
+                    continue
+                gr = g[rows]
+                z = za[gr] * cx[rows, cols] + zb[gr] * cy[rows, cols] + zc[gr]
+                front = (z >= -1.0) & (z <= 1.0)
+                # z-buffer: profundidad (24 bits) y triangulo en una clave int64; gana la menor
+                zq = ((z[front] + 1.0) * (0.5 * ((1 << 24) - 1))).astype(np.int64)
+                np.minimum.at(key_buf, (py[rows, cols] * width + px[rows, cols])[front], (zq << 32) | gr[front])
+        return key_buf, (ea, eb, ec, ax, ay)
+
+class VisibilitySets: # Triangulos potencialmente visibles por sector de yaw, precalculados con el z-buffer de SoftRasterizer
+    VERSION = 1
+    SAMPLE_ZOOMS = (-2.0, -5.0, -20.0)  # extremos y medio del rango del visor
+    SAMPLE_SIZE = (512, 1024)           # lado del z-buffer, crece con la cantidad de triangulos
+    GAP = 32                      # huecos menores se dibujan igual: menos llamadas por unos pocos triangulos ocultos
+
+    def __init__(self, sectors: int, offsets: np.ndarray, runs: np.ndarray, triangles: int):
+        self.sectors = sectors
+        self.offsets = offsets  # (sectores + 1,) inicio de cada sector en runs
+        self.runs = runs        # (R, 2) (primer triangulo, cantidad), ordenados dentro de cada sector
+        self.triangles = triangles
+        self._ranges: Dict[tuple, List[tuple]] = {}
+
+    @classmethod
+    def build(cls, mesh: MeshArrays, layers: Optional[Dict[str, tuple]], sectors: int) -> "VisibilitySets":
+        # Cada capa se ocluye solo a si misma: el resultado vale para cualquier combinacion de capas
+        raster = SoftRasterizer()
+        groups = list((layers or {"mesh": (0, mesh.triangles)}).values())
+        # Encuadre y planos ajustados a la esfera que contiene la malla (el visor gira alrededor del origen):
+        # todo queda en cuadro y la profundidad tiene resolucion de sobra
+        radius = float(np.linalg.norm(mesh.positions, axis=1).max()) if len(mesh.positions) else 1.0
+        size = int(np.clip(2.0 * math.sqrt(mesh.triangles), *cls.SAMPLE_SIZE))
+        samples = 2 * sectors  # bordes y centros; cada borde lo comparten dos sectores
+        seen = np.zeros((samples, mesh.triangles), dtype=bool)
+        for zoom in cls.SAMPLE_ZOOMS:
+            dist = max(-zoom, radius * 1.05)
+            fovy = min(150.0, 2.0 * math.degrees(math.asin(min(1.0, radius / dist))) + 2.0)
+            projection = perspective_matrix(fovy, 1.0, max(0.05, dist - radius * 1.05), dist + radius * 1.05)
+            for k in range(samples):
+                view = view_matrix(-dist, k * 180.0 / sectors)
+                for first, count in groups:
+                    hit = raster.visible(mesh, mesh.indices[first:first + count], projection, view, size)
+                    seen[k, first + hit] = True
+        offsets, runs = [0], []
+        for s in range(sectors):
+            vis = seen[2 * s] | seen[2 * s + 1] | seen[(2 * s + 2) % samples]
+            # Un anillo de vecinos: triangulos de silueta que el muestreo puntual no llega a cubrir
+            marked = np.zeros(len(mesh.positions), dtype=bool)
+            marked[mesh.indices[vis].ravel()] = True
+            vis |= marked[mesh.indices[:, 0]] | marked[mesh.indices[:, 1]] | marked[mesh.indices[:, 2]]
+            ids = np.flatnonzero(vis)
+            if len(ids):
+                cut = np.flatnonzero(np.diff(ids) > cls.GAP + 1)
+                starts = ids[np.r_[0, cut + 1]]
+                ends = ids[np.r_[cut, len(ids) - 1]] + 1
+                runs.append(np.stack([starts, ends - starts], axis=1))
+            offsets.append(offsets[-1] + (len(runs[-1]) if len(ids) else 0))
+        runs = np.concatenate(runs).astype(np.int64) if runs else np.zeros((0, 2), np.int64)
+        return cls(sectors, np.array(offsets, dtype=np.int64), runs, mesh.triangles)
+
+    def save(self, path: str):
+        np.savez(path, sectors=self.sectors, offsets=self.offsets, runs=self.runs, triangles=self.triangles)
+
+    @classmethod
+    def load(cls, path: str) -> "VisibilitySets":
+        with np.load(path) as d:
+            return cls(int(d["sectors"]), d["offsets"], d["runs"], int(d["triangles"]))
+
+    @classmethod
+    def load_or_build(cls, mesh: MeshArrays, sources: List[str], layers: Optional[Dict[str, tuple]], sectors: int) -> "VisibilitySets":
+        cache = mesh_cache_path(sources, f".vis.v{cls.VERSION}.{sectors}.npz")
+        if os.path.isfile(cache):
+            try:
+                vis = cls.load(cache)
+                if vis.triangles == mesh.triangles and vis.sectors == sectors:
+                    return vis
+            except Exception as e:
+                logger.warning("Visibility cache unreadable %s: %s", cache, e)
+        t0 = time.perf_counter()
+        vis = cls.build(mesh, layers, sectors)
+        vis.save(cache)
+        drawn = vis.runs[:, 1].sum() / max(1, sectors * mesh.triangles)
+        logger.info("Visibility sets built: %d tris, %d sectors, %.0f%% drawn per sector (%.2f s)",
+                    mesh.triangles, sectors, drawn * 100.0, time.perf_counter() - t0)
+        return vis
+
+    @classmethod
+    def for_obj(cls, obj: OBJ, sectors: int) -> "VisibilitySets":
+        return cls.load_or_build(MeshArrays.compiled(obj), [obj.filename], None, sectors)
+
+    @classmethod
+    def for_composite(cls, comp: CompositeMesh, sectors: int) -> "VisibilitySets":
+        return cls.load_or_build(comp.mesh, [p for _, p in ANATOMY_LAYERS], comp.layers, sectors)
+
+    def sector(self, yaw: float) -> int:
+        return int((yaw % 360.0) * self.sectors / 360.0) % self.sectors
+
+    def ranges(self, sector: int, ranges: List[tuple]) -> List[tuple]:
+        # Rangos de dibujo recortados a los tramos visibles del sector
+        key = (sector, tuple(sorted(ranges)))
+        out = self._ranges.get(key)
+        if out is None:
+            runs = self.runs[self.offsets[sector]:self.offsets[sector + 1]]
+            starts, ends = runs[:, 0], runs[:, 0] + runs[:, 1]
+            out = []
+            for first, count in key[1]:
+                lo = np.clip(starts, first, first + count)
+                hi = np.clip(ends, first, first + count)
+                keep = hi > lo
+                out.extend(zip(lo[keep].tolist(), (hi - lo)[keep].tolist()))
+            self._ranges[key] = out
+        return out
+
+class ImpostorAtlas: # Sprites del modelo pre-renderizados por angulo de yaw (la camara solo gira en Y)
+    VERSION = 2  # v2: profundidad del rasterizador relativa a cada triangulo
+    REF_ZOOM = -6.0  # distancia a la que se renderizan los cuadros
+    THUMB_SIZE = 64  # miniaturas de las listas: un solo cuadro de frente
+    THUMB_RADIUS = 2.5  # la malla se encuadra a este radio para que entre entera a REF_ZOOM
+    _thumb_jobs: Dict[tuple, Future] = {}
+
+    def __init__(self, atlas: np.ndarray, count: int, size: int):
+        self.atlas = atlas  # (filas * size, columnas * size, 4) RGBA premultiplicado
+        self.count = count
+        self.size = size
+        self.cols = int(math.ceil(math.sqrt(count)))
+        self._images: Dict[int, QtGui.QImage] = {}
+
+    @classmethod
+    def build(cls, mesh: MeshArrays, count: int, size: int, colors: Optional[np.ndarray] = None) -> "ImpostorAtlas":
+        # Se renderiza con SoftRasterizer: funciona en segundo plano y sin contexto GL. colors: (N, 3) por vertice
+        raster = SoftRasterizer()
+        cols = int(math.ceil(math.sqrt(count)))
+        rows = int(math.ceil(count / cols))
+        atlas = np.zeros((rows * size, cols * size, 4), dtype=np.uint8)
+        projection = perspective_matrix(50.0, 1.0, 0.1, 100.0)
+        color = np.asarray(MODEL_COLOR, dtype=np.float32) if colors is None else colors
+        for i in range(count):
+            rgb, _, cov = raster.render(mesh, None, projection, view_matrix(cls.REF_ZOOM, i * 360.0 / count), size, size, color)
+            r, c = divmod(i, cols)
+            tile = atlas[r * size:(r + 1) * size, c * size:(c + 1) * size]
+            tile[..., :3] = (np.clip(rgb, 0.0, 1.0) * 255.0).astype(np.uint8) * cov[..., None]
+            tile[..., 3] = cov * 255
+        return cls(atlas, count, size)
+
+    @classmethod
+    def load_or_build(cls, obj: OBJ, count: int, size: int) -> "ImpostorAtlas":
+        # Un atlas por version del asset (ruta + tamaño + fecha) y configuracion de cuadros
+        cache = mesh_cache_path([obj.filename], f".impostor.v{cls.VERSION}.{count}x{size}.png")
+        if os.path.isfile(cache):
+            try:
+                return cls(np.asarray(Image.open(cache).convert("RGBA")), count, size)
+            except Exception as e:
+                logger.warning("Impostor atlas unreadable %s: %s", cache, e)
+        t0 = time.perf_counter()
+        atlas = cls.build(MeshArrays.compiled(obj), count, size)
+        Image.fromarray(atlas.atlas, "RGBA").save(cache)
+        logger.info("Impostor atlas built: %s (%d frames, %.2f s)", os.path.basename(obj.filename), count, time.perf_counter() - t0)
+        return atlas
+
+    def frame(self, i: int) -> QtGui.QImage: # Hilo GUI
+        i %= self.count
+        img = self._images.get(i)
+        if img is None:
+            r, c = divmod(i, self.cols)
+            tile = np.ascontiguousarray(self.atlas[r * self.size:(r + 1) * self.size, c * self.size:(c + 1) * self.size])
+            img = QtGui.QImage(tile.data, self.size, self.size, self.size * 4, QtGui.QImage.Format_RGBA8888_Premultiplied).copy()
+            self._images[i] = img
+        return img
+
+    def thumbnail(self, yaw: float = 0.0) -> QtGui.QImage:
+        # Cuadro mas cercano, para listas o iconos
+        return self.frame(int(round((yaw % 360.0) / (360.0 / self.count))))
+
+    @classmethod
+    def thumbnail_for(cls, source, disease: Optional[str] = None) -> "ImpostorAtlas":
+        # source: nombre del catalogo (se carga su LOD mas liviano solo si no hay miniatura en cache) u OBJ ya cargado.
+        # disease: su region (DISEASE_REGIONS) sale teñida con DISEASE_TINTS, para las listas de enfermedades
+        region = DISEASE_REGIONS.get(disease)
+        path = source.filename if isinstance(source, OBJ) else ASSET_CATALOG.path(source)
+        cache = mesh_cache_path([path], f".thumb.v{cls.VERSION}.{cls.THUMB_SIZE}.{region or 'base'}.png")
+        if os.path.isfile(cache):
+            try:
+                return cls(np.asarray(Image.open(cache).convert("RGBA")), 1, cls.THUMB_SIZE)
+            except Exception as e:
+                logger.warning("Thumbnail unreadable %s: %s", cache, e)
+        if isinstance(source, OBJ):
+            model = source
+        elif path.startswith("procedural:"):
+            model = ProceduralOBJ(path.split(":", 1)[1], "low")
+        else:
+            levels = ASSET_CATALOG.levels(source)
+            model = load_obj(path, None, levels[-1] if levels and levels[-1] != "full" else "")
+        mesh = MeshArrays.compiled(model)
+        lo, hi = mesh.positions.min(axis=0), mesh.positions.max(axis=0)
+        pos = (mesh.positions - (lo + hi) * 0.5) * (cls.THUMB_RADIUS * 2.0 / max(float(np.linalg.norm(hi - lo)), 1e-6))
+        colors = None
+        if region is not None:
+            regions = RegionMasks.load_or_compute(mesh, [model.filename])
+            colors = np.repeat(np.asarray(MODEL_COLOR, np.float32)[None, :], len(pos), axis=0)
+            if regions is not None:
+                hit = (regions & REGION_BITS[region]) != 0
+                tint = np.asarray(DISEASE_TINTS[disease], np.float32)
+                colors[hit] += (tint - colors[hit]) * 0.75
+        atlas = cls.build(MeshArrays(pos.astype(np.float32), mesh.normals, mesh.indices), 1, cls.THUMB_SIZE, colors)
+        Image.fromarray(atlas.atlas, "RGBA").save(cache)
+        return atlas
+
+    @classmethod
+    def thumbnail_job(cls, source, disease: Optional[str] = None) -> Future:
+        # Una vez por sesion y fuente, en PRECOMPUTE_LOADER: reabrir una lista no repite el trabajo
+        disease = disease if disease in DISEASE_REGIONS else None # sin region propia, la miniatura base
+        key = (source.filename if isinstance(source, OBJ) else source, disease)
+        job = cls._thumb_jobs.get(key)
+        if job is None or job.cancelled():
+            job = cls._thumb_jobs[key] = PRECOMPUTE_LOADER.submit(cls.thumbnail_for, source, disease)
+        return job
+
+    def draw(self, painter: QtGui.QPainter, rect: QRect, yaw: float, zoom: float):
+        # Mezcla de los dos cuadros vecinos; el zoom escala el sprite (tamaño ~ 1 / distancia)
+        pos = (yaw % 360.0) / (360.0 / self.count)
+        i0 = int(pos)
+        t = pos - i0
+        side = int(rect.height() * self.REF_ZOOM / min(zoom, -0.1))
+        target = QRect(rect.center().x() - side // 2, rect.center().y() - side // 2, side, side)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.drawImage(target, self.frame(i0))
+        if t > 0.0:
+            painter.setOpacity(t)
+            painter.drawImage(target, self.frame(i0 + 1))
+        painter.setOpacity(1.0)
+
+class ThumbnailIcons: # Aplica miniaturas de ImpostorAtlas a botones e items de listas cuando terminan (hilo GUI)
+    POLL_MS = 200
+
+    def __init__(self, parent):
+        self.jobs: List[tuple] = []  # (Future, widget dueño, aplicar(QIcon))
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self._poll)
+
+    def request(self, job: Future, widget, apply):
+        self.jobs.append((job, widget, apply))
+        if not self.timer.isActive():
+            self.timer.start(self.POLL_MS)
+
+    def _poll(self):
+        pending = []
+        for job, widget, apply in self.jobs:
+            if not job.done():
+                pending.append((job, widget, apply))
+            elif shiboken_alive(widget) and job.exception() is None:
+                apply(QIcon(QPixmap.fromImage(job.result().thumbnail())))
+            elif job.exception() is not None:
+                logger.warning("Thumbnail not available: %s", job.exception())
+        self.jobs = pending
+        if not pending:
+            self.timer.stop()
+
+# ---------------------------------------------------------------------------
+# Geometria procedural: patogenos y ADN armados en milisegundos en lugar de parsear OBJ pesados
+PROCEDURAL_DETAIL = {"low": 8, "medium": 16, "high": 28}  # segmentos de las mallas base por nivel de detalle
+
+def quat_rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray: # v' = q v q* para cuaterniones (x y z w), vectorizado
+    u = q[..., :3]
+    return v + 2.0 * np.cross(u, np.cross(u, v) + q[..., 3:4] * v)
+
+def quat_from_y(direction: np.ndarray) -> np.ndarray:
+    # Cuaterniones que llevan +Y a cada direccion (las mallas base apuntan hacia +Y)
+    d = direction / np.maximum(np.linalg.norm(direction, axis=-1, keepdims=True), 1e-12)
+    q = np.concatenate([np.stack([d[..., 2], np.zeros_like(d[..., 0]), -d[..., 0]], axis=-1), 1.0 + d[..., 1:2]], axis=-1)
+    flip = q[..., 3] < 1e-6 # direccion -Y: media vuelta alrededor de X
+    q[flip] = (1.0, 0.0, 0.0, 0.0)
+    return (q / np.linalg.norm(q, axis=-1, keepdims=True)).astype(np.float32)
+
+@dataclass
+class InstancedPart: # Malla base + instancias (N, 8) con el mismo formato que ParticleField (x y z escala | cuaternion)
+    mesh: MeshArrays
+    instances: np.ndarray
+
+    @classmethod
+    def place(cls, mesh: MeshArrays, offsets, scales, quats) -> "InstancedPart":
+        offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 3)
+        inst = np.zeros((len(offsets), 8), dtype=np.float32)
+        inst[:, 0:3] = offsets
+        inst[:, 3] = scales
+        inst[:, 4:8] = quats
+        return cls(mesh, inst)
+
+    def bake(self) -> MeshArrays:
+        # Copias transformadas en un solo buffer; los indices se desplazan por copia
+        inst = self.instances
+        n, v = len(inst), len(self.mesh.positions)
+        q = inst[:, None, 4:8]
+        positions = inst[:, None, 0:3] + inst[:, None, 3:4] * quat_rotate(q, self.mesh.positions[None])
+        normals = quat_rotate(q, self.mesh.normals[None])
+        base = (np.arange(n, dtype=np.uint32) * v)[:, None, None]
+        indices = self.mesh.indices[None] + base
+        return MeshArrays(positions.reshape(-1, 3).astype(np.float32), normals.reshape(-1, 3).astype(np.float32),
+                          indices.reshape(-1, 3).astype(np.uint32))
+
+class ProceduralModels: # Generadores por nivel de detalle; la malla horneada se guarda en memoria por (tipo, nivel)
+    VERSION = 1  # subir si cambia la forma: invalida BVH, regiones y visibilidad cacheadas
+    _baked: Dict[tuple, MeshArrays] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def sphere(segments: int) -> MeshArrays:
+        t = np.linspace(0.0, math.pi, segments // 2 + 1)
+        return MeshArrays.revolve(np.sin(t), np.cos(t), segments)
+
+    @staticmethod
+    def cylinder(radius: float, segments: int) -> MeshArrays:
+        # Tubo abierto de y = 1 a y = -1; los extremos quedan ocultos dentro de las esferas
+        return MeshArrays.revolve([radius, radius], [1.0, -1.0], segments)
+
+    @staticmethod
+    def spike(segments: int) -> MeshArrays:
+        # Proteina S: tallo fino y corona bulbosa, base en y = 0 y punta en y = 1
+        r = [0.0, 0.22, 0.3, 0.28, 0.16, 0.07, 0.07, 0.1]
+        y = [1.0, 0.94, 0.8, 0.68, 0.56, 0.46, 0.05, -0.1]
+        return MeshArrays.revolve(r, y, segments)
+
+    @classmethod
+    def spore(cls, segments: int) -> MeshArrays:
+        # Conidio: elipsoide alargado en Y
+        t = np.linspace(0.0, math.pi, segments // 2 + 1)
+        return MeshArrays.revolve(0.8 * np.sin(t), np.cos(t), segments)
+
+    @staticmethod
+    def bacillus(segments: int) -> MeshArrays:
+        # Clostridium tetani: bastón con la espora terminal abultada ("palillo de tambor"), espora hacia +Y
+        a = np.linspace(0.0, 0.85 * math.pi, segments // 2 + 1)
+        b = np.linspace(0.5 * math.pi, math.pi, max(3, segments // 4 + 1))
+        return MeshArrays.revolve(np.concatenate([0.3 * np.sin(a), 0.15 * np.sin(b)]),
+                                  np.concatenate([0.7 + 0.3 * np.cos(a), -0.85 + 0.15 * np.cos(b)]), segments)
+
+    @staticmethod
+    def fibonacci_sphere(count: int) -> np.ndarray:
+        # Direcciones casi uniformes sobre la esfera unidad
+        i = np.arange(count) + 0.5
+        polar = np.arccos(1.0 - 2.0 * i / count)
+        azimuth = math.pi * (1.0 + math.sqrt(5.0)) * i
+        return np.stack([np.sin(polar) * np.cos(azimuth), np.cos(polar), np.sin(polar) * np.sin(azimuth)], axis=1)
+
+    @classmethod
+    def coronavirus(cls, lod: str) -> List[InstancedPart]:
+        seg = PROCEDURAL_DETAIL[lod]
+        level = list(PROCEDURAL_DETAIL).index(lod)
+        spikes = (24, 40, 60)[level]
+        dirs = cls.fibonacci_sphere(spikes)
+        parts = [InstancedPart.place(cls.sphere(2 * seg), [(0.0, 0.0, 0.0)], 1.0, (0.0, 0.0, 0.0, 1.0)),
+                 InstancedPart.place(cls.spike(max(6, seg // 2)), dirs * 0.97, 0.42, quat_from_y(dirs))]
+        if level:
+            # Proteinas de membrana (M/E): relieve chico entre las espigas
+            bumps = cls.fibonacci_sphere(3 * spikes) @ np.array([[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+            parts.append(InstancedPart.place(cls.sphere(max(6, seg // 2)), bumps * 0.99, 0.05, quat_from_y(bumps)))
+        return parts
+
+    @classmethod
+    def dna(cls, lod: str, base_pairs: int = 20) -> List[InstancedPart]:
+        # Doble helice B: 10.5 pares por vuelta, surco menor con las hebras a 155 grados
+        seg = PROCEDURAL_DETAIL[lod]
+        radius, rise, groove = 0.5, 0.17, math.radians(155.0)
+        k = np.arange(base_pairs)
+        angle = k * 2.0 * math.pi / 10.5
+        y = (k - (base_pairs - 1) * 0.5) * rise
+        strands = [np.stack([radius * np.cos(angle + off), y, radius * np.sin(angle + off)], axis=1) for off in (0.0, groove)]
+        sugar = cls.sphere(max(6, seg // 2))
+        parts = [InstancedPart.place(sugar, p, 0.09, (0.0, 0.0, 0.0, 1.0)) for p in strands]
+        # Esqueleto: un tramo por par consecutivo de la misma hebra (todos miden lo mismo)
+        for p in strands:
+            d = np.diff(p, axis=0)
+            half = float(np.linalg.norm(d[0])) * 0.5 if len(d) else 1.0
+            parts.append(InstancedPart.place(cls.cylinder(0.035 / half, max(6, seg // 2)), p[:-1] + d * 0.5, half, quat_from_y(d)))
+        # Par de bases: un peldaño por par entre las dos hebras
+        d = strands[1] - strands[0]
+        half = radius * math.sin(groove * 0.5)
+        parts.append(InstancedPart.place(cls.cylinder(0.04 / half, max(6, seg // 2)), strands[0] + d * 0.5, half, quat_from_y(d)))
+        return parts
+
+    @classmethod
+    def spores(cls, lod: str) -> List[InstancedPart]:
+        # Cabeza de Aspergillus: conidioforo, vesicula y cadenas de conidios hacia afuera
+        seg = PROCEDURAL_DETAIL[lod]
+        level = list(PROCEDURAL_DETAIL).index(lod)
+        chains, links = (24, 48, 80)[level], 4
+        dirs = cls.fibonacci_sphere(chains * 2)
+        dirs = dirs[dirs[:, 1] > -0.25][:chains] # hemisferio superior: el tallo ocupa el de abajo
+        steps = 0.42 + 0.17 * np.arange(links)
+        centres = (dirs[:, None, :] * steps[None, :, None]).reshape(-1, 3)
+        shrink = np.tile(0.085 * 0.92 ** np.arange(links), len(dirs))
+        return [InstancedPart.place(cls.cylinder(0.07, seg), [(0.0, -0.75, 0.0)], 0.75, (0.0, 0.0, 0.0, 1.0)),
+                InstancedPart.place(cls.sphere(seg), [(0.0, 0.0, 0.0)], 0.36, (0.0, 0.0, 0.0, 1.0)),
+                InstancedPart.place(cls.spore(max(6, seg // 2)), centres, shrink, np.repeat(quat_from_y(dirs), links, axis=0))]
+
+    @classmethod
+    def parts(cls, kind: str, lod: str) -> List[InstancedPart]:
+        return getattr(cls, kind)(lod)
+
+    @classmethod
+    def baked(cls, kind: str, lod: str) -> MeshArrays:
+        # Toda la escena en un MeshArrays: la consumen GpuMesh, SoftRasterizer, BVH y visibilidad igual que un OBJ
+        key = (kind, lod)
+        with cls._lock:
+            mesh = cls._baked.get(key)
+            if mesh is None:
+                t0 = time.perf_counter()
+                meshes = [p.bake() for p in cls.parts(kind, lod)]
+                offsets = np.cumsum([0] + [len(m.positions) for m in meshes[:-1]]).astype(np.uint32)
+                mesh = MeshArrays(np.concatenate([m.positions for m in meshes]), np.concatenate([m.normals for m in meshes]),
+                                  np.concatenate([m.indices + off for m, off in zip(meshes, offsets)]))
+                cls._baked[key] = mesh
+                logger.info("Procedural %s (%s): %d tris in %.1f ms", kind, lod, mesh.triangles, (time.perf_counter() - t0) * 1000)
+        return mesh
+
+class ProceduralOBJ(OBJ): # Modelo generado en memoria; las listas de Python solo se arman si las pide la display list
+    def __init__(self, kind: str, lod: str, owner=None):
+        self.kind = kind
+        self.lod = lod if lod in PROCEDURAL_DETAIL else "medium"
+        self.arrays = ProceduralModels.baked(kind, self.lod)
+        # Nombre estable por version: las caches por ruta (BVH, regiones, visibilidad) siguen valiendo
+        self.filename = os.path.join("procedural", f"{kind}_{self.lod}.v{ProceduralModels.VERSION}.obj")
+        self.vertices, self.normals, self.texcoords, self.faces = [], [], [], []
+        self.gl_list = None
+        self.cpu_released = True
+        self.owner = weakref.ref(owner) if owner is not None else None
+        GL_LEAKS.watch(self)
+        RESOURCES.register(self, "mesh", os.path.basename(self.filename), owner, cpu=self.cpu_bytes())
+
+    def cpu_bytes(self) -> int:
+        return self.arrays.nbytes + super().cpu_bytes()
+
+    def _reload(self):
+        # Fixed-function: caras (v, -, vn) con el mismo indice para posicion y normal
+        self.vertices = self.arrays.positions.tolist()
+        self.normals = self.arrays.normals.tolist()
+        self.faces = [[(i, -1, i) for i in tri] for tri in self.arrays.indices.tolist()]
+        self.cpu_released = False
+        RESOURCES.update(self, cpu=self.cpu_bytes())
+
+class PackedOBJ(ProceduralOBJ): # Malla ya en arrays (life.pak o formato binario); listas solo para la display list
+    def __init__(self, filename: str, arrays: MeshArrays, owner=None, origin: str = "pack"):
+        self.arrays = arrays
+        self.filename = filename
+        self.vertices, self.normals, self.texcoords, self.faces = [], [], [], []
+        self.gl_list = None
+        self.cpu_released = True
+        self.owner = weakref.ref(owner) if owner is not None else None
+        GL_LEAKS.watch(self)
+        RESOURCES.register(self, "mesh", os.path.basename(filename), owner, cpu=self.cpu_bytes())
+        logger.info("Mesh from %s: %s (v:%d t:%d)", origin, filename, len(arrays.positions), arrays.triangles)
+
+# ---------------------------------------------------------------------------
+# Particulas: globulos rojos por un vaso, nubes de esporas y colonias bacterianas, miles de instancias de una malla chica
+PARTICLE_MESHES = {"blood": "red_cells", "spores": "espore"}  # tipo -> asset del catalogo; sin asset, solo la procedural
+PARTICLE_COLORS = {"blood": (0.78, 0.1, 0.12), "spores": (0.8, 0.74, 0.45), "bacteria": (0.45, 0.62, 0.3)}
+PARTICLE_SIZES = {"blood": 0.006, "spores": 0.004, "bacteria": 0.005}  # radio en fracciones de la altura del cuerpo
+PARTICLE_MAX_TRIS = 800  # una malla mas densa que esto no se instancia: se usa la procedural
+DISEASE_PARTICLES = {"Anemia": "blood", "Tétanos": "bacteria"}
+# Linea central del vaso (x desde el centro, y desde los pies, como REGION_VOLUMES): corazon -> aorta -> pierna izq.
+VESSEL_PATH = [(0.03, 0.72), (0.02, 0.78), (-0.02, 0.77), (-0.01, 0.66), (0.0, 0.56), (-0.03, 0.5),
+               (-0.055, 0.42), (-0.06, 0.28), (-0.06, 0.12), (-0.055, 0.03)]
+VESSEL_RADIUS = 0.012
+SPORE_SOURCE = (0.06, 0.7)  # foco de esporas sobre el pecho
+WOUND_SITE = (-0.06, 0.02)  # herida punzante en el pie izquierdo: la colonia de C. tetani no se disemina
+
+class ParticleField: # Posicion, escala y rotacion por instancia en un solo array (N, 8) listo para el VBO
+    _meshes: Dict[str, MeshArrays] = {}
+
+    def __init__(self, kind: str, count: int, lo: np.ndarray, hi: np.ndarray, seed: Optional[int] = None):
+        self.kind = kind
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.instances = np.zeros((count, 8), dtype=np.float32)  # x y z escala | cuaternion (x y z w)
+        self.pos = self.instances[:, 0:3]
+        self.scale = self.instances[:, 3]
+        self.quat = self.instances[:, 4:8]
+        self.height = max(float(hi[1] - lo[1]), 1e-6)
+        self.origin = np.array([(lo[0] + hi[0]) * 0.5, lo[1], (lo[2] + hi[2]) * 0.5], dtype=np.float32)
+        self.time = 0.0
+        rng = self.rng
+        axis = rng.normal(size=(count, 3)).astype(np.float32)
+        self.axis = axis / np.linalg.norm(axis, axis=1, keepdims=True)
+        self.angle = rng.uniform(0.0, 2.0 * math.pi, count).astype(np.float32)
+        self.spin = rng.uniform(-2.0, 2.0, count).astype(np.float32)  # rad/s
+        self.size = PARTICLE_SIZES[kind] * self.height
+        if kind == "blood":
+            self._init_blood()
+        elif kind == "bacteria":
+            self._init_bacteria()
+        else:
+            self._init_spores()
+        self._rotate(0.0)
+
+    @classmethod
+    def for_model(cls, kind: str, obj: Optional[OBJ], count: int) -> "ParticleField":
+        # El marco del cuerpo sale del modelo actual; sin modelo, un humano de 1.7 de alto
+        lo, hi = np.array([-0.3, 0.0, -0.15], np.float32), np.array([0.3, 1.7, 0.15], np.float32)
+        if obj is not None:
+            mesh = MeshArrays.compiled(obj)
+            if len(mesh.positions):
+                lo, hi = mesh.positions.min(axis=0), mesh.positions.max(axis=0)
+        return cls(kind, count, lo, hi)
+
+    @classmethod
+    def instance_mesh(cls, kind: str) -> MeshArrays:
+        # Malla del asset si es liviana; si no, la procedural. Normalizada a radio 1 alrededor del origen
+        mesh = cls._meshes.get(kind)
+        if mesh is not None:
+            return mesh
+        name = PARTICLE_MESHES.get(kind)
+        path = ASSET_CATALOG.path(name) if name else ""
+        tris = ASSET_CATALOG.triangles(name) if name else None
+        if tris is not None and tris > PARTICLE_MAX_TRIS:
+            logger.info("Particle mesh %s too dense for instancing (%d tris in catalog): procedural proxy", name, tris)
+        elif name and asset_exists(path):
+            try:
+                mesh = MeshArrays.compiled(load_obj(path))
+            except Exception as e:
+                logger.warning("Particle mesh %s not readable, procedural proxy: %s", os.path.basename(path), e)
+                mesh = None
+            if mesh is not None and mesh.triangles > PARTICLE_MAX_TRIS:
+                logger.info("Particle mesh %s too dense for instancing (%d tris): procedural proxy", os.path.basename(path), mesh.triangles)
+                mesh = None
+        if mesh is None or not mesh.triangles:
+            mesh = cls.proxy_mesh(kind)
+        pos = mesh.positions - (mesh.positions.min(axis=0) + mesh.positions.max(axis=0)) * 0.5
+        pos /= max(float(np.linalg.norm(pos, axis=1).max()), 1e-6)
+        mesh = MeshArrays(pos.astype(np.float32), mesh.normals, mesh.indices)
+        cls._meshes[kind] = mesh
+        return mesh
+
+    @staticmethod
+    def proxy_mesh(kind: str) -> MeshArrays:
+        if kind == "blood":
+            # Disco bicóncavo (Evans-Fung): espesor 2 * sqrt(1 - r^2) * (0.207 + 2.003 r^2 - 1.123 r^4) / 2
+            t = np.linspace(0.0, math.pi, 9)
+            r = np.sin(t)
+            half = 0.5 * np.sqrt(np.maximum(1.0 - r ** 2, 0.0)) * (0.207 + 2.003 * r ** 2 - 1.123 * r ** 4)
+            return MeshArrays.revolve(r, np.sign(np.cos(t)) * half, 12)
+        if kind == "bacteria":
+            return ProceduralModels.bacillus(PROCEDURAL_DETAIL["low"])
+        return ProceduralModels.spore(PROCEDURAL_DETAIL["low"])
+
+    def _body(self, x, y, z=0.0) -> np.ndarray: # fracciones de la altura -> coordenadas del modelo
+        return self.origin + np.stack(np.broadcast_arrays(x, y, z), axis=-1).astype(np.float32) * self.height
+
+    def _init_blood(self):
+        # Linea central remuestreada a paso constante con marco (tangente, normal, binormal) por muestra
+        pts = self._body(*np.array(VESSEL_PATH, np.float32).T)
+        seg = np.linalg.norm(np.diff(pts, axis=0), axis=1)
+        cum = np.concatenate([[0.0], np.cumsum(seg)])
+        self.length = float(cum[-1])
+        s = np.linspace(0.0, self.length, 512)
+        path = np.stack([np.interp(s, cum, pts[:, k]) for k in range(3)], axis=1).astype(np.float32)
+        tangent = np.gradient(path, axis=0)
+        tangent /= np.maximum(np.linalg.norm(tangent, axis=1, keepdims=True), 1e-9)
+        normal = np.cross(tangent, np.array([0.0, 0.0, 1.0], np.float32))
+        normal /= np.maximum(np.linalg.norm(normal, axis=1, keepdims=True), 1e-9)
+        self.path, self.path_n, self.path_b = path, normal, np.cross(tangent, normal)
+        self.step_len = self.length / (len(path) - 1)
+        rng = self.rng
+        self.s = rng.uniform(0.0, self.length, self.count).astype(np.float32)
+        self.radial = np.sqrt(rng.uniform(0.0, 0.85, self.count)).astype(np.float32)  # uniforme en la seccion
+        self.theta = rng.uniform(0.0, 2.0 * math.pi, self.count).astype(np.float32)
+        self.vmax = 0.25 * self.height  # m/s de la escena, no fisiologicos
+        self.scale[:] = self.size * rng.uniform(0.85, 1.15, self.count)
+        self._place_blood()
+
+    def _place_blood(self):
+        i = np.minimum((self.s / self.step_len).astype(np.int64), len(self.path) - 2)
+        f = (self.s / self.step_len - i)[:, None]
+        centre = self.path[i] * (1.0 - f) + self.path[i + 1] * f
+        off = VESSEL_RADIUS * self.height * self.radial
+        self.pos[:] = centre + self.path_n[i] * (off * np.cos(self.theta))[:, None] + self.path_b[i] * (off * np.sin(self.theta))[:, None]
+
+    def _step_blood(self, dt: float):
+        # Flujo de Poiseuille: mas rapido en el centro del vaso; al llegar al final vuelven al corazon
+        self.s += self.vmax * (1.0 - self.radial ** 2) * dt
+        np.mod(self.s, self.length, out=self.s)
+        self.theta += 0.4 * dt
+        self._place_blood()
+
+    def _init_spores(self):
+        self.source = self._body(SPORE_SOURCE[0], SPORE_SOURCE[1], 0.08)
+        self.vel = np.zeros((self.count, 3), np.float32)
+        self.age = np.zeros(self.count, np.float32)
+        self.life = self.rng.uniform(3.0, 7.0, self.count).astype(np.float32)
+        self._respawn(np.arange(self.count))
+        self.age[:] = self.rng.uniform(0.0, 1.0, self.count) * self.life  # nube ya formada al abrir
+
+    def _respawn(self, ids: np.ndarray):
+        n = len(ids)
+        jitter = self.rng.normal(scale=0.01 * self.height, size=(n, 3))
+        self.pos[ids] = self.source + jitter
+        direction = self.rng.normal(size=(n, 3))
+        direction[:, 2] = np.abs(direction[:, 2]) + 0.5  # hacia afuera del cuerpo
+        self.vel[ids] = direction * (0.04 * self.height)
+        self.age[ids] = 0.0
+
+    def _step_spores(self, dt: float):
+        # Dispersion: viento suave, turbulencia (senos desfasados), arrastre y una caida lenta
+        p = (self.pos - self.origin) / self.height * 6.0
+        t = self.time
+        turb = np.stack([np.sin(p[:, 1] * 2.1 + t * 0.9) + np.cos(p[:, 2] * 1.7 - t * 0.6),
+                         np.sin(p[:, 2] * 2.3 - t * 0.7) * 0.6,
+                         np.sin(p[:, 0] * 1.9 + t * 1.1) + np.cos(p[:, 1] * 1.3 + t * 0.5)], axis=1)
+        acc = (turb * 0.03 + np.array([0.02, -0.008, 0.01], np.float32)) * self.height - 0.8 * self.vel
+        self.vel += acc.astype(np.float32) * dt
+        self.pos += self.vel * dt
+        self.age += dt
+        dead = np.flatnonzero(self.age > self.life)
+        if len(dead):
+            self._respawn(dead)
+        # Aparecen y se desvanecen por tamaño (sin ordenar por transparencia)
+        u = self.age / self.life
+        self.scale[:] = self.size * np.clip(np.minimum(u * 6.0, (1.0 - u) * 4.0), 0.0, 1.0)
+
+    def _init_bacteria(self):
+        # Colonia alrededor de la herida; cada bacilo deriva y vuelve (Ornstein-Uhlenbeck) sin alejarse
+        self.site = self._body(WOUND_SITE[0], WOUND_SITE[1], 0.05)
+        self.spread = 0.025 * self.height
+        self.pos[:] = self.site + self.rng.normal(scale=self.spread, size=(self.count, 3))
+        self.spin *= 0.3 # giran despacio: sin flagelos
+        self.scale[:] = self.size * self.rng.uniform(0.8, 1.2, self.count)
+
+    def _step_bacteria(self, dt: float):
+        pull = (self.site - self.pos) * (0.5 * dt)
+        jitter = self.rng.normal(scale=self.spread * math.sqrt(max(dt, 0.0)), size=(self.count, 3))
+        self.pos += (pull + jitter).astype(np.float32)
+
+    def _rotate(self, dt: float):
+        self.angle += self.spin * dt
+        half = self.angle * 0.5
+        self.quat[:, :3] = self.axis * np.sin(half)[:, None]
+        self.quat[:, 3] = np.cos(half)
+
+    def step(self, dt: float):
+        self.time += dt
+        if self.kind == "blood":
+            self._step_blood(dt)
+        elif self.kind == "bacteria":
+            self._step_bacteria(dt)
+        else:
+            self._step_spores(dt)
+        self._rotate(dt)
+
+
+INSTANCED_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 a_position;
+layout(location = 1) in vec3 a_normal;
+layout(location = 3) in vec4 i_offset_scale;
+layout(location = 4) in vec4 i_rotation;
+uniform mat4 u_projection;
+uniform mat4 u_model_view;
+out vec3 v_eye_pos;
+out vec3 v_normal;
+out float v_region;
+out float v_highlight;
+vec3 rotate(vec4 q, vec3 v) {
+    return v + 2.0 * cross(q.xyz, cross(q.xyz, v) + q.w * v);
+}
+void main() {
+    vec3 world = i_offset_scale.xyz + i_offset_scale.w * rotate(i_rotation, a_position);
+    vec4 eye = u_model_view * vec4(world, 1.0);
+    v_eye_pos = eye.xyz;
+    v_normal = mat3(u_model_view) * rotate(i_rotation, a_normal);
+    v_region = 0.0;
+    v_highlight = 0.0;
+    gl_Position = u_projection * eye;
+}
+"""
+
+class ParticleRenderer: # Dibujo instanciado: una malla por tipo y un buffer de instancias que se resube por cuadro
+    UNIFORMS = ("u_projection", "u_model_view", "u_color", "u_light_pos", "u_reaction")
+    STRIDE = 32
+
+    def __init__(self, owner):
+        self.owner = weakref.ref(owner)
+        self.program = int(compileProgram(
+            compileShader(INSTANCED_VERTEX_SHADER, GL_VERTEX_SHADER),
+            compileShader(LIT_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            validate=False,
+        ))
+        GL_LEAKS.alloc("program", self.program, owner)
+        self.loc = {name: glGetUniformLocation(self.program, name) for name in self.UNIFORMS}
+        self.ibo = int(glGenBuffers(1))
+        GL_LEAKS.alloc("buffer", self.ibo, owner)
+        self.capacity = 0
+        self.meshes: Dict[str, GpuMesh] = {}
+        RESOURCES.register(self, "instances", "particles", owner)
+
+    @classmethod
+    def create(cls, owner) -> Optional["ParticleRenderer"]:
+        # Mismos requisitos que LitPipeline (instancing y divisores son de GL 3.3)
+        if not CONFIG.shader_pipeline:
+            return None
+        fmt = owner.context().format()
+        if (fmt.majorVersion(), fmt.minorVersion()) < (3, 3):
+            return None
+        try:
+            return cls(owner)
+        except Exception as e:
+            logger.warning("Instanced particles not available, drawing points: %s", e)
+            return None
+
+    def draw(self, field: ParticleField, projection: np.ndarray, model_view: np.ndarray):
+        gpu = self.meshes.get(field.kind)
+        if gpu is None:
+            gpu = self.meshes[field.kind] = GpuMesh(ParticleField.instance_mesh(field.kind), self.owner(), f"particles:{field.kind}")
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.loc["u_projection"], 1, GL_TRUE, projection)
+        glUniformMatrix4fv(self.loc["u_model_view"], 1, GL_TRUE, model_view)
+        glUniform4f(self.loc["u_color"], *PARTICLE_COLORS[field.kind], 1.0)
+        glUniform3f(self.loc["u_light_pos"], *LitPipeline.LIGHT_POS)
+        glUniform1f(self.loc["u_reaction"], 0.0)
+        # Un solo upload por cuadro; el buffer se huerfana para no esperar al cuadro anterior
+        data = field.instances
+        glBindBuffer(GL_ARRAY_BUFFER, self.ibo)
+        if data.nbytes > self.capacity:
+            self.capacity = data.nbytes
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+            RESOURCES.update(self, gpu=self.capacity)
+        else:
+            glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        for loc, offset in ((3, 0), (4, 16)):
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(offset))
+            glVertexAttribDivisor(loc, 1)
+        gpu.draw_instanced(field.count)
+        for loc in (3, 4):
+            glVertexAttribDivisor(loc, 0)
+            glDisableVertexAttribArray(loc)
+        glUseProgram(0)
+
+    def release_gl(self): # Con el contexto current
+        for gpu in self.meshes.values():
+            gpu.release_gl()
+        self.meshes = {}
+        if self.ibo:
+            glDeleteBuffers(1, [self.ibo])
+            GL_LEAKS.free("buffer", self.ibo, self.owner())
+        if self.program:
+            glDeleteProgram(self.program)
+            GL_LEAKS.free("program", self.program, self.owner())
+        self.ibo = self.program = self.capacity = 0
+        RESOURCES.update(self, gpu=0)
+
+# ---------------------------------------------------------------------------
+# Escalas: cuerpo -> organos -> celulas -> patogenos en un solo grafo; la rueda del mouse cambia de nivel
+SCENE_ZOOM_IN = -2.4      # mas cerca que esto se entra al hijo enfocado
+SCENE_ZOOM_OUT = -19.5    # mas lejos que esto se vuelve al padre
+SCENE_PREFETCH_ZOOM = -5.0  # desde aca se precargan los hijos visibles, antes de llegar a SCENE_ZOOM_IN
+SCENE_MIN_RADIUS = 0.03   # radio minimo de un hijo (fraccion de la caja del padre): una celula no mide 0 pixeles
+SCENE_RESIDENT = 6        # modelos que el streamer conserva ademas de la rama actual
+
+@dataclass
+class SceneNode: # Un nivel del grafo: modelo, tamaño real y posicion dentro de la caja del padre
+    name: str
+    label: str
+    source: str  # ruta de un OBJ, "procedural:<tipo>" o "body" (el modelo humano del visor)
+    size_m: float
+    anchor: Tuple[float, float, float] = (0.5, 0.5, 0.5)
+    children: List["SceneNode"] = field(default_factory=list)
+    parent: Optional["SceneNode"] = None
+
+    def scale_text(self) -> str:
+        for unit, factor in (("m", 1.0), ("cm", 1e-2), ("mm", 1e-3), ("µm", 1e-6)):
+            if self.size_m >= factor:
+                return f"{self.size_m / factor:.3g} {unit}"
+        return f"{self.size_m / 1e-9:.3g} nm"
+
+class SceneGraph: # Jerarquia de escalas y nodo activo; los hijos se ubican y recortan contra el frustum del visor
+    def __init__(self, root: SceneNode):
+        self.root = root
+        self.active = root
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                child.parent = node
+                stack.append(child)
+
+    @classmethod
+    def default(cls) -> "SceneGraph":
+        # Los nombres de nodo son los del catalogo: de ahi salen la ruta y el peso para precargar
+        src = ASSET_CATALOG.path
+        return cls(SceneNode("body", "Cuerpo humano", "body", 1.75, children=[
+            SceneNode("brain", "Cerebro", src("brain"), 0.15, (0.5, 0.94, 0.5)),
+            SceneNode("heart", "Corazón", src("heart"), 0.12, (0.56, 0.72, 0.5), [
+                SceneNode("red_cells", "Glóbulo rojo", src("red_cells"), 7.5e-6, (0.5, 0.5, 0.5), [
+                    SceneNode("coronavirus", "SARS-CoV-2", src("coronavirus"), 1.2e-7, (0.5, 0.9, 0.5))])]),
+            SceneNode("ear", "Oreja", src("ear"), 0.065, (0.42, 0.92, 0.5), [
+                SceneNode("spores", "Aspergillus (otomicosis)", src("spores"), 5e-5, (0.5, 0.5, 0.5))]),
+            SceneNode("sperm", "Espermatozoide", src("sperm"), 5.5e-5, (0.5, 0.47, 0.55), [
+                SceneNode("dna", "ADN", src("dna"), 2e-8, (0.5, 0.85, 0.5))]),
+        ]))
+
+    @staticmethod
+    def frustum(mvp: np.ndarray) -> np.ndarray:
+        # Planos (6, 4) normalizados a partir de proyeccion * vista (Gribb-Hartmann); adentro si n.p + d >= 0
+        m = mvp.astype(np.float64)
+        planes = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+        return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+    @staticmethod
+    def child_sphere(child: SceneNode, lo: np.ndarray, hi: np.ndarray) -> tuple:
+        # -> (centro, radio) del hijo en coordenadas del modelo padre
+        extent = float(np.max(hi - lo))
+        center = lo + np.asarray(child.anchor) * (hi - lo)
+        radius = extent * max(SCENE_MIN_RADIUS, min(1.0, child.size_m / child.parent.size_m))
+        return center, radius
+
+    def visible_children(self, lo: np.ndarray, hi: np.ndarray, mvp: np.ndarray) -> List[tuple]:
+        # -> [(hijo, centro, radio)] dentro del frustum, del mas cercano al centro de la pantalla al mas lejano
+        planes = self.frustum(mvp)
+        out = []
+        for child in self.active.children:
+            center, radius = self.child_sphere(child, lo, hi)
+            if np.all(planes[:, :3] @ center + planes[:, 3] >= -radius):
+                clip = mvp.astype(np.float64) @ np.append(center, 1.0)
+                off = math.hypot(clip[0], clip[1]) / max(abs(clip[3]), 1e-6)
+                out.append((off, child, center, radius))
+        return [(c, p, r) for _, c, p, r in sorted(out, key=lambda e: e[0])]
+
+    def branch(self) -> List[SceneNode]:
+        # Nodo activo y sus ancestros: nunca se desalojan
+        node, out = self.active, []
+        while node is not None:
+            out.append(node)
+            node = node.parent
+        return out
+
+class AssetStreamer: # Modelos del grafo cargados en ASSET_LOADER; cada nodo se pide una vez y queda en un LRU
+    def __init__(self, owner, resident: int = SCENE_RESIDENT):
+        self.owner = owner
+        self.resident = resident
+        self.entries: "OrderedDict[str, Future]" = OrderedDict() # nombre del nodo -> Future[(modelo, min, max) o None]
+
+    @staticmethod
+    def _load(node: SceneNode, owner, body: Optional[OBJ]) -> Optional[tuple]:
+        # La caja sale de la malla compilada (cache en disco): el mismo trabajo que hara el primer cuadro.
+        # El nivel de detalle es el mas alto que el catalogo dice que entra en el presupuesto; si ninguno entra,
+        # el mas liviano reducido. Nunca la malla completa: sin LODs reducidos el nodo no se carga
+        levels = ASSET_CATALOG.levels(node.name)
+        lod = ASSET_CATALOG.pick_lod(node.name)
+        if lod is None and node.source != "body":
+            if len(levels) < 2:
+                logger.info("Scene asset %s skipped: over the memory budget", node.name)
+                return None
+            lod = levels[-1]
+            logger.warning("Scene asset %s over the memory budget even at %s: loading the lightest level", node.name, lod)
+        elif lod and lod != levels[0]:
+            logger.info("Scene asset %s at %s to fit the memory budget", node.name, lod)
+        lod = lod or ""
+        if node.source == "body":
+            model = body
+        elif node.source.startswith("procedural:"):
+            model = ProceduralOBJ(node.source.split(":", 1)[1], lod if lod in PROCEDURAL_DETAIL else CONFIG.procedural_lod, owner)
+        elif asset_exists(node.source):
+            model = load_obj(node.source, owner, "" if lod == "full" else lod)
+        else:
+            logger.info("Scene asset missing: %s", node.source)
+            return None
+        if model is None:
+            return None
+        pos = MeshArrays.compiled(model).positions
+        if not len(pos):
+            return None
+        return model, pos.min(axis=0), pos.max(axis=0)
+
+    def request(self, node: SceneNode, body: Optional[OBJ] = None) -> Future:
+        future = self.entries.get(node.name)
+        if future is None:
+            future = ASSET_LOADER.submit(self._load, node, self.owner, body)
+            self.entries[node.name] = future
+        self.entries.move_to_end(node.name)
+        return future
+
+    def ready(self, node: SceneNode) -> Optional[tuple]:
+        # (modelo, min, max) si ya esta cargado; None si falta, fallo o sigue en curso
+        future = self.entries.get(node.name)
+        if future is None or not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Scene asset failed (%s): %s", node.name, e)
+            return None
+
+    def missing(self, node: SceneNode) -> bool:
+        # Ya se intento y no hay modelo (asset ausente o fallido)
+        future = self.entries.get(node.name)
+        return future is not None and future.done() and self.ready(node) is None
+
+    def trim(self, keep: List[SceneNode], discard):
+        # Desaloja los nodos menos usados fuera de la rama; discard(modelo) libera sus caches y GL
+        names = {n.name for n in keep}
+        for name in list(self.entries):
+            if len(self.entries) <= self.resident + len(names):
+                break
+            if name in names:
+                continue
+            future = self.entries.pop(name)
+            if not future.cancel() and future.done() and future.exception() is None and future.result() is not None:
+                discard(future.result()[0])
+
 #----------------------------------------------------------------------------
 class Activation: # Activador
     def save_activation(self, name, key):
@@ -165,39 +3311,16 @@ class Activation: # Activador
         logger.info("Producto activado para %s", name)
 
 # ---------------------------------------------------------------------------
-class GLHumanWidget(QOpenGLWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        # PATH DE Modelos Humanos
-        self.model_male_path = os.path.join("assets/anatomy", "male.obj")
-        self.model_female_path = os.path.join("assets/anatomy", "female.obj")
-        self.model_cientific_path = os.path.join("assets/anatomy", "medical.obj")
-        # Modelos Patogenos
-        self.model_corona_path = os.path.join("assets/patogens/covid_19", "coronavirus.obj")
-        self.model_corona_intern_path = os.path.join("assets/patogens/covid_19", "coronavirus_interno.obj")
-        self.model_fungus_path = os.path.join("assets/patogens/hongus", "hongus.obj")
-        self.model_fungusespore_path = os.path.join("assets/patogens/hongus", "espore.obj")
-        # Modelos Extras
-        self.model_heart_path = os.path.join("assets/extra_parts/heart", "heart.obj")
-        self.model_sperm_path = os.path.join("assets/extra_parts/reproductive_sys", "sperm.obj")
-        self.model_cell_path = os.path.join("assets/extra_parts/blood", "red_cells.obj")
-        self.model_ear_path = os.path.join("assets/extra_parts/ear", "ear.obj")
-        self.model_dna_path = os.path.join("assets/extra_parts/dna", "dna.obj")
+class HumanViewerBase: # Estado y controles comunes a los visores (OpenGL y software); va antes de la clase Qt
+    def _init_viewer(self):
+        # PATH DE Modelos Humanos: rutas del catalogo (CATALOG_ENTRIES / assets/catalog.json)
+        self.model_male_path = ASSET_CATALOG.path("male")
+        self.model_female_path = ASSET_CATALOG.path("female")
         # CARGA DE Modelos Humanos
-        self.model_male = OBJ(self.model_male_path) if os.path.isfile(self.model_male_path) else None
-        self.model_female = OBJ(self.model_female_path) if os.path.isfile(self.model_female_path) else None
-        # self.model_cientific = OBJ(self.model_cientific_path) if os.path.isfile(self.model_cientific_path) else None
-        # # Modelos Patogenos
-        # self.model_corona = OBJ(self.model_corona_path) if os.path.isfile(self.model_corona_path) else None
-        # self.model_corona_intern = OBJ(self.model_corona_intern_path) if os.path.isfile(self.model_corona_intern_path) else None
-        # self.model_fungus =  OBJ(self.model_fungus_path) if os.path.isfile(self.model_fungus_path) else None
-        # self.model_fungusespore =  OBJ(self.model_fungusespore_path) if os.path.isfile(self.model_fungusespore_path) else None
-        # # Modelos Extras
-        # self.model_heart = OBJ(self.model_heart_path) if os.path.isfile(self.model_heart_path) else None
-        # self.model_sperm = OBJ(self.model_sperm_path) if os.path.isfile(self.model_sperm_path) else None
-        # self.model_cell = OBJ(self.model_cell_path) if os.path.isfile(self.model_cell_path) else None
-        # self.model_ear = OBJ(self.model_ear_path) if os.path.isfile(self.model_ear_path) else None
-        # self.model_dna = OBJ(self.model_dna_path) if os.path.isfile(self.model_dna_path) else None
+        self.model_male = self._load_body(self.model_male_path)
+        self.model_female = self._load_body(self.model_female_path)
+        # Patogenos y ADN: ya no se parsean, ProceduralModels los genera al pedirlos (load_procedural)
+        # Modelos Extras: se cargan al pedirlos desde ExtraWindow o el explorador de escalas
 
         self.current_model = self.model_male #Se Define el modelo humano masculino al iniciar
         self.yaw = 0.0
@@ -206,21 +3329,71 @@ class GLHumanWidget(QOpenGLWidget):
         self.bg_black = True
         self.reaction_id: Optional[str] = None
         self.reaction_start = 0.0
+        self.reaction_tint = (1.0, 0.2, 0.2)
+        self.reaction_mask = 0 # bits de REGION_BITS; cambiar de enfermedad solo cambia este uniform
+        self.highlight_mask = 0 # region seleccionada con el mouse
+        self.press_pos = None
+        self.pick_targets: Dict[int, tuple] = {} # id(fuente) -> (fuente, Future[PickTarget])
+        self.projection = perspective_matrix(50.0, 1.0, 0.1, 100.0)
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update)
         self.timer.start(30)
 
         # Fondo GIF
         self.bg_frames = []
+        self.bg_path = None
         self.bg_index = 0
         self.last_frame_time = time.time()
         self.frame_delay = 0.1
-    
+
+        # Capas anatomicas del slider (piel, musculo, esqueleto): se cargan una vez y quedan en memoria
+        self.layer_futures: List[Future] = []
+        self.layers: List[OBJ] = []
+        self.layer_paths: List[str] = []
+        self.layers_body: Optional[OBJ] = None # cuerpo al que pertenecen las capas; con otro modelo no se mezclan
+        self.layer_pos = 0.0
+
+        # Malla anatomica compuesta: capas en un solo buffer, visibles por rangos
+        self.composite_future: Optional[Future] = None
+        self.composite: Optional[CompositeMesh] = None
+        self.composite_gpu: Optional[GpuMesh] = None # None en el visor software
+        self.visible_layers: Optional[List[str]] = None
+        self.visible_draw: Optional[CompositeLayer] = None
+
+        # Modo impostor: atlas de sprites por modelo, armado en ASSET_LOADER
+        self.impostors: Dict[int, tuple] = {} # id(OBJ) -> (OBJ, Future[ImpostorAtlas])
+        # Triangulos visibles por sector de yaw: se arman en PRECOMPUTE_LOADER, mientras tanto se dibuja todo
+        self.visibility: Dict[int, tuple] = {} # id(fuente) -> (fuente, Future[VisibilitySets])
+
+        # Escena de particulas (globulos, esporas): se arma en ASSET_LOADER y avanza en cada repintado
+        self.particle_kind: Optional[str] = None
+        self.particle_model: Optional[OBJ] = None
+        self.particle_future: Optional[Future] = None
+        self.particles: Optional[ParticleField] = None
+        self.particle_time = 0.0
+
+        # Morph targets: deltas armados en ASSET_LOADER; por cuadro solo cambian los pesos
+        self.morphs: Dict[int, tuple] = {} # id(OBJ) -> (OBJ, animacion, Future[MorphTargets])
+        self.morph_animation: Optional[str] = None
+        self.morph_rate: Optional[float] = None
+        self.morph_start = 0.0
+        self.morph_override: Optional[Dict[str, float]] = None # pesos fijados por una simulacion
+
+        # Cortes anatomicos: eje -> posicion (0..1 de la caja del modelo); arrastrar solo cambia un uniform
+        self.sections: Dict[str, float] = {}
+        self.bounds: Dict[int, tuple] = {} # id(modelo o capa) -> (modelo, min, max)
+
+        # Grafo de escalas: el zoom entra y sale de niveles; AssetStreamer precarga los hijos visibles
+        self.scene: Optional[SceneGraph] = None
+        self.streamer: Optional[AssetStreamer] = None
+        self.scene_target: Optional[SceneNode] = None # transicion pedida que espera su modelo
+
     def mousePressEvent(self, event):
         try:
             self.last_mouse_x = event.position().x()
         except AttributeError:
             self.last_mouse_x = event.x()
+        self.press_pos = event.position()
 
     def mouseMoveEvent(self, event):
         try:
@@ -238,31 +3411,595 @@ class GLHumanWidget(QOpenGLWidget):
 
     def mouseReleaseEvent(self, event):
         self.last_mouse_x = None
+        pos = event.position()
+        if self.press_pos is not None and (pos - self.press_pos).manhattanLength() < 4:
+            self.pick_at(pos.x(), pos.y(), event.globalPosition().toPoint())
+        self.press_pos = None
 
     def wheelEvent(self, event):
         # soporta PySide6: event.angleDelta().y()
         delta = event.angleDelta().y() / 120.0
         self.zoom += delta * 0.6
         self.zoom = max(-20.0, min(-2.0, self.zoom))
+        if self.scene is not None:
+            self._scene_zoom(delta)
         self.update()
 
     def mouseDoubleClickEvent(self, event):
         self.bg_black = not self.bg_black
         self.update()
 
+    def showEvent(self, event):
+        if not self.timer.isActive():
+            self.timer.start(30)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop() # un visor oculto no debe seguir repintando
+        super().hideEvent(event)
+
+    def load_layers(self, paths: List[str], body: Optional[OBJ] = None):
+        # Se intenta la malla compuesta; si no se puede, cada capa se parsea como OBJ en segundo plano.
+        # body: modelo dueño de las capas (las de ANATOMY_LAYERS son del cuerpo masculino)
+        self.layer_paths = paths
+        self.layers_body = body if body is not None else self.model_male
+        self.use_composite()
+
+    def _load_obj_layers(self):
+        paths = self.layer_paths
+        self.layer_futures = [ASSET_LOADER.submit(load_obj, p, self) for p in paths if asset_exists(p)]
+        if len(self.layer_futures) < len(paths):
+            logger.warning("Anatomy layers missing: %d of %d found", len(self.layer_futures), len(paths))
+
+    def use_composite(self):
+        if self.composite_future is None and self.composite is None:
+            self.composite_future = CompositeMesh.shared()
+
+    def _upload_composite(self, comp: CompositeMesh) -> Optional[GpuMesh]:
+        return None
+
+    def _layer_ready(self, obj: OBJ):
+        pass
+
+    def _discard_model(self, model: OBJ):
+        self.pick_targets.pop(id(model), None)
+        self.impostors.pop(id(model), None)
+        self.visibility.pop(id(model), None)
+        self.morphs.pop(id(model), None)
+        self.bounds.pop(id(model), None)
+
+    def _attach_composite(self, comp: CompositeMesh):
+        # Las capas del slider pasan a ser rangos de la malla compuesta
+        self.composite = comp
+        self.composite_gpu = self._upload_composite(comp)
+        slider_layers = [n for n in ("muscle", "skeleton") if n in comp.layers]
+        if self.layer_paths and slider_layers:
+            for layer in self.layers:
+                if isinstance(layer, OBJ):
+                    self._discard_model(layer)
+            self.layers = [CompositeLayer(self.composite_gpu, comp, [n]) for n in slider_layers]
+        if self.visible_layers:
+            self.visible_draw = CompositeLayer(self.composite_gpu, comp, self.visible_layers)
+        self._pick_target(comp) # el BVH se prepara en segundo plano antes del primer clic
+
+    def show_layers(self, names: List[str]) -> bool:
+        # Aislar/combinar capas: solo cambian los rangos de dibujo, sin volver a subir nada
+        if self.composite is None or not all(n in self.composite.layers for n in names):
+            return False
+        self.visible_layers = list(names)
+        self.visible_draw = CompositeLayer(self.composite_gpu, self.composite, names)
+        self.update()
+        return True
+
+    def clear_layers(self):
+        self.visible_layers = None
+        self.visible_draw = None
+
+    def _poll_layers(self):
+        if self.composite_future is not None and self.composite_future.done():
+            comp = self.composite_future.result()
+            self.composite_future = None
+            if comp is not None:
+                self._attach_composite(comp)
+            elif self.layer_paths:
+                self._load_obj_layers()
+        while self.layer_futures and self.layer_futures[0].done():
+            obj = self.layer_futures.pop(0).result()
+            self._layer_ready(obj)
+            self.layers.append(obj)
+
+    def set_layer_blend(self, value: int):
+        # 0..100 -> posicion continua entre capas; sin acceso a disco
+        self.layer_pos = max(0.0, min(1.0, value / 100.0))
+        self.update()
+
+    def _layer_stack(self) -> list:
+        # Modelo actual + sus capas; el cuerpo femenino o un modelo extra no se mezclan con capas de otro cuerpo
+        if self.layers and self.current_model is not None and self.current_model is self.layers_body:
+            return [self.current_model] + self.layers
+        return [self.current_model]
+
+    def _blending(self) -> bool:
+        return self.layer_pos > 0.0 and len(self._layer_stack()) > 1
+
+    def _blend_pair(self):
+        # -> (capa externa, capa interna, t): la externa se dibuja con alfa 1 - t sobre la interna
+        stack = self._layer_stack()
+        pos = self.layer_pos * (len(stack) - 1)
+        idx = min(int(pos), len(stack) - 2) if len(stack) > 1 else 0
+        inner = stack[idx + 1] if idx + 1 < len(stack) else None
+        return stack[idx], inner, pos - idx
+
+    def _impostor(self) -> Optional[ImpostorAtlas]:
+        # Solo para el modelo completo; capas, aislamiento, reacciones, particulas, morphs y cortes se dibujan con geometria
+        model = self.current_model
+        if not CONFIG.impostor_mode or model is None or self.visible_draw is not None or self.reaction_id \
+                or self.particle_kind or self.morph_animation or self.sections or self._blending():
+            return None
+        entry = self.impostors.get(id(model))
+        if entry is None or entry[0] is not model:
+            entry = (model, ASSET_LOADER.submit(ImpostorAtlas.load_or_build, model, CONFIG.impostor_frames, CONFIG.impostor_size))
+            self.impostors[id(model)] = entry
+        if not entry[1].done():
+            return None # mientras tanto se dibuja la geometria
+        try:
+            return entry[1].result()
+        except Exception as e:
+            logger.warning("Impostor atlas not available: %s", e)
+            return None
+
+    def _visible_ranges(self, model, ranges: List[tuple]) -> List[tuple]:
+        # Rangos de un OBJ o capa compuesta recortados al sector de yaw actual
+        source = self.composite if isinstance(model, CompositeLayer) else model
+        if not CONFIG.visibility_sectors or source is None or self.morph_animation or self.sections:
+            return ranges # una pose deformada o un corte dejan ver triangulos ocultos en reposo
+        entry = self.visibility.get(id(source))
+        if entry is None or entry[0] is not source or entry[1].cancelled(): # cancelado no es fallo: se reintenta
+            build = VisibilitySets.for_composite if isinstance(source, CompositeMesh) else VisibilitySets.for_obj
+            entry = (source, PRECOMPUTE_LOADER.submit(build, source, CONFIG.visibility_sectors))
+            self.visibility[id(source)] = entry
+        if not entry[1].done():
+            return ranges
+        try:
+            vis = entry[1].result()
+        except Exception as e:
+            logger.warning("Visibility sets not available: %s", e)
+            failed = Future()
+            failed.set_result(None) # no se reintenta en cada cuadro
+            self.visibility[id(source)] = (source, failed)
+            return ranges
+        return ranges if vis is None else vis.ranges(vis.sector(self.yaw), ranges)
+
+    def _pick_source(self):
+        # -> (fuente, rangos visibles): lo que el visor esta dibujando ahora
+        if self.visible_draw is not None:
+            return self.composite, self.visible_draw.ranges
+        if self._blending():
+            stack = self._layer_stack()
+            top = stack[min(int(round(self.layer_pos * (len(stack) - 1))), len(stack) - 1)]
+            if isinstance(top, CompositeLayer):
+                return self.composite, top.ranges
+            return top, None
+        return self.current_model, None
+
+    def _pick_target(self, source) -> Optional[PickTarget]:
+        # None mientras el BVH se construye (o carga del cache) en ASSET_LOADER
+        if source is None:
+            return None
+        entry = self.pick_targets.get(id(source))
+        if entry is None or entry[0] is not source or entry[1].cancelled(): # cancelado no es fallo: se reintenta
+            build = PickTarget.for_composite if isinstance(source, CompositeMesh) else PickTarget.for_obj
+            entry = (source, ASSET_LOADER.submit(build, source))
+            self.pick_targets[id(source)] = entry
+        future = entry[1]
+        if not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Picking not available: %s", e)
+            return None
+
+    def pick_ray(self, x: float, y: float):
+        # Punto del widget -> rayo en coordenadas del modelo (inversa de proyeccion * vista)
+        w, h = max(1, self.width()), max(1, self.height())
+        inv = np.linalg.inv(self.projection.astype(np.float64) @ view_matrix(self.zoom, self.yaw).astype(np.float64))
+        ndc_x, ndc_y = 2.0 * x / w - 1.0, 1.0 - 2.0 * y / h
+        near = inv @ np.array([ndc_x, ndc_y, -1.0, 1.0])
+        far = inv @ np.array([ndc_x, ndc_y, 1.0, 1.0])
+        origin = near[:3] / near[3]
+        direction = far[:3] / far[3] - origin
+        return origin, direction / np.linalg.norm(direction)
+
+    def pick(self, x: float, y: float) -> Optional[PickResult]:
+        source, ranges = self._pick_source()
+        target = self._pick_target(source)
+        if target is None:
+            return None
+        origin, direction = self.pick_ray(x, y)
+        t0 = time.perf_counter()
+        result = target.pick(origin, direction, ranges)
+        logger.debug("Pick %.2f ms: %s", (time.perf_counter() - t0) * 1000, result.label if result else "-")
+        return result
+
+    def pick_at(self, x: float, y: float, global_pos=None):
+        source, _ = self._pick_source()
+        entry = self.pick_targets.get(id(source)) if source is not None else None
+        result = self.pick(x, y)
+        if result is None and source is not None and (entry is None or not entry[1].done()):
+            if global_pos is not None:
+                QtWidgets.QToolTip.showText(global_pos, "Preparando selección…", self)
+            return
+        # La region mas especifica se resalta igual que las enfermedades (mascara de regiones)
+        self.highlight_mask = REGION_BITS[result.regions[0]] if result and result.regions else 0
+        if global_pos is not None:
+            if result is not None:
+                QtWidgets.QToolTip.showText(global_pos, result.label, self)
+            else:
+                QtWidgets.QToolTip.hideText()
+        self.picked.emit(result)
+        self.update()
+
+    def particle_budget(self) -> int:
+        return CONFIG.particle_count
+
+    def set_particles(self, kind: Optional[str], future: Optional[Future] = None):
+        # "blood", "spores", "bacteria" o None; el campo se arma en segundo plano sobre el modelo actual (o llega precargado)
+        if kind == self.particle_kind and self.particle_model is self.current_model:
+            return
+        self.particle_kind = kind
+        self.particle_model = self.current_model
+        self.particles = None
+        self.particle_future = None
+        if kind is not None:
+            self.particle_future = future or ASSET_LOADER.submit(ParticleField.for_model, kind, self.current_model, self.particle_budget())
+        self.update()
+
+    def _advance_particles(self) -> Optional[ParticleField]:
+        # Un paso de los kernels por repintado con el tiempo real transcurrido (acotado tras una pausa)
+        if self.particle_future is not None and self.particle_future.done():
+            try:
+                self.particles = self.particle_future.result()
+            except Exception as e:
+                logger.warning("Particle scene not available: %s", e)
+                self.particle_kind = None
+            self.particle_future = None
+            self.particle_time = time.time()
+        if self.particles is None:
+            return None
+        now = time.time()
+        self.particles.step(min(0.1, now - self.particle_time))
+        self.particle_time = now
+        return self.particles
+
+    def adopt_prefetch(self, source: Optional[OBJ], jobs: Dict[str, Future]):
+        # Trabajos de DiseasePrefetcher hechos sobre otro OBJ del mismo archivo: el resultado no depende de la instancia
+        model = self.current_model
+        if source is None or model is None or model.filename != source.filename:
+            return
+        if "morph" in jobs:
+            entry = self.morphs.get(id(model))
+            if entry is None or entry[0] is not model or entry[1] != "breathing":
+                self.morphs[id(model)] = (model, "breathing", jobs["morph"])
+        for name, cache in (("pick", self.pick_targets), ("visibility", self.visibility)):
+            entry = cache.get(id(model))
+            if name in jobs and (entry is None or entry[0] is not model):
+                cache[id(model)] = (model, jobs[name])
+
+    def set_animation(self, animation: Optional[str], rate: Optional[float] = None):
+        # "heartbeat", "breathing", "gender" o None; rate en latidos/respiraciones por minuto
+        self.morph_animation = animation if animation in MORPH_ANIMATIONS else None
+        self.morph_rate = rate
+        self.morph_start = time.time()
+        self.morph_override = None
+        self.update()
+
+    def set_morph_weights(self, weights: Optional[Dict[str, float]]):
+        # Pesos desde una simulacion; None vuelve a la linea de tiempo
+        self.morph_override = dict(weights) if weights is not None else None
+        self.update()
+
+    def _morph(self, model) -> Optional[tuple]:
+        # -> (MorphTargets, pesos (k,)) del modelo, o None mientras los deltas se arman o si no aplica
+        if not self.morph_animation or not isinstance(model, OBJ):
+            return None
+        entry = self.morphs.get(id(model))
+        if entry is None or entry[0] is not model or entry[1] != self.morph_animation:
+            partner = self.model_female if model is self.model_male else self.model_male
+            entry = (model, self.morph_animation, ASSET_LOADER.submit(MorphTargets.build, model, self.morph_animation, partner))
+            self.morphs[id(model)] = entry
+        if not entry[2].done():
+            return None
+        try:
+            targets = entry[2].result()
+        except Exception as e:
+            logger.warning("Morph targets not available (%s): %s", self.morph_animation, e)
+            self.morph_animation = None
+            return None
+        if self.morph_override is not None:
+            weights = self.morph_override
+        else:
+            weights = MorphTargets.weights(self.morph_animation, time.time() - self.morph_start, self.morph_rate)
+        return targets, np.array([weights.get(n, 0.0) for n in targets.names], dtype=np.float32)
+
+    def set_section(self, axis: Optional[str], t: Optional[float] = 0.5):
+        # axis None quita todos los cortes; t None quita solo el de ese eje
+        if axis is None:
+            self.sections = {}
+        elif axis in SECTION_AXES:
+            if t is None:
+                self.sections.pop(axis, None)
+            else:
+                self.sections[axis] = max(0.0, min(1.0, t))
+        self.update()
+
+    def _section_model(self):
+        # Lo que se tapa: la capa aislada, la capa opaca del slider o el modelo actual
+        if self.visible_draw is not None:
+            return self.visible_draw
+        if self._blending():
+            outer, inner, t = self._blend_pair()
+            return inner if inner is not None and t > 0.0 else outer
+        return self.current_model
+
+    def _model_bounds(self, model) -> Optional[tuple]:
+        # Caja del modelo (o de los rangos de una capa compuesta), una vez por modelo
+        entry = self.bounds.get(id(model))
+        if entry is None or entry[0] is not model:
+            if isinstance(model, CompositeLayer):
+                mesh = self.composite.mesh
+                verts = np.unique(np.concatenate([mesh.indices[f:f + c].ravel() for f, c in model.ranges]))
+                pos = mesh.positions[verts]
+            else:
+                pos = MeshArrays.compiled(model).positions
+            if not len(pos):
+                return None
+            entry = (model, pos.min(axis=0), pos.max(axis=0))
+            self.bounds[id(model)] = entry
+        return entry[1], entry[2]
+
+    def clip_planes(self, model) -> List[np.ndarray]:
+        # Se conserva el lado de coordenadas menores al corte: t = 1 muestra todo el modelo
+        if not self.sections or model is None:
+            return []
+        bounds = self._model_bounds(model)
+        if bounds is None:
+            return []
+        lo, hi = bounds
+        planes = []
+        for axis, t in self.sections.items():
+            k = SECTION_AXES[axis]
+            plane = np.zeros(4, dtype=np.float32)
+            plane[k] = -1.0
+            plane[3] = lo[k] + t * (hi[k] - lo[k])
+            planes.append(plane)
+        return planes[:MAX_CLIP_PLANES]
+
+    def set_scene(self, enabled: bool):
+        # Explorador de escalas desde el cuerpo completo; al salir el modelo actual queda como esta
+        if not enabled:
+            self.scene = None
+            self.scene_target = None
+            return
+        if self.streamer is None:
+            self.streamer = AssetStreamer(self)
+        self.set_gender_model("male")
+        self.scene = SceneGraph.default()
+        self.scene_target = None
+        self.streamer.request(self.scene.root, self.current_model)
+        self.zoom = -6.0
+        self.scene_changed.emit(self.scene.active)
+        self.update()
+
+    def _scene_mvp(self) -> np.ndarray:
+        return (self.projection.astype(np.float64) @ view_matrix(self.zoom, self.yaw).astype(np.float64))
+
+    def _scene_zoom(self, delta: float):
+        # Cruzar SCENE_ZOOM_IN entra al hijo visible mas centrado; cruzar SCENE_ZOOM_OUT vuelve al padre
+        node = self.scene.active
+        loaded = self.streamer.ready(node)
+        if loaded is None or self.scene_target is not None:
+            return
+        if delta > 0 and self.zoom >= SCENE_ZOOM_IN:
+            for child, _, _ in self.scene.visible_children(loaded[1], loaded[2], self._scene_mvp()):
+                if not self.streamer.missing(child):
+                    self.scene_target = child
+                    self.streamer.request(child)
+                    break
+        elif delta < 0 and self.zoom <= SCENE_ZOOM_OUT and node.parent is not None:
+            self.scene_target = node.parent
+            self.streamer.request(node.parent, self.model_male)
+        if self.scene_target is not None:
+            self._poll_scene()
+
+    def _poll_scene(self):
+        # Por cuadro: completa una transicion cuyo modelo ya llego y precarga los hijos que se ven de cerca
+        if self.scene is None:
+            return
+        target = self.scene_target
+        if target is not None:
+            future = self.streamer.entries.get(target.name)
+            if future is None or not future.done():
+                return # el zoom queda en el borde hasta que llegue el modelo
+            self.scene_target = None
+            if self.streamer.ready(target) is None:
+                return # asset ausente: se queda en el nivel actual
+            self._enter_scene(target)
+            return
+        if self.zoom < SCENE_PREFETCH_ZOOM:
+            return
+        loaded = self.streamer.ready(self.scene.active)
+        if loaded is not None:
+            for child, _, _ in self.scene.visible_children(loaded[1], loaded[2], self._scene_mvp()):
+                if child.name in self.streamer.entries or ASSET_CATALOG.pick_lod(child.name) is not None:
+                    self.streamer.request(child) # la precarga especulativa no empuja fuera de presupuesto
+
+    def _enter_scene(self, node: SceneNode):
+        # El zoom nuevo conserva el tamaño en pantalla del nodo que se cruza
+        scene = self.scene
+        current = self.streamer.ready(scene.active)
+        model, lo, hi = self.streamer.ready(node)
+        distance = -self.zoom
+        if node.parent is scene.active:
+            _, radius = SceneGraph.child_sphere(node, current[1], current[2])
+            new_radius = 0.5 * float(np.linalg.norm(hi - lo))
+            distance *= new_radius / max(radius, 1e-9)
+        else:
+            _, radius = SceneGraph.child_sphere(scene.active, lo, hi)
+            distance *= radius / max(0.5 * float(np.linalg.norm(current[2] - current[1])), 1e-9)
+        logger.info("Scene %s -> %s (%s)", scene.active.name, node.name, node.scale_text())
+        scene.active = node
+        if model is self.model_male or model is self.model_female:
+            self.clear_layers()
+            old = self.current_model
+            self.current_model = model
+            if old is not None and old is not model:
+                self._discard_model(old)
+        else:
+            self._swap_model(model)
+        self.zoom = -max(4.0, min(18.0, distance))
+        self.streamer.trim(scene.branch(), self._discard_model)
+        self.scene_changed.emit(node)
+        self.update()
+
+    def apply_reaction(self, enfermedad_id: Optional[str]):
+        # Con LitPipeline o el visor software solo se resalta la region; en fixed-function, todo el cuerpo
+        self.reaction_id = enfermedad_id
+        self.reaction_mask = RegionMasks.for_disease(enfermedad_id)
+        self.reaction_tint = DISEASE_TINTS.get(enfermedad_id or "", (1.0, 0.2, 0.2))
+        if enfermedad_id:
+            self.reaction_start = time.time()
+        self.update()
+
+    def set_gender_model(self, gender: str):
+        self.clear_layers()
+        self.highlight_mask = 0
+        if gender.lower().startswith("m") and self.model_male:
+            self.current_model = self.model_male
+        elif gender.lower().startswith("f") and self.model_female:
+            self.current_model = self.model_female
+        self.update()
+    
+    def _load_body(self, path: str) -> Optional[OBJ]:
+        # None si falta o no se puede leer: el visor sigue con el placeholder
+        if not asset_exists(path):
+            return None
+        try:
+            return load_obj(path, self)
+        except Exception as e:
+            logger.exception("Error al cargar modelo %s: %s", path, e)
+            return None
+
+    def load_model(self, model_path):     
+        if not asset_exists(model_path):
+            logger.warning(f"Modelo no encontrado: {model_path}")
+            return
+        try:
+            self._swap_model(load_obj(model_path, self))
+            logger.info(f"Modelo actualizado: {model_path}")
+        except Exception as e:
+            logger.exception(f"Error al cargar modelo dinámico: {e}")
+
+    def load_procedural(self, kind: str):
+        # Patogenos y ADN de ProceduralModels; el mismo tipo y nivel reutiliza la malla ya horneada
+        try:
+            self._swap_model(ProceduralOBJ(kind, CONFIG.procedural_lod, self))
+        except Exception as e:
+            logger.exception(f"Error al generar modelo procedural {kind}: {e}")
+
+    def _swap_model(self, model: OBJ):
+        self.clear_layers()
+        self.highlight_mask = 0
+        old = self.current_model
+        self.current_model = model
+        if old is not None and old is not self.model_male and old is not self.model_female:
+            self._discard_model(old)
+        self.update()
+
+# ---------------------------------------------------------------------------
+class GLHumanWidget(HumanViewerBase, QOpenGLWidget):
+    picked = QtCore.Signal(object) # PickResult o None al hacer clic sobre el modelo
+    scene_changed = QtCore.Signal(object) # SceneNode activo del explorador de escalas
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_viewer()
+        self.pipeline: Optional[LitPipeline] = None # GLSL 3.3; None = fixed-function
+        self.particle_renderer: Optional[ParticleRenderer] = None # None = particulas como puntos
+        self.bg_textures = None
+
+        # Ciclo de vida GL: modelos descartados se liberan en el siguiente paintGL
+        self.gl_garbage: List[OBJ] = []
+        self.gl_released = False
+        GL_LEAKS.watch(self)
+
+    def owned_models(self) -> List[OBJ]:
+        models = [self.model_male, self.model_female, self.current_model, self.composite_gpu] + self.layers + self.gl_garbage
+        unique = []
+        for m in models:
+            if m is not None and all(m is not u for u in unique):
+                unique.append(m)
+        return unique
+
+    def release_gl(self):
+        # Para el timer y libera display lists y texturas en el contexto de este visor
+        self.timer.stop()
+        if self.gl_released or self.context() is None or not self.context().isValid():
+            return
+        self.makeCurrent()
+        try:
+            for model in self.owned_models():
+                model.release_gl()
+            self.gl_garbage = []
+            if self.pipeline is not None:
+                self.pipeline.release_gl()
+                self.pipeline = None
+            if self.particle_renderer is not None:
+                self.particle_renderer.release_gl()
+                self.particle_renderer = None
+            if self.bg_textures is not None:
+                self.bg_textures.free(self)
+            self.bg_frames = []
+        finally:
+            self.doneCurrent()
+        self.gl_released = True
+        logger.debug("GL resources released: %s", GL_LEAKS.window_class(self))
+
+    def _discard_model(self, model: OBJ):
+        super()._discard_model(model)
+        self.gl_garbage.append(model)
+
+    def _collect_gl_garbage(self): # Con el contexto ya current (paintGL)
+        for model in self.gl_garbage:
+            model.release_gl()
+            if self.pipeline is not None:
+                self.pipeline.forget(model)
+        self.gl_garbage = []
+
+    def _upload_composite(self, comp: CompositeMesh) -> Optional[GpuMesh]:
+        # Subida unica del buffer compartido (paintGL, contexto current)
+        return GpuMesh(comp.mesh, self, "anatomy", comp.regions)
+
+    def _layer_ready(self, obj: OBJ):
+        obj.create_gl_list() # se sube a la GPU una sola vez
+
     # OpenGL lifecycle
     def initializeGL(self):
+        self.context().aboutToBeDestroyed.connect(self.release_gl)
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_LIGHTING)
         glEnable(GL_LIGHT0)
         glLightfv(GL_LIGHT0, GL_POSITION, [4.0, 4.0, 10.0, 1.0])
         glEnable(GL_COLOR_MATERIAL)
+        self.pipeline = LitPipeline.create(self)
+        self.particle_renderer = ParticleRenderer.create(self)
 
         gif_path = os.path.join(ASSETS_DIR, "backgrounds", "bg.gif")
-        if not os.path.isfile(gif_path):
+        if not asset_exists(gif_path):
             # intentar ruta base assets
             gif_path = os.path.join(ASSETS_DIR, "backgrounds", "bg.gif")
-        if os.path.isfile(gif_path):
+        if asset_exists(gif_path):
+            self.bg_path = gif_path
             try:
                 self.load_gif(gif_path)
             except Exception as e:
@@ -274,13 +4011,12 @@ class GLHumanWidget(QOpenGLWidget):
         logger.debug("Launching Life")
 
     def load_gif(self, path):
-        if not os.path.isfile(path):
+        if not asset_exists(path):
             logger.warning("load_gif: file doesn't exists: %s", path)
             return
-        gif = Image.open(path)
         self.bg_frames = []
-        for frame in ImageSequence.Iterator(gif):
-            frame = frame.convert("RGB")
+        gpu_bytes = 0
+        for frame in BackgroundTextures.frames(path):
             img_data = frame.tobytes("raw", "RGB", 0, -1)
             tex_id = glGenTextures(1)
             glBindTexture(GL_TEXTURE_2D, tex_id)
@@ -288,6 +4024,10 @@ class GLHumanWidget(QOpenGLWidget):
             glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
             glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, frame.width, frame.height, 0, GL_RGB, GL_UNSIGNED_BYTE, img_data)
             self.bg_frames.append(tex_id)
+            GL_LEAKS.alloc("texture", tex_id, self)
+            gpu_bytes += frame.width * frame.height * 3
+        self.bg_textures = BackgroundTextures(self.bg_frames)
+        RESOURCES.register(self.bg_textures, "gif", os.path.basename(path), self, gpu=gpu_bytes)
         logger.info("Correctly backgrounds loaded with %d frames.", len(self.bg_frames))
 
     def resizeGL(self, w, h):
@@ -296,8 +4036,20 @@ class GLHumanWidget(QOpenGLWidget):
         glLoadIdentity()
         gluPerspective(50.0, w / max(1.0, h), 0.1, 100.0)
         glMatrixMode(GL_MODELVIEW)
+        self.projection = perspective_matrix(50.0, w / max(1.0, h), 0.1, 100.0)
 
     def paintGL(self):
+        if self.gl_garbage:
+            self._collect_gl_garbage()
+        if self.gl_released:
+            # Visor reutilizado tras release_gl: las listas se recompilan solas, el fondo se recarga
+            self.gl_released = False
+            if self.bg_path and not self.bg_frames:
+                self.load_gif(self.bg_path)
+            self.pipeline = LitPipeline.create(self)
+            self.particle_renderer = ParticleRenderer.create(self)
+            if self.composite is not None:
+                self._attach_composite(self.composite)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
         if self.bg_frames:
@@ -336,35 +4088,169 @@ class GLHumanWidget(QOpenGLWidget):
             # fondo sólido
             glClearColor(0.05, 0.05, 0.06, 1.0)
 
+        atlas = self._impostor()
+        if atlas is not None:
+            # Modo impostor: sprites con QPainter encima del fondo, sin geometria
+            painter = QtGui.QPainter(self)
+            atlas.draw(painter, self.rect(), self.yaw, self.zoom)
+            painter.end()
+            return
+
         # --- Modelo 3D encima del fondo ---
         glEnable(GL_DEPTH_TEST)
-        glEnable(GL_LIGHTING)
+        glMatrixMode(GL_PROJECTION) # QPainter (modo impostor) puede haber cambiado el estado GL
+        glLoadMatrixf(np.ascontiguousarray(self.projection.T))
+        glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
         glTranslatef(0.0, 0.0, self.zoom)
         glRotatef(self.yaw, 0.0, 1.0, 0.0)
 
-        # efecto reacción pulsante
-        alpha = 0.0
-        if self.reaction_id:
-            t = time.time() - self.reaction_start
-            alpha = 0.25 + 0.5 * (0.5 + 0.5 * math.sin(t * 5.0))
-
-        if alpha > 0:
-            glColor3f(1.0, 0.6 * (1 - alpha), 0.6 * (1 - alpha))
+        reaction_t = time.time() - self.reaction_start if self.reaction_id else None
+        if self.pipeline is not None:
+            # efecto reacción pulsante: se evalua en el fragment shader a partir de u_time
+            glDisable(GL_LIGHTING)
+            color = MODEL_COLOR
+            self.pipeline.begin(self.projection, view_matrix(self.zoom, self.yaw), reaction_t,
+                                self.reaction_tint, 1.0, self.reaction_mask, self.highlight_mask)
         else:
-            glColor3f(0.9, 0.88, 0.85)
+            glEnable(GL_LIGHTING)
+            alpha = 0.0
+            if reaction_t is not None:
+                alpha = 0.25 + 0.5 * (0.5 + 0.5 * math.sin(reaction_t * 5.0))
+            if alpha > 0:
+                color = (1.0, 0.6 * (1 - alpha), 0.6 * (1 - alpha))
+            else:
+                color = MODEL_COLOR
+            glColor3f(*color)
 
         # render modelo con fallback seguro
         try:
-            if self.current_model:
-                self.current_model.render()
+            self._poll_layers()
+            self._poll_scene()
+            section = self._section_model()
+            planes = self.clip_planes(section)
+            self._set_clip(planes)
+            if self.visible_draw is not None:
+                self._draw(self.visible_draw, color)
+            elif self._blending():
+                self._render_layers(color)
+            elif self.current_model:
+                self._draw(self.current_model, color)
             else:
                 self._draw_placeholder_human()
+            if planes and section is not None:
+                self._draw_caps(section, planes, color)
         except Exception as e:
             logger.exception("Error al renderizar modelo GL: %s", e)
             self._draw_placeholder_human()
+        finally:
+            if self.pipeline is not None:
+                self.pipeline.end()
+            for i in range(MAX_CLIP_PLANES):
+                glDisable(GL_CLIP_DISTANCE0 + i)
+        field = self._advance_particles()
+        if field is not None:
+            try:
+                self._draw_particles(field)
+            except Exception as e:
+                logger.exception("Error al dibujar particulas: %s", e)
+                self.set_particles(None)
+
+    def _draw_particles(self, field: ParticleField):
+        if self.particle_renderer is not None:
+            self.particle_renderer.draw(field, self.projection, view_matrix(self.zoom, self.yaw))
+            return
+        # Fixed-function: un punto por particula desde el mismo array de instancias
+        glDisable(GL_LIGHTING)
+        glColor3f(*PARTICLE_COLORS[field.kind])
+        glPointSize(3.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, ParticleRenderer.STRIDE, field.instances)
+        glDrawArrays(GL_POINTS, 0, field.count)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _draw(self, model, color, alpha: float = 1.0):
+        # Solo las pasadas opacas usan los conjuntos de visibilidad: una capa translucida deja ver su interior
+        clip = self._visible_ranges if alpha >= 1.0 else None
+        if self.pipeline is not None:
+            self.pipeline.draw(model, (color[0], color[1], color[2], alpha), clip, self._morph(model))
+        else: # fixed-function: la display list queda en la pose de reposo
+            glColor4f(color[0], color[1], color[2], alpha)
+            if clip is not None and isinstance(model, CompositeLayer):
+                model.gpu.draw_ranges(clip(model, model.ranges))
+            else:
+                model.render()
+
+    def _set_clip(self, planes: List[np.ndarray]):
+        # LitPipeline: uniform + gl_ClipDistance; fixed-function: glClipPlane (se transforma con la modelview actual)
+        if self.pipeline is not None:
+            self.pipeline.set_clip_planes(planes)
+        else:
+            for i, plane in enumerate(planes):
+                glClipPlane(GL_CLIP_PLANE0 + i, plane.astype(np.float64))
+        for i in range(MAX_CLIP_PLANES):
+            if i < len(planes):
+                glEnable(GL_CLIP_DISTANCE0 + i)
+            else:
+                glDisable(GL_CLIP_DISTANCE0 + i)
+
+    def _draw_caps(self, model, planes: List[np.ndarray], color):
+        # Por plano: paridad de las superficies recortadas en el stencil (sin color ni profundidad) y
+        # un cuadrado sobre el plano donde quedo impar, es decir donde el plano atraviesa el solido
+        lo, hi = self._model_bounds(model)
+        centre = (lo + hi) * 0.5
+        radius = float(np.linalg.norm(hi - lo))
+        glEnable(GL_STENCIL_TEST)
+        for i, plane in enumerate(planes):
+            glClear(GL_STENCIL_BUFFER_BIT)
+            glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+            glDepthMask(GL_FALSE)
+            glDisable(GL_DEPTH_TEST)
+            glStencilFunc(GL_ALWAYS, 0, 1)
+            glStencilOp(GL_KEEP, GL_KEEP, GL_INVERT)
+            self._draw(model, color)
+            glColorMask(GL_TRUE, GL_TRUE, GL_TRUE, GL_TRUE)
+            glDepthMask(GL_TRUE)
+            glEnable(GL_DEPTH_TEST)
+            glStencilFunc(GL_EQUAL, 1, 1)
+            glStencilOp(GL_KEEP, GL_KEEP, GL_KEEP)
+            glDisable(GL_CLIP_DISTANCE0 + i) # la tapa esta sobre su propio plano; los demas cortes la recortan
+            normal = plane[:3]
+            point = centre - (normal @ centre + plane[3]) * normal
+            u = np.cross(normal, (1.0, 0.0, 0.0) if abs(normal[0]) < 0.9 else (0.0, 1.0, 0.0))
+            u /= np.linalg.norm(u)
+            v = np.cross(normal, u)
+            corners = point + radius * np.array([-u - v, u - v, u + v, -u + v])
+            if self.pipeline is not None:
+                self.pipeline.draw_quad(corners, -normal, CAP_COLOR)
+            else:
+                glColor3f(*CAP_COLOR)
+                glBegin(GL_QUADS)
+                glNormal3f(*(-normal))
+                for corner in corners:
+                    glVertex3f(*corner)
+                glEnd()
+                glColor3f(*color)
+            glEnable(GL_CLIP_DISTANCE0 + i)
+        glDisable(GL_STENCIL_TEST)
+
+    def _render_layers(self, color):
+        outer, inner, t = self._blend_pair()
+        if inner is not None and t > 0.0:
+            self._draw(inner, color) # capa interna opaca
+        if outer is not None and t < 1.0:
+            # capa externa translúcida encima, sin escribir profundidad
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            glDepthMask(GL_FALSE)
+            self._draw(outer, color, 1.0 - t)
+            glDepthMask(GL_TRUE)
+            glDisable(GL_BLEND)
 
     def _draw_placeholder_human(self):
+        if self.pipeline is not None:
+            self.pipeline.end() # el placeholder es fixed-function
+            glEnable(GL_LIGHTING)
         glPushMatrix()
         glTranslatef(0.0, 0.6, 0.0)
         quad = gluNewQuadric()
@@ -389,29 +4275,234 @@ class GLHumanWidget(QOpenGLWidget):
         glVertex3f(s, -s, -s)
         glEnd()
 
-    def apply_reaction(self, enfermedad_id: Optional[str]):
-        self.reaction_id = enfermedad_id
-        if enfermedad_id:
-            self.reaction_start = time.time()
-        self.update()
+# ---------------------------------------------------------------------------
+class SoftwareHumanWidget(HumanViewerBase, QWidget): # Visor sin OpenGL: SoftRasterizer a un QImage
+    picked = QtCore.Signal(object)
+    scene_changed = QtCore.Signal(object)
+    BASE_COLOR = np.array(MODEL_COLOR, dtype=np.float32)
 
-    def set_gender_model(self, gender: str):
-        if gender.lower().startswith("m") and self.model_male:
-            self.current_model = self.model_male
-        elif gender.lower().startswith("f") and self.model_female:
-            self.current_model = self.model_female
-        self.update()
-    
-    def load_model(self, model_path):     
-        if not os.path.isfile(model_path):
-            logger.warning(f"Modelo no encontrado: {model_path}")
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_viewer()
+        self.raster = SoftRasterizer()
+        self.arrays: Dict[int, tuple] = {} # id(OBJ) -> (OBJ, MeshArrays, regiones)
+        self.render_scale = 0.5  # resolucion interna adaptativa (fraccion del widget)
+        self.frame_ms = 0.0
+        self.frame_key = None
+        self.frame = None  # (rgba, profundidad, proyeccion, vista) del ultimo rasterizado, base de las particulas
+        self.frame_image: Optional[QtGui.QImage] = None
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        gif_path = os.path.join(ASSETS_DIR, "backgrounds", "bg.gif")
+        if asset_exists(gif_path):
+            self.bg_path = gif_path
+            try:
+                for frame in BackgroundTextures.frames(gif_path):
+                    self.bg_frames.append(QtGui.QImage(frame.tobytes("raw", "RGB"), frame.width, frame.height,
+                                                       frame.width * 3, QtGui.QImage.Format_RGB888).copy())
+            except Exception as e:
+                logger.warning("GIF not loaded: %s", e)
+                self.bg_frames = []
+        GL_LEAKS.watch(self)
+        logger.info("Software viewer active (no OpenGL)")
+
+    def release_gl(self):
+        # Sin recursos GL: solo se detiene el timer y se sueltan las copias CPU propias
+        self.timer.stop()
+        self.arrays = {}
+        self.frame = None
+        self.frame_image = None
+
+    def particle_budget(self) -> int:
+        return CONFIG.particle_count // 4
+
+    def _discard_model(self, model: OBJ):
+        super()._discard_model(model)
+        self.arrays.pop(id(model), None)
+
+    def resizeEvent(self, event):
+        self.projection = perspective_matrix(50.0, self.width() / max(1.0, self.height()), 0.1, 100.0)
+        super().resizeEvent(event)
+
+    def _mesh_for(self, model):
+        # -> (MeshArrays, rangos, regiones) de un OBJ o de una capa de la malla compuesta
+        if isinstance(model, CompositeLayer):
+            return self.composite.mesh, model.ranges, self.composite.regions
+        entry = self.arrays.get(id(model))
+        if entry is None or entry[0] is not model:
+            mesh = MeshArrays.compiled(model)
+            entry = (model, mesh, RegionMasks.load_or_compute(mesh, [model.filename]))
+            self.arrays[id(model)] = entry
+        morph = self._morph(model)
+        if morph is not None:
+            return morph[0].apply(entry[1], morph[1]), None, entry[2]
+        return entry[1], None, entry[2]
+
+    def _colors(self, mesh: MeshArrays, regions: Optional[np.ndarray]) -> np.ndarray:
+        # Misma logica que LitPipeline, evaluada por vertice en la CPU
+        if not self.reaction_id and not self.highlight_mask:
+            return self.BASE_COLOR
+        colors = np.repeat(self.BASE_COLOR[None, :], len(mesh.positions), axis=0)
+        if self.reaction_id:
+            t = time.time() - self.reaction_start
+            pulse = 0.25 + 0.5 * (0.5 + 0.5 * math.sin(t * 5.0))
+            hit = slice(None) if not self.reaction_mask or regions is None else (regions & self.reaction_mask) != 0
+            colors[hit] += (np.asarray(self.reaction_tint, np.float32) - colors[hit]) * pulse
+        if self.highlight_mask and regions is not None:
+            hit = (regions & self.highlight_mask) != 0
+            colors[hit] += (np.array([0.35, 0.8, 1.0], np.float32) - colors[hit]) * 0.45
+        return colors
+
+    def _draw_layer(self, model, width: int, height: int, projection, view):
+        # El z-buffer deja solo la superficie mas cercana, asi que tambien la capa translucida se recorta
+        mesh, ranges, regions = self._mesh_for(model)
+        ranges = self._visible_ranges(model, ranges or [(0, mesh.triangles)])
+        return self.raster.render(mesh, ranges, projection, view, width, height, self._colors(mesh, regions),
+                                  self.clip_planes(self._section_model()))
+
+    def _render_frame(self):
+        # -> (rgba premultiplicado, profundidad de lo opaco, proyeccion, vista)
+        w = max(16, int(self.width() * self.render_scale))
+        h = max(16, int(self.height() * self.render_scale))
+        projection = perspective_matrix(50.0, w / h, 0.1, 100.0)
+        view = view_matrix(self.zoom, self.yaw)
+        rgba = np.zeros((h, w, 4), dtype=np.float32)
+        depth = np.full((h, w), SoftRasterizer.EMPTY >> 32, dtype=np.int64)
+        if self.visible_draw is not None:
+            rgb, d, cov = self._draw_layer(self.visible_draw, w, h, projection, view)
+            rgba[cov, :3], rgba[cov, 3], depth[cov] = rgb[cov], 1.0, d[cov]
+        elif self._blending():
+            # Capa interna opaca; la externa se mezcla con alfa 1 - t donde queda por delante
+            outer, inner, t = self._blend_pair()
+            depth_in = None
+            if inner is not None and t > 0.0:
+                rgb, depth_in, cov = self._draw_layer(inner, w, h, projection, view)
+                rgba[cov, :3], rgba[cov, 3], depth[cov] = rgb[cov], 1.0, depth_in[cov]
+            if outer is not None and t < 1.0:
+                rgb, depth_out, cov = self._draw_layer(outer, w, h, projection, view)
+                if depth_in is not None:
+                    cov &= depth_out <= depth_in
+                a = 1.0 - t # "over" premultiplicado: color * a + destino * (1 - a), tambien donde no hay capa interna
+                rgba[cov, :3] = rgb[cov] * a + rgba[cov, :3] * (1.0 - a)
+                rgba[cov, 3] = a + rgba[cov, 3] * (1.0 - a)
+        elif self.current_model:
+            rgb, d, cov = self._draw_layer(self.current_model, w, h, projection, view)
+            rgba[cov, :3], rgba[cov, 3], depth[cov] = rgb[cov], 1.0, d[cov]
+        return rgba, depth, projection, view
+
+    @staticmethod
+    def _to_image(rgba: np.ndarray) -> QtGui.QImage:
+        # rgba ya premultiplicado (_render_frame): el fondo se ve a traves de la capa externa translucida
+        h, w = rgba.shape[:2]
+        data = np.ascontiguousarray((np.clip(rgba, 0.0, 1.0) * 255.0).astype(np.uint8))
+        return QtGui.QImage(data.data, w, h, w * 4, QtGui.QImage.Format_RGBA8888_Premultiplied).copy()
+
+    def _splat_particles(self, field: ParticleField, rgba: np.ndarray, depth: np.ndarray, projection, view):
+        # Cada particula es un disco sombreado de 1 a 5 pixeles, con z-buffer propio y oculto por el modelo
+        h, w = depth.shape
+        mvp = (projection @ view).astype(np.float32)
+        clip = field.pos @ mvp[:3, :3].T + mvp[:3, 3]
+        cw = field.pos @ mvp[3, :3] + mvp[3, 3]
+        ok = (cw > 1e-4) & (field.scale > 0.0)
+        cw = np.where(ok, cw, 1.0)
+        sx = (clip[:, 0] / cw + 1.0) * (0.5 * w)
+        sy = (1.0 - clip[:, 1] / cw) * (0.5 * h)
+        zq = ((clip[:, 2] / cw + 1.0) * (0.5 * ((1 << 24) - 1))).astype(np.int64)
+        radius = np.clip(field.scale * projection[1, 1] * 0.5 * h / cw, 0.5, 2.5)
+        keys = np.full(h * w, SoftRasterizer.EMPTY, dtype=np.int64)
+        ids = np.arange(field.count, dtype=np.int64)
+        for dy in range(-2, 3):
+            for dx in range(-2, 3):
+                px = (sx + dx).astype(np.int64)
+                py = (sy + dy).astype(np.int64)
+                sel = ok & (dx * dx + dy * dy <= radius * radius + 0.25) & (px >= 0) & (px < w) & (py >= 0) & (py < h)
+                np.minimum.at(keys, py[sel] * w + px[sel], (zq[sel] << 32) | ids[sel])
+        hit = np.flatnonzero((keys != SoftRasterizer.EMPTY) & ((keys >> 32) < depth.ravel()))
+        if not len(hit):
             return
-        try:
-            self.current_model = OBJ(model_path)
-            self.update()
-            logger.info(f"Modelo actualizado: {model_path}")
-        except Exception as e:
-            logger.exception(f"Error al cargar modelo dinámico: {e}")
+        p = keys[hit] & 0xFFFFFFFF
+        ddx = (hit % w) + 0.5 - sx[p]
+        ddy = (hit // w) + 0.5 - sy[p]
+        nz = np.sqrt(np.clip(1.0 - (ddx * ddx + ddy * ddy) / (radius[p] * radius[p] + 0.5), 0.0, 1.0))
+        flat = rgba.reshape(-1, 4)
+        flat[hit, :3] = np.asarray(PARTICLE_COLORS[field.kind], np.float32)[None, :] * (0.35 + 0.65 * nz)[:, None]
+        flat[hit, 3] = 1.0
+
+    def _adapt_resolution(self, elapsed_ms: float):
+        # Mantiene el tiempo de cuadro cerca de CONFIG.software_frame_ms bajando/subiendo la resolucion interna
+        target = CONFIG.software_frame_ms
+        if elapsed_ms > target * 1.1:
+            self.render_scale *= max(0.6, math.sqrt(target / elapsed_ms))
+        elif elapsed_ms < target * 0.6:
+            self.render_scale *= 1.15
+        self.render_scale = max(0.2, min(1.0, self.render_scale))
+
+    def paintEvent(self, event):
+        self._poll_layers()
+        self._poll_scene()
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        if self.bg_frames:
+            now = time.time()
+            if now - self.last_frame_time > self.frame_delay:
+                self.bg_index = (self.bg_index + 1) % len(self.bg_frames)
+                self.last_frame_time = now
+            painter.drawImage(self.rect(), self.bg_frames[self.bg_index])
+        else:
+            painter.fillRect(self.rect(), QColor(13, 13, 15))
+        # Solo se rasteriza si cambio la camara, el modelo o hay una reaccion o un morph animado
+        key = (self.yaw, self.zoom, self.width(), self.height(), self.render_scale, id(self.current_model),
+               id(self.visible_draw), self.layer_pos, len(self.layers), self.highlight_mask, self.reaction_id,
+               tuple(sorted(self.sections.items())))
+        atlas = self._impostor()
+        if atlas is not None:
+            atlas.draw(painter, self.rect(), self.yaw, self.zoom)
+            painter.end()
+            return
+        if key != self.frame_key or self.reaction_id or self.morph_animation:
+            t0 = time.perf_counter()
+            try:
+                self.frame = self._render_frame()
+                self.frame_image = self._to_image(self.frame[0])
+            except Exception as e:
+                logger.exception("Error al rasterizar modelo: %s", e)
+                self.frame = self.frame_image = None
+            self.frame_ms = (time.perf_counter() - t0) * 1000.0
+            self.frame_key = key
+            self._adapt_resolution(self.frame_ms)
+        image = self.frame_image
+        field = self._advance_particles()
+        if field is not None and self.frame is not None:
+            # El modelo queda en cache; solo las particulas se vuelven a dibujar en cada cuadro
+            rgba = self.frame[0].copy()
+            self._splat_particles(field, rgba, *self.frame[1:])
+            image = self._to_image(rgba)
+        if image is not None:
+            painter.drawImage(self.rect(), image)
+        painter.end()
+
+
+_OPENGL_OK: Optional[bool] = None
+
+def opengl_available() -> bool:
+    # Prueba una sola vez si se puede crear y activar un contexto con el formato por defecto
+    global _OPENGL_OK
+    if _OPENGL_OK is None:
+        ctx = QtGui.QOpenGLContext()
+        surface = QtGui.QOffscreenSurface()
+        surface.create()
+        _OPENGL_OK = bool(ctx.create() and surface.isValid() and ctx.makeCurrent(surface))
+        if _OPENGL_OK:
+            ctx.doneCurrent()
+        else:
+            logger.warning("OpenGL context not available: using the software viewer")
+    return _OPENGL_OK
+
+def create_viewer(parent=None):
+    # CONFIG.viewer_backend: "auto" (GL si hay contexto), "gl" o "software"
+    backend = CONFIG.viewer_backend
+    if backend == "software" or (backend == "auto" and not opengl_available()):
+        return SoftwareHumanWidget(parent)
+    return GLHumanWidget(parent)
 
 # ---------------------------------------------------------------------------
 class SettingsDialog(QDialog):
@@ -451,8 +4542,10 @@ class DiseasePatogen(QMainWindow):
     def __init__(self, enfermedad_actual, descripciones):
         super().__init__()
         self.setWindowTitle("Life Analizer")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        GL_LEAKS.watch(self)
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico2.ico")
-        self.setWindowIcon(QIcon(ico_path))
+        self.setWindowIcon(asset_icon(ico_path))
         self.setGeometry(200, 100, 1100, 600)
         self.setFixedSize(1100, 600)  # Tamaño fijo, no redimensionable
 
@@ -472,12 +4565,12 @@ class DiseasePatogen(QMainWindow):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
 
-        label_title = QLabel(descripciones) # Título
-        label_title.setWordWrap(True)
-        label_title.setFont(QFont("Monserrat", 12, QFont.Bold))
-        label_title.setAlignment(Qt.AlignJustify)
-        label_title.setMaximumHeight(self.height()*0.4)
-        left_layout.addWidget(label_title)
+        self.label_title = QLabel(descripciones) # Título
+        self.label_title.setWordWrap(True)
+        self.label_title.setFont(QFont("Monserrat", 12, QFont.Bold))
+        self.label_title.setAlignment(Qt.AlignJustify)
+        self.label_title.setMaximumHeight(self.height()*0.4)
+        left_layout.addWidget(self.label_title)
 
         left_layout.addStretch()
         main_layout.addWidget(left_panel, 1)
@@ -487,8 +4580,9 @@ class DiseasePatogen(QMainWindow):
         right_panel.setStyleSheet("background-color: black; border: 0px solid #555;")
         right_layout = QVBoxLayout(right_panel)
 
-        self.viewer = GLHumanWidget()
+        self.viewer = create_viewer()
         right_layout.addWidget(self.viewer)
+        GL_LEAKS.watch_window(self, self.viewer)
 
         # Panel inferior (descripción)
         self.desc_label = QLabel(enfermedad_actual)
@@ -499,6 +4593,23 @@ class DiseasePatogen(QMainWindow):
         right_layout.addWidget(self.desc_label)
         main_layout.addWidget(right_panel, 3)
 
+    def bind(self, enfermedad_actual, descripciones, gender: Optional[str] = None, prefetch: tuple = (None, {})):
+        # Reutilizacion desde WindowPool: solo cambia el contenido; prefetch = DiseasePrefetcher.claim()
+        self.enfermedad_actual = enfermedad_actual
+        self.label_title.setText(descripciones)
+        self.desc_label.setText(enfermedad_actual)
+        if gender:
+            self.viewer.set_gender_model(gender)
+        self.viewer.adopt_prefetch(*prefetch)
+        self.viewer.apply_reaction(enfermedad_actual)
+        self.viewer.set_particles(DISEASE_PARTICLES.get(enfermedad_actual), prefetch[1].get("particles"))
+        self.viewer.set_animation("breathing", DISEASE_BREATHING.get(enfermedad_actual, BREATHS_PER_MIN))
+
+    def closeEvent(self, event):
+        if not getattr(self, "pooled", False):
+            self.viewer.release_gl()
+        super().closeEvent(event)
+
     def blink_text(self, label: QLabel):
         opa = QGraphicsOpacityEffect(label)
         label.setGraphicsEffect(opa)
@@ -511,6 +4622,121 @@ class DiseasePatogen(QMainWindow):
         ani.start()
         label.actionEventanimation = ani
             
+# ---------------------------------------------------------------------------
+class WindowPool: # Mantiene ventanas tibias y las reutiliza (LRU) en lugar de reconstruirlas
+    def __init__(self, factory, capacity: int = 1, reuse: bool = True):
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self.reuse = reuse
+        self.windows: List[tuple] = []  # (clave, ventana), la mas reciente al final
+
+    def _alive(self):
+        self.windows = [(k, w) for k, w in self.windows if shiboken_alive(w)]
+
+    def acquire(self, key=None):
+        self._alive()
+        if not self.reuse:
+            # Sin pool: se cierra la anterior (libera GL) y se construye otra
+            for _, w in self.windows:
+                w.close()
+            win = self.factory()
+            self.windows = [(key, win)]
+            return win
+        for i, (k, w) in enumerate(self.windows):
+            if k == key:
+                self.windows.append(self.windows.pop(i))
+                return w
+        if len(self.windows) < self.capacity:
+            win = self.factory()
+            win.pooled = True
+            win.setAttribute(Qt.WA_DeleteOnClose, False)
+        else:
+            _, win = self.windows.pop(0) # se recicla la menos usada
+            logger.debug("WindowPool: recycling %s", type(win).__name__)
+        self.windows.append((key, win))
+        return win
+
+class DiseasePrefetcher: # Carga especulativa de lo que usara DiseasePatogen mientras el usuario termina el asistente
+    def __init__(self):
+        self.disease: Optional[str] = None
+        self.model: Optional[OBJ] = None
+        self.jobs: Dict[str, Future] = {}
+        self.owned: set = set() # trabajos enviados por el prefetcher; los compartidos con el visor principal no se cancelan
+        self.times: Dict[str, list] = {} # trabajo -> [inicio, fin] en perf_counter
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _timed(times: Dict[str, list], name: str, fn, *args):
+        times[name] = [time.perf_counter(), None]
+        try:
+            return fn(*args)
+        finally:
+            times[name][1] = time.perf_counter()
+
+    def start(self, disease: Optional[str], viewer):
+        # Mismo calculo que hara el visor de la enfermedad, sobre el modelo del visor principal (mismo archivo)
+        model = viewer.current_model
+        if disease == self.disease and model is self.model:
+            return
+        self.cancel()
+        if not disease or model is None:
+            return
+        self.disease, self.model = disease, model
+        jobs = {"morph": (MorphTargets.build, model, "breathing"),
+                "pick": (PickTarget.for_obj, model)}
+        if CONFIG.visibility_sectors:
+            jobs["visibility"] = (VisibilitySets.for_obj, model, CONFIG.visibility_sectors)
+        kind = DISEASE_PARTICLES.get(disease)
+        if kind:
+            jobs["particles"] = (ParticleField.for_model, kind, model, viewer.particle_budget())
+            jobs["instances"] = (ParticleField.instance_mesh, kind)
+        gif_path = os.path.join(ASSETS_DIR, "backgrounds", "bg.gif")
+        if asset_exists(gif_path):
+            jobs["background"] = (BackgroundTextures.frames, gif_path)
+        for name, (fn, *args) in jobs.items():
+            # El BVH y la visibilidad que el visor principal ya pidio se comparten en vez de repetirse
+            shared = {"pick": viewer.pick_targets, "visibility": viewer.visibility}.get(name, {}).get(id(model))
+            if shared is not None and shared[0] is model and not shared[1].cancelled():
+                self.jobs[name] = shared[1]
+            else:
+                pool = PRECOMPUTE_LOADER if name == "visibility" else ASSET_LOADER
+                self.jobs[name] = pool.submit(self._timed, self.times, name, fn, *args)
+                self.owned.add(name)
+        logger.info("Prefetch started for %s: %s", disease, ", ".join(self.jobs))
+
+    def cancel(self):
+        # Los trabajos propios que todavia no arrancaron se quitan de la cola; los que corren terminan y se descartan.
+        # Los futuros prestados del visor principal solo se sueltan: cancelarlos le dejaria sin picking ni visibilidad
+        if self.jobs:
+            dropped = sum(self.jobs[n].cancel() for n in self.owned)
+            logger.info("Prefetch cancelled for %s (%d of %d jobs never ran)", self.disease, dropped, len(self.jobs))
+        self.disease = self.model = None
+        self.jobs = {}
+        self.owned = set()
+        self.times = {}
+
+    def claim(self, disease: str, model: Optional[OBJ]) -> tuple:
+        # -> (modelo fuente, trabajos) para DiseasePatogen.bind; (None, {}) si se precargo otra enfermedad u otro modelo
+        if disease != self.disease or model is not self.model or not self.jobs:
+            self.misses += 1
+            self.cancel()
+            logger.info("Prefetch miss for %s (hit rate %d/%d)", disease, self.hits, self.hits + self.misses)
+            return None, {}
+        self.hits += 1
+        now = time.perf_counter()
+        ready = [n for n, f in self.jobs.items() if f.done()]
+        # Latencia ahorrada: trabajo ya hecho (o en curso) que bind habria arrancado recien ahora
+        saved = sum((end or now) - begin for begin, end in list(self.times.values()))
+        logger.info("Prefetch hit for %s: %d/%d jobs ready, ~%.0f ms saved (hit rate %d/%d)", disease, len(ready),
+                    len(self.jobs), saved * 1000, self.hits, self.hits + self.misses)
+        claimed = (self.model, self.jobs)
+        self.disease = self.model = None
+        self.jobs = {}
+        self.owned = set()
+        self.times = {}
+        return claimed
+
 # ---------------------------------------------------------------------------
 class AnimatedButton(QPushButton):
     def __init__(self, text, parent=None):
@@ -563,7 +4789,7 @@ class ReportGenerator:
         self.out_path = os.path.join(self.output_dir, f"Life Report.docx")
 
     def generate(self) -> str:
-        doc = Document(os.path.join(BASE_DIR, "docs", "life_report_template.docx"))
+        doc = Document(asset_file(os.path.join(BASE_DIR, "docs", "life_report_template.docx")))
         today = datetime.today().strftime("%Y-%m-%d")
 
         # Ejemplo: reemplazo de campos "-" en tablas
@@ -581,13 +4807,332 @@ class ReportGenerator:
         logger.info("Success!. Report saved correctly in Documents/Lifeness Simulator.")
         return self.out_path
 
+# ---------------------------------------------------------------------------
+class ScenarioRecorder(QtCore.QObject): # Graba escenarios de interaccion para benchmarks/replay.py
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.steps: List[dict] = []
+        self.active = False
+        self.t0 = 0.0
+        self._dragging = None
+
+    def start(self):
+        self.steps = []
+        self.t0 = time.perf_counter()
+        self.active = True
+        QApplication.instance().installEventFilter(self)
+        logger.info("Scenario recording started")
+
+    def stop(self) -> str:
+        QApplication.instance().removeEventFilter(self)
+        self.active = False
+        os.makedirs(SCENARIOS_DIR, exist_ok=True)
+        path = os.path.join(SCENARIOS_DIR, datetime.now().strftime("scenario_%Y%m%d_%H%M%S.json"))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "setup": {"activated": os.path.exists(ACTIVATION_FILE)},
+                       "steps": self.steps}, f, indent=2, ensure_ascii=False)
+        logger.info("Scenario saved (%d steps): %s", len(self.steps), path)
+        return path
+
+    @staticmethod
+    def widget_key(widget) -> Optional[str]:
+        # Identifica el widget por el atributo que lo guarda en su ventana: "MainWindow.btn_sim"
+        win = widget.window()
+        if isinstance(win, QMessageBox):
+            return None
+        for name, value in vars(win).items():
+            if value is widget:
+                return f"{type(win).__name__}.{name}"
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    if v is widget:
+                        return f"{type(win).__name__}.{name}[{k}]"
+        return None
+
+    def _add(self, step: dict):
+        step["t"] = round(time.perf_counter() - self.t0, 3)
+        self.steps.append(step)
+
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype not in (QtCore.QEvent.MouseButtonPress, QtCore.QEvent.MouseButtonRelease, QtCore.QEvent.MouseMove):
+            return False
+        if isinstance(obj, QSlider):
+            key = self.widget_key(obj)
+            if key is None:
+                return False
+            if etype == QtCore.QEvent.MouseButtonPress:
+                self._dragging = {"action": "drag", "target": key, "values": []}
+                self._add(self._dragging)
+            elif self._dragging is not None and self._dragging["target"] == key:
+                # El valor se actualiza despues del evento: se lee en el siguiente ciclo
+                QTimer.singleShot(0, lambda s=obj, d=self._dragging: self._slider_value(s, d))
+                if etype == QtCore.QEvent.MouseButtonRelease:
+                    self._dragging = None
+        elif etype == QtCore.QEvent.MouseButtonRelease:
+            if isinstance(obj, QtWidgets.QAbstractButton) and obj.isEnabled():
+                key = self.widget_key(obj)
+                if key:
+                    self._add({"action": "click", "target": key})
+            elif isinstance(obj.parent(), QListWidget) and obj is obj.parent().viewport():
+                lst = obj.parent()
+                key = self.widget_key(lst)
+                item = lst.itemAt(event.position().toPoint())
+                if key and item is not None:
+                    self._add({"action": "select", "target": key, "text": item.text()})
+        return False
+
+    def _slider_value(self, slider, drag):
+        if not drag["values"] or drag["values"][-1] != slider.value():
+            drag["values"].append(slider.value())
+
+# ---------------------------------------------------------------------------
+class StallWatchdog(QtCore.QObject): # Detecta bloqueos del event loop y guarda la pila del hilo GUI
+    def __init__(self, threshold_ms: float = 250.0, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.gui_ident = threading.get_ident()
+        self.report_path = os.path.join(LOGS_DIR, "stall_report.txt")
+        self.sites: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.last_beat = time.perf_counter()
+        self.pending = None
+        self.running = False
+        self.beat_timer = QTimer(self)
+        self.beat_timer.timeout.connect(self._beat)
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.last_beat = time.perf_counter()
+        self.beat_timer.start(max(10, int(self.threshold * 250)))
+        self.thread = threading.Thread(target=self._watch, name="life-stall-watchdog", daemon=True)
+        self.thread.start()
+        logger.info("Stall watchdog on (threshold %.0f ms)", self.threshold * 1000)
+
+    def stop(self):
+        self.running = False
+        self.beat_timer.stop()
+        self._beat()
+        self.write_report()
+
+    def _beat(self): # Hilo GUI: el event loop dio una vuelta
+        now = time.perf_counter()
+        with self.lock:
+            stall, self.pending = self.pending, None
+            start, self.last_beat = self.last_beat, now
+        if stall:
+            self._record(stall, (now - start) * 1000)
+
+    def _watch(self): # Hilo del watchdog
+        while self.running:
+            time.sleep(self.threshold / 4)
+            with self.lock:
+                if self.pending or time.perf_counter() - self.last_beat < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self.gui_ident)
+                if frame is None:
+                    continue
+                self.pending = stack_lines(frame)
+                del frame
+
+    def _call_site(self, stack: List[str]) -> str:
+        # El frame mas interno que pertenece a la app es el sitio del bloqueo
+        own = os.path.basename(__file__)
+        for line in reversed(stack):
+            if f"({own}:" in line:
+                return line
+        return stack[-1] if stack else "?"
+
+    def _record(self, stack: List[str], duration_ms: float):
+        site = self._call_site(stack)
+        entry = self.sites.setdefault(site, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": stack})
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        if duration_ms > entry["max_ms"]:
+            entry["max_ms"] = duration_ms
+            entry["stack"] = stack
+        logger.warning("GUI stall %.0f ms at %s", duration_ms, site)
+        self.write_report()
+
+    def write_report(self):
+        if not self.sites:
+            return
+        ranked = sorted(self.sites.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                f.write(f"Life | Stall report | {datetime.now():%Y-%m-%d %H:%M:%S} | threshold {self.threshold * 1000:.0f} ms\n\n")
+                for rank, (site, e) in enumerate(ranked, 1):
+                    f.write(f"{rank}. {site}\n")
+                    f.write(f"   stalls: {e['count']}  total: {e['total_ms']:.0f} ms  max: {e['max_ms']:.0f} ms\n")
+                    for line in e["stack"]:
+                        f.write(f"      {line}\n")
+                    f.write("\n")
+        except OSError as e:
+            logger.warning("Stall report not written: %s", e)
+
+# ---------------------------------------------------------------------------
+class SamplingProfiler: # Perfilador por muestreo de todos los hilos (Analisis -> Perfilar)
+    def __init__(self, interval_ms: float = 10.0):
+        self.interval = interval_ms / 1000.0
+        self.frames: List[tuple] = []            # (nombre, archivo, linea) compartidos
+        self.frame_ids: Dict[tuple, int] = {}
+        self.samples: Dict[str, List[tuple]] = {} # hilo -> [(t, pila de ids)]
+        self.lock = threading.Lock() # una pasada de muestreo completa; stop no lee mientras se escribe
+        self.running = False
+        self.thread = None
+        self.t0 = 0.0
+
+    def start(self):
+        self.frames, self.frame_ids, self.samples = [], {}, {}
+        self.running = True
+        self.t0 = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name="life-profiler", daemon=True)
+        self.thread.start()
+        logger.info("Profiler started (%.0f ms)", self.interval * 1000)
+
+    def stop(self) -> List[str]:
+        with self.lock: # espera la pasada en curso; las siguientes ven running = False y no escriben
+            self.running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            if self.thread.is_alive():
+                logger.warning("Profiler thread did not exit in time; exporting the samples taken so far")
+        return self.export()
+
+    def _frame_id(self, code) -> int:
+        key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+        fid = self.frame_ids.get(key)
+        if fid is None:
+            fid = self.frame_ids[key] = len(self.frames)
+            self.frames.append(key)
+        return fid
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self.lock:
+                if not self.running:
+                    break
+                now = time.perf_counter() - self.t0
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    name = names.get(ident, str(ident))
+                    if ident == own or name == "life-stall-watchdog":
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._frame_id(frame.f_code))
+                        frame = frame.f_back
+                    stack.reverse()
+                    self.samples.setdefault(name, []).append((now, tuple(stack)))
+            time.sleep(self.interval)
+
+    def export(self) -> List[str]:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        collapsed_path = os.path.join(LOGS_DIR, f"profile_{stamp}.collapsed.txt")
+        speedscope_path = os.path.join(LOGS_DIR, f"profile_{stamp}.speedscope.json")
+        label = lambda fid: f"{self.frames[fid][0]} ({os.path.basename(self.frames[fid][1])}:{self.frames[fid][2]})"
+
+        # Formato "collapsed" (flamegraph.pl / speedscope / inferno)
+        counts: Dict[str, int] = {}
+        for thread, samples in self.samples.items():
+            for _, stack in samples:
+                key = ";".join([thread] + [label(fid) for fid in stack])
+                counts[key] = counts.get(key, 0) + 1
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for key, n in sorted(counts.items()):
+                f.write(f"{key} {n}\n")
+
+        # Formato speedscope: un perfil "sampled" por hilo
+        ms = self.interval * 1000
+        profiles = []
+        for thread, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": samples[0][0] * 1000 if samples else 0,
+                "endValue": samples[-1][0] * 1000 + ms if samples else 0,
+                "samples": [list(stack) for _, stack in samples],
+                "weights": [ms] * len(samples),
+            })
+        doc = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"Life {stamp}",
+            "exporter": "Lifeness Simulator",
+            "shared": {"frames": [{"name": n, "file": fl, "line": ln} for n, fl, ln in self.frames]},
+            "profiles": profiles,
+        }
+        with open(speedscope_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+        total = sum(len(v) for v in self.samples.values())
+        logger.info("Profile saved (%d samples): %s", total, speedscope_path)
+        return [collapsed_path, speedscope_path]
+
+# ---------------------------------------------------------------------------
+class ResourceDialog(QDialog): # Diagnostico de memoria CPU/GPU (Analisis -> Recursos)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Life | Recursos y Memoria")
+        self.resize(760, 480)
+        layout = QVBoxLayout(self)
+
+        self.lbl_totals = QLabel("")
+        self.lbl_totals.setWordWrap(True)
+        layout.addWidget(self.lbl_totals)
+
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Asset", "Tipo", "Ventana", "CPU (MB)", "GPU (MB)"])
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table, 1)
+
+        btns = QHBoxLayout()
+        btn_refresh = AnimatedButton("Actualizar")
+        btn_release = AnimatedButton("Liberar copias CPU")
+        btn_close = AnimatedButton("Cerrar")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_release.clicked.connect(self.release_cpu)
+        btn_close.clicked.connect(self.close)
+        btns.addWidget(btn_refresh)
+        btns.addWidget(btn_release)
+        btns.addStretch()
+        btns.addWidget(btn_close)
+        layout.addLayout(btns)
+        self.refresh()
+
+    def refresh(self):
+        mb = 1024 * 1024
+        rows = RESOURCES.snapshot()
+        self.table.setRowCount(len(rows))
+        for i, r in enumerate(rows):
+            for j, val in enumerate((r["name"], r["kind"], r["window"], f"{r['cpu'] / mb:.2f}", f"{r['gpu'] / mb:.2f}")):
+                self.table.setItem(i, j, QtWidgets.QTableWidgetItem(val))
+        lines = []
+        for win, t in RESOURCES.totals().items():
+            lines.append(f"<b>{win}</b>: CPU {t['cpu'] / mb:.1f} MB | GPU ~{t['gpu'] / mb:.1f} MB")
+        cpu = sum(r["cpu"] for r in rows) / mb
+        gpu = sum(r["gpu"] for r in rows) / mb
+        budget = lambda v: f"{v:.0f} MB" if v else "sin limite"
+        lines.append(f"<b>Total</b>: CPU {cpu:.1f} MB ({budget(CONFIG.cpu_budget_mb)}) | "
+                     f"GPU ~{gpu:.1f} MB ({budget(CONFIG.gpu_budget_mb)})")
+        self.lbl_totals.setText("<br>".join(lines))
+
+    def release_cpu(self):
+        for r in RESOURCES.snapshot():
+            obj = r["obj"]()
+            if r["gpu"] and hasattr(obj, "release_cpu"):
+                obj.release_cpu()
+        self.refresh()
+
 # ---------------------------------------------------------------------------
 class AuthorsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Life | Desarrollador | Equipo de Trabajo")
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico1.ico") # Ícono de la ventana
-        self.setWindowIcon(QIcon(ico_path))
+        self.setWindowIcon(asset_icon(ico_path))
         self.setFixedSize(600, 500)
         self.setStyleSheet("""
             QPushButton{
@@ -674,7 +5219,7 @@ class AuthorsDialog(QDialog):
         author = self.authors[self.index]
         self.name_label.setText(author["name"])
         self.desc_label.setText(author["desc"])
-        pixmap = QPixmap(os.path.join(ASSETS_DIR, "pictures/authors", author["image"]))
+        pixmap = asset_pixmap(os.path.join(ASSETS_DIR, "pictures/authors", author["image"]))
 
         if not pixmap.isNull():
             self.photo_label.setPixmap(pixmap.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation))
@@ -697,13 +5242,17 @@ class AuthorsDialog(QDialog):
 
 # ---------------------------------------------------------------------------
 class ExtraWindow(QMainWindow):
+    COMPOSITE_FILES = {"brain": "brain", "bones": "bones"}  # asset del catalogo -> capa de la malla compuesta
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Life | Extras y Recursos")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        GL_LEAKS.watch(self)
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico2.ico")
-        self.setWindowIcon(QIcon(ico_path))
-        self.setGeometry(200, 100, 1100, 600)
-        self.setFixedSize(1100, 600)  # Tamaño fijo, no redimensionable
+        self.setWindowIcon(asset_icon(ico_path))
+        self.setGeometry(200, 100, 1100, 640)
+        self.setFixedSize(1100, 640)  # Tamaño fijo, no redimensionable
 
         screen = self.screen().availableGeometry()
         x = (screen.width() - self.width()) //2
@@ -726,15 +5275,9 @@ class ExtraWindow(QMainWindow):
         label_title.setAlignment(Qt.AlignCenter)
         left_layout.addWidget(label_title)
 
-        # Botones de modelos
+        # Botones de modelos: etiqueta -> asset del catalogo
         self.buttons = {}
-        models = { 
-            "Corazón": "heart.obj",
-            "ADN": "dna.obj",
-            "Oreja": "ear.obj",
-            "Espermatozoide": "sperm.obj",
-            "Globulo Rojo": "red_cells.obj"
-        }
+        models = {ASSET_CATALOG.entry(a)["label"]: a for a in ASSET_CATALOG.group("Modelos 3D Extras")}
 
         for name, file in models.items():
             btn = AnimatedButton(name)
@@ -751,6 +5294,7 @@ class ExtraWindow(QMainWindow):
                 }
             """)
             btn.clicked.connect(lambda checked, f=file, n=name: self.load_model(f, n))
+            btn.setToolTip(self.asset_tooltip(file))
             left_layout.addWidget(btn)
             self.buttons[name] = btn
 
@@ -760,10 +5304,8 @@ class ExtraWindow(QMainWindow):
         left_layout.addWidget(label_title_2)
 
         # Botones de modelos
-        models_2 = {
-            "Cerebro": "brain.obj",
-            "Huesos": "bones.obj"
-        }
+        models_2 = {ASSET_CATALOG.entry(a)["label"]: a for a in ASSET_CATALOG.group("Anatomia Esqueletica")}
+        models_2["Cerebro y Huesos"] = "brain+bones"
 
         for name, file in models_2.items():
             btn = AnimatedButton(name)
@@ -780,9 +5322,48 @@ class ExtraWindow(QMainWindow):
                 }
             """)
             btn.clicked.connect(lambda checked, f=file, n=name: self.load_model(f, n))
+            btn.setToolTip(self.asset_tooltip(file))
+            left_layout.addWidget(btn)
+            self.buttons[name] = btn
+
+        label_title_3 = QLabel("Simulaciones") # Particulas sobre el cuerpo completo
+        label_title_3.setFont(QFont("Arial", 14, QFont.Bold))
+        label_title_3.setAlignment(Qt.AlignCenter)
+        left_layout.addWidget(label_title_3)
+
+        simulations = {
+            "Flujo Sanguíneo": "blood",
+            "Nube de Esporas": "spores",
+            "Colonia Bacteriana": "bacteria",
+            "Explorar Escalas": "scales"
+        }
+
+        for name, kind in simulations.items():
+            btn = AnimatedButton(name)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #0078D7;
+                    color: white;
+                    border-radius: 6px;
+                    padding: 10px;
+                    font-size: 13px;
+                }
+                QPushButton:hover {
+                    background-color: #005A9E;
+                }
+            """)
+            btn.clicked.connect(lambda checked, k=kind, n=name: self.show_scales() if k == "scales" else self.show_particles(k, n))
             left_layout.addWidget(btn)
             self.buttons[name] = btn
 
+        # Miniaturas del impostor en los botones de modelos a medida que se arman; las escenas compuestas no llevan
+        self.thumbnails = ThumbnailIcons(self)
+        for name, file in {**models, **models_2}.items():
+            if "+" not in file and ASSET_CATALOG.available(file):
+                btn = self.buttons[name]
+                btn.setIconSize(QtCore.QSize(32, 32))
+                self.thumbnails.request(ImpostorAtlas.thumbnail_job(file), btn, btn.setIcon)
+
         left_layout.addStretch()
         main_layout.addWidget(left_panel, 1)
 
@@ -791,8 +5372,28 @@ class ExtraWindow(QMainWindow):
         right_panel.setStyleSheet("background-color: black; border: 0px solid #555;")
         right_layout = QVBoxLayout(right_panel)
 
-        self.viewer = GLHumanWidget()
-        right_layout.addWidget(self.viewer)
+        self.viewer = create_viewer()
+        self.viewer.use_composite()
+        self.viewer.scene_changed.connect(self.describe_scale)
+        right_layout.addWidget(self.viewer, 1)
+        GL_LEAKS.watch_window(self, self.viewer)
+
+        # Corte anatomico: plano y posicion, se aplican sobre lo que muestre el visor
+        section_bar = QWidget()
+        s_layout = QHBoxLayout(section_bar)
+        section_label = QLabel("Corte:")
+        section_label.setStyleSheet("color: white;")
+        self.section_axis = QComboBox()
+        self.section_axis.addItems(list(SECTION_LABELS))
+        self.section_axis.setStyleSheet("color: white;")
+        self.section_slider = QSlider(QtCore.Qt.Horizontal)
+        self.section_slider.setRange(0, 100); self.section_slider.setValue(50)
+        self.section_axis.currentTextChanged.connect(self.update_section)
+        self.section_slider.valueChanged.connect(self.update_section)
+        s_layout.addWidget(section_label)
+        s_layout.addWidget(self.section_axis)
+        s_layout.addWidget(self.section_slider, 1)
+        right_layout.addWidget(section_bar)
 
         # Panel inferior (descripción)
         self.desc_label = QLabel("Seleccione un modelo para visualizar.")
@@ -800,20 +5401,89 @@ class ExtraWindow(QMainWindow):
         right_layout.addWidget(self.desc_label)
         main_layout.addWidget(right_panel, 3)
 
+        # Los modelos traen su descripcion del catalogo; aca quedan las escenas que no son un asset
         self.model_descriptions = {
-            "Corazón": "Representación 3D del corazón humano, mostrando cavidades y arterias principales.",
-            "ADN": "Modelo 3D de la doble hélice del ADN, base de la información genética.",
-            "Huesos": "Estructura ósea básica del cuerpo humano, modelo anatómico de referencia.",
-            "Cerebro": "Modelo 3D del cerebro humano con divisiones hemisféricas y lóbulos cerebrales.",
-            "Espermatozoide": "Representación microscópica del espermatozoide humano, vista aumentada.",
-            "Oreja": "Representación aumentada de la oreja izquierda humana.",
-            "Globulo Rojo": "Representación microscópica del globulo rojo plasmado en 3D."
+            "Cerebro y Huesos": "Escena combinada del cerebro y la estructura ósea.",
+            "Flujo Sanguíneo": "Globulos rojos circulando por los vasos principales con flujo laminar.",
+            "Nube de Esporas": "Esporas fúngicas dispersandose alrededor del cuerpo por turbulencia y gravedad.",
+            "Colonia Bacteriana": "Bacilos de Clostridium tetani colonizando una herida punzante del pie, sin diseminarse."
         }
+        self.model_descriptions.update({e["label"]: e["description"] for e in map(ASSET_CATALOG.entry, CATALOG_ENTRIES) if e["group"]})
+
+    @staticmethod
+    def asset_tooltip(f: str) -> str:
+        parts = f.split("+")
+        if not all(ASSET_CATALOG.available(a) for a in parts):
+            return "No instalado"
+        return "\n".join(filter(None, (ASSET_CATALOG.describe(a) for a in parts)))
+
+    def bind(self):
+        # Reutilizacion desde WindowPool: vuelve al estado inicial sin reconstruir la ventana
+        self.viewer.set_gender_model("male")
+        self.viewer.yaw = 0.0
+        self.viewer.set_particles(None)
+        self.viewer.set_animation(None)
+        self.viewer.set_scene(False)
+        self.section_axis.setCurrentIndex(0)
+        self.viewer.set_section(None)
+        self.desc_label.setText("Seleccione un modelo para visualizar.")
+
+    def closeEvent(self, event):
+        if not getattr(self, "pooled", False):
+            self.viewer.release_gl()
+        super().closeEvent(event)
+
+    def update_section(self, *_):
+        axis = SECTION_LABELS.get(self.section_axis.currentText())
+        self.viewer.set_section(None)
+        if axis is not None:
+            self.viewer.set_section(axis, self.section_slider.value() / 100.0)
+
+    def show_scales(self):
+        self.viewer.set_particles(None)
+        self.viewer.set_animation(None)
+        self.viewer.set_scene(True)
+
+    def describe_scale(self, node):
+        path = " › ".join(n.label for n in reversed(self.viewer.scene.branch())) if self.viewer.scene else node.label
+        self.desc_label.setText(f"{path} ({node.scale_text()}). Acerque el zoom para entrar, aléjelo para volver.")
+
+    def show_particles(self, kind, n):
+        # Las simulaciones corren sobre el cuerpo completo, no sobre un modelo extra
+        self.viewer.set_scene(False)
+        self.viewer.set_gender_model("male")
+        self.viewer.set_animation(None)
+        self.viewer.set_particles(kind)
+        self.desc_label.setText(self.model_descriptions.get(n, "Simulación en curso."))
 
     def load_model(self, f, n):
+        self.viewer.set_particles(None)
+        self.viewer.set_animation(None)
+        self.viewer.set_scene(False)
         try:
-            model_path = os.path.join(BASE_DIR, f"assets/extra_parts/{f}")
+            # Capas de la malla compuesta (cerebro, huesos): solo cambia el rango de dibujo
+            layers = [self.COMPOSITE_FILES.get(part) for part in f.split("+")]
+            if all(layers) and self.viewer.show_layers(layers):
+                self.desc_label.setText(self.model_descriptions.get(n, "Modelo cargado."))
+                return
+            f = f.split("+")[0]
+            model_path = ASSET_CATALOG.path(f)
+            if not ASSET_CATALOG.available(f):
+                self.desc_label.setText(f"{n}: modelo no instalado.")
+                return
+            if model_path.startswith("procedural:"):
+                self.viewer.load_procedural(model_path.split(":", 1)[1])
+                self.desc_label.setText(self.model_descriptions.get(n, "Modelo cargado."))
+                return
+            # Aviso antes de bloquear: lo que el catalogo dice que tardara y si entra en el presupuesto
+            if not ASSET_CATALOG.fits(f):
+                logger.info("Loading %s over the memory budget (%s): LRU eviction follows", f, ASSET_CATALOG.describe(f))
+            eta = ASSET_CATALOG.estimate_ms(f)
+            if eta > 100.0:
+                self.desc_label.setText(f"Cargando {n} ({ASSET_CATALOG.describe(f)}, ~{eta / 1000:.1f} s)...")
+                self.desc_label.repaint()
             self.viewer.load_model(model_path)
+            self.viewer.set_animation(MODEL_ANIMATIONS.get(os.path.splitext(os.path.basename(model_path))[0]))
             self.desc_label.setText(self.model_descriptions.get(n, "Modelo cargado."))
         except Exception as e:
             self.desc_label.setText(f"Error al cargar {n}: {str(e)}")
@@ -826,7 +5496,7 @@ class MainWindow(QMainWindow): # Constructor o init
         self.meta = meta
         self.setWindowTitle("Life")
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico1.ico")
-        self.setWindowIcon(QIcon(ico_path))
+        self.setWindowIcon(asset_icon(ico_path))
         screen_res = self.screen().availableGeometry()
         screen_width = screen_res.width()
         screen_height = screen_res.height()
@@ -834,6 +5504,10 @@ class MainWindow(QMainWindow): # Constructor o init
         self.setFixedSize(self.size())
         # self.setWindowFlags(self.windowFlags() & -Qt.WindowMaximizeButtonHint) Linea que ocultaba el maximizar
         self.setWindowFlags(Qt.Window | Qt.WindowMinimizeButtonHint | Qt.WindowCloseButtonHint)
+        self.disease_pool = WindowPool(lambda: DiseasePatogen("", ""), CONFIG.disease_windows_max, CONFIG.window_pool)
+        self.extra_pool = WindowPool(lambda: ExtraWindow(self), 1, CONFIG.window_pool)
+        self.prefetcher = DiseasePrefetcher()
+        self.thumbnails = ThumbnailIcons(self)
         self.center_window()
 
     def center_window(self): # Proceso para centrar una ventana
@@ -914,6 +5588,14 @@ class MainWindow(QMainWindow): # Constructor o init
         # Subopciones
         first_report = QAction("Guardar Reporte", self)
         first_report.triggered.connect(self.generate_report)
+        self.first_record = QAction("Grabar Escenario", self)
+        self.first_record.setCheckable(True)
+        self.first_record.triggered.connect(self.toggle_scenario_recording)
+        self.first_profile = QAction("Perfilar", self)
+        self.first_profile.setCheckable(True)
+        self.first_profile.triggered.connect(self.toggle_profiler)
+        first_resources = QAction("Recursos", self)
+        first_resources.triggered.connect(self.show_resources)
 
         menu_second = menubar.addMenu(" Preferencias ") # MENÚ2
         # Subopciones
@@ -950,6 +5632,9 @@ class MainWindow(QMainWindow): # Constructor o init
         menu_fourth.addAction(fourth_version)
         menu_fifth.addAction(fifth_exit)
         menu_first.addAction(first_report)
+        menu_first.addAction(self.first_record)
+        menu_first.addAction(self.first_profile)
+        menu_first.addAction(first_resources)
         menu_sixth.addAction(sixth_web)
 
         main_split = QSplitter(QtCore.Qt.Horizontal)
@@ -1026,7 +5711,8 @@ class MainWindow(QMainWindow): # Constructor o init
         title_lbl.setAlignment(QtCore.Qt.AlignCenter)
         center_layout.addWidget(title_lbl)
 
-        self.gl_widget = GLHumanWidget() # Widget OpenGL
+        self.gl_widget = create_viewer() # Widget OpenGL
+        self.gl_widget.load_layers([ASSET_CATALOG.path("muscle"), ASSET_CATALOG.path("skeleton")])
         center_layout.addWidget(self.gl_widget, 1)
 
         timeline_bar = QWidget()
@@ -1151,6 +5837,7 @@ class MainWindow(QMainWindow): # Constructor o init
             """)
     #-------------------------FUNCIONES DE SELECCION JERARQUICA
     def show_sim_categories(self):
+        self.prefetcher.cancel()                                            # El asistente vuelve a empezar
         self.txt_oms.clear();self.txt_wait.clear();self.clear_right_panel() # Se limpian los paneles
         self.disable_side_buttons();self.disable_act_buttons()              # Se desactivan ambas listas de botones
         self.txt_oms.setHtml("<h2><center>Filtro de Seleccion</center></h2>"
@@ -1168,6 +5855,7 @@ class MainWindow(QMainWindow): # Constructor o init
         ]
         self.lista.addItems(sistemas)
         self.lista.itemClicked.connect(self.selected_sys)
+        self.disease_thumbnails(self.lista, [SYSTEM_DISEASES.get(s) for s in sistemas])
         self.right_layout.addWidget(self.txt_oms, 1)
         self.right_layout.addSpacing(10)
         self.right_layout.addWidget(self.lista)
@@ -1175,15 +5863,25 @@ class MainWindow(QMainWindow): # Constructor o init
         self.btn_tratamiento = AnimatedButton("Seleccion de Sistema")
         self.right_layout.addWidget(self.btn_tratamiento)
         self.btn_tratamiento.clicked.connect(self.seleccionar_sistema)
+    def disease_thumbnails(self, lista: QListWidget, diseases: List[Optional[str]]):
+        # Cuerpo con la region de cada enfermedad teñida; los items sin miniatura todavia quedan solo con texto
+        body = self.gl_widget.current_model
+        if body is None:
+            return
+        lista.setIconSize(QtCore.QSize(40, 40))
+        for i, disease in enumerate(diseases):
+            self.thumbnails.request(ImpostorAtlas.thumbnail_job(body, disease), lista, lista.item(i).setIcon)
     def selected_sys(self, item):                           # Al hacer clic en un item
         actual_sys = item.text()
         self.btn_tratamiento.setText(f"{actual_sys}")
+        self.prefetcher.start(SYSTEM_DISEASES.get(actual_sys), self.gl_widget) # El sistema ya define la enfermedad
     def seleccionar_sistema(self):
         item = self.lista.currentItem()
         if not item:
             QMessageBox.warning(self, "Aviso", "Seleccione un sistema primero.")
             return
         self.sistema_actual = item.text()
+        self.prefetcher.start(SYSTEM_DISEASES.get(self.sistema_actual), self.gl_widget)
         self.show_age_selection()
 
     def show_age_selection(self):
@@ -1225,18 +5923,7 @@ class MainWindow(QMainWindow): # Constructor o init
         self.txt_wait.setHtml("<b><center>Fase 3</center></b>"
                               "<p><center>Conectando recepcion con Life Analizer ..</center></p>")
 
-        self.enfermedades_sistemas = {
-            "Sistema respiratorio": "COVID-19",
-            "Sistema digestivo": "Hepatitis",
-            "Sistema circulatorio": "Anemia",
-            "Sistema nervioso": "Epilepsia",
-            "Sistema endocrino": "Obesidad",
-            "Sistema inmunológico": "Esclerosis múltiple",
-            "Sistema urinario": "Síndrome nefrótico",
-            "Sistema tegumentario": "Dermatitis",
-            "Sistema muscular": "Tétanos",
-            "Sistema óseo": "Osteoporosis"
-        }
+        self.enfermedades_sistemas = SYSTEM_DISEASES
         self.enfermedades_descripcion = {
             "COVID-19": "El COVID-19, abreviatura de Coronavirus Disease 2019, es una enfermedad respiratoria causada por el virus SARS-CoV-2, perteneciente a la familia de los coronavirus. \n\nFue identificada por primera vez en Wuhan, China, en diciembre de 2019. \n\nSu origen se asocia al salto zoonótico de un virus de murciélago hacia humanos, probablemente a través de un hospedador intermedio.\nLa enfermedad se propagó rápidamente, convirtiéndose en una pandemia global declarada por la OMS el 11 de marzo de 2020.\nSu mecanismo principal afecta al sistema respiratorio, causando fiebre, tos seca, dificultad para respirar, pérdida del olfato y gusto, y en casos graves, neumonía, síndrome de dificultad respiratoria aguda y fallo multiorgánico.",
             "Hepatitis": "La hepatitis es la inflamación del hígado, órgano esencial encargado de filtrar toxinas y metabolizar nutrientes. \n\nSu nombre proviene del griego hepar (hígado) y itis (inflamación). Existen varios tipos: A, B, C, D y E, cada uno con un agente viral distinto y diferentes formas de transmisión.\nHepatitis A y E: transmitidas por alimentos o agua contaminados.\nHepatitis B, C y D: por contacto con sangre o fluidos corporales infectados.\nLa enfermedad puede ser aguda o crónica. En sus formas graves puede provocar cirrosis o cáncer hepático.\nLos síntomas incluyen ictericia (color amarillento de la piel), fatiga, náuseas y dolor abdominal.",
@@ -1254,6 +5941,7 @@ class MainWindow(QMainWindow): # Constructor o init
         enfermedades = self.enfermedades_sistemas.get(self.sistema_actual)
         self.lista.addItem(enfermedades)
         self.lista.itemClicked.connect(self.selected_dis)
+        self.disease_thumbnails(self.lista, [enfermedades])
         self.right_layout.addWidget(self.txt_oms, 1)
         self.right_layout.addSpacing(10)
         self.right_layout.addWidget(self.lista)
@@ -1299,8 +5987,11 @@ class MainWindow(QMainWindow): # Constructor o init
             self.enable_side_buttons()
         enfermedad_actual = self.enfermedad_actual
         descripciones = getattr(self, "enfermedades_descripcion", {}).get(self.enfermedad_actual, "No hay descripción disponible.")
-        self.disease_win = DiseasePatogen(enfermedad_actual, descripciones)
+        gender = "female" if self.gl_widget.current_model is self.gl_widget.model_female else "male"
+        self.disease_win = self.disease_pool.acquire(enfermedad_actual)
+        self.disease_win.bind(enfermedad_actual, descripciones, gender, self.prefetcher.claim(enfermedad_actual, self.gl_widget.current_model))
         self.disease_win.show()
+        self.disease_win.raise_()
 
     #-------------------------FIN DE FUNCIONES DE SELECCION JERARQUICA
 
@@ -1311,7 +6002,7 @@ class MainWindow(QMainWindow): # Constructor o init
         dialog.setFixedSize(600, 500)
 
         banner_label = QLabel()
-        banner_pixmap = QPixmap("assets/pictures/logos/life_logo_hor.png")  # Ruta del banner
+        banner_pixmap = asset_pixmap("assets/pictures/logos/life_logo_hor.png")  # Ruta del banner
         if not banner_pixmap.isNull():
             banner_pixmap = banner_pixmap.scaledToWidth(640, Qt.SmoothTransformation)
         banner_label.setPixmap(banner_pixmap)
@@ -1426,8 +6117,12 @@ class MainWindow(QMainWindow): # Constructor o init
         QMessageBox.information(self, "Modelo 3D", f"Modelo cambiado a {new_gender}.")
     
     def show_extras(self):
-        self.extra_window = ExtraWindow(self)
+        reused = any(shiboken_alive(w) for _, w in self.extra_pool.windows)
+        self.extra_window = self.extra_pool.acquire()
+        if reused and self.extra_pool.reuse:
+            self.extra_window.bind()
         self.extra_window.show()
+        self.extra_window.raise_()
     
     def show_help(self):
         dlg = QMessageBox(self)
@@ -1474,7 +6169,7 @@ class MainWindow(QMainWindow): # Constructor o init
         acces_lab.setAlignment(QtCore.Qt.AlignCenter)
         layout.addWidget(acces_lab) # Titulo centrado
 
-        pict.setPixmap(QPixmap(os.path.join(ASSETS_DIR, "pictures/logos", "modern_logo.png")).scaled(225, 225, QtCore.Qt.KeepAspectRatio))
+        pict.setPixmap(asset_pixmap(os.path.join(ASSETS_DIR, "pictures/logos", "modern_logo.png")).scaled(225, 225, QtCore.Qt.KeepAspectRatio))
         layout.addWidget(pict, alignment=QtCore.Qt.AlignCenter) # Agregamos y centramos la imagen
         label = QLabel("Registre su producto para obtener soporte técnico, acceso a recursos exclusivos,\n"
                        "modelos nuevos y mensajes especiales por parte del equipo.")
@@ -1651,24 +6346,40 @@ class MainWindow(QMainWindow): # Constructor o init
         if answer == QMessageBox.Yes:
             QMessageBox.information(self, "Success", "¡Excelente! Reporte exitosamente guardado.")
 
+    def toggle_scenario_recording(self, checked):
+        if checked:
+            self.recorder = ScenarioRecorder(self)
+            self.recorder.start()
+            self.first_record.setText("Detener Grabacion")
+        elif getattr(self, "recorder", None):
+            path = self.recorder.stop()
+            self.recorder = None
+            self.first_record.setText("Grabar Escenario")
+            QMessageBox.information(self, "Life", f"Escenario guardado en:\n{path}")
+
+    def show_resources(self):
+        dlg = ResourceDialog(self)
+        dlg.exec()
+
+    def toggle_profiler(self, checked):
+        if checked:
+            self.profiler = SamplingProfiler(CONFIG.profiler_interval_ms)
+            self.profiler.start()
+            self.first_profile.setText("Detener Perfilado")
+        elif getattr(self, "profiler", None):
+            paths = self.profiler.stop()
+            self.profiler = None
+            self.first_profile.setText("Perfilar")
+            QMessageBox.information(self, "Life", "Perfil guardado en:\n" + "\n".join(paths))
+
     def on_speed_change(self, txt):
         self.timeline_speed = 0.5 if txt.startswith("0.5") else (2.0 if txt.startswith("2") else 1.0)
         if self.timeline_playing:
             self.timeline_timer.start(int(1000 / self.timeline_speed))
 
     def on_model_slider_changed(self, value):
-        if value <= 33:
-            models = os.path.join(BASE_DIR, "assets", "anatomy", "male.obj")
-        elif value <= 66:
-            models = os.path.join(BASE_DIR, "assets", "anatomy", "male_muscle.obj")
-        else:
-            models = os.path.join(BASE_DIR, "assets", "anatomy", "male_skeleton.obj")
-
-        if getattr(self, "current_model", None) == models:
-            return
-        model_path = models
-        self.current_model = models
-        self.gl_widget.load_model(model_path)
+        # Las capas ya estan en GPU: el slider solo mueve la mezcla piel -> musculo -> esqueleto
+        self.gl_widget.set_layer_blend(value)
 
     def webpage(self):
          page = "https://github.com/mathjv/Lifeness_Simulator.git"
@@ -1693,7 +6404,7 @@ class SplashWindow(QWidget):
         self.setWindowFlag(QtCore.Qt.FramelessWindowHint)
 
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico1.ico") # Ícono de la ventana
-        self.setWindowIcon(QIcon(ico_path))
+        self.setWindowIcon(asset_icon(ico_path))
 
         self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
         self.resize(800, 420)
@@ -1747,13 +6458,13 @@ class WelcomeScreen(QWidget):
         self.setFixedSize(500, 500)
 
         ico_path = os.path.join(ASSETS_DIR, "pictures/icons", "ico1.ico") # Ícono de la ventana
-        self.setWindowIcon(QIcon(ico_path))
+        self.setWindowIcon(asset_icon(ico_path))
 
         # Fondo GIF (tú colocas el tuyo)
         self.bg_label = QLabel(self)
         self.bg_label.setGeometry(0, 0, 800, 500)
         gif_path = os.path.join(ASSETS_DIR, "backgrounds", "bg5.gif")
-        self.movie = QMovie(gif_path)
+        self.movie = asset_movie(gif_path, self)
         self.bg_label.setMovie(self.movie)
         self.movie.start()
 
@@ -1848,7 +6559,13 @@ class WelcomeScreen(QWidget):
         src_readme= os.path.join(BASE_DIR, "docs", "README.md")
 
         try:
-            shutil.copyfile(src_readme, dst)
+            # En el exe onefile docs/ solo esta dentro de life.pak
+            data = ASSET_PACK.raw(src_readme) if ASSET_PACK is not None and not os.path.isfile(src_readme) else None
+            if data is None:
+                shutil.copyfile(src_readme, dst)
+            else:
+                with open(dst, "wb") as f:
+                    f.write(data)
             webbrowser.open(f"file:///{dst}")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"No se pudo abrir el README.md: {e}")
@@ -1864,7 +6581,7 @@ class WelcomeScreen(QWidget):
         acces_lab.setAlignment(QtCore.Qt.AlignCenter)
         layout.addWidget(acces_lab) # Titulo centrado
 
-        pict.setPixmap(QPixmap(os.path.join(ASSETS_DIR, "pictures/logos", "modern_logo.png")).scaled(225, 225, QtCore.Qt.KeepAspectRatio))
+        pict.setPixmap(asset_pixmap(os.path.join(ASSETS_DIR, "pictures/logos", "modern_logo.png")).scaled(225, 225, QtCore.Qt.KeepAspectRatio))
         layout.addWidget(pict, alignment=QtCore.Qt.AlignCenter) # Agregamos y centramos la imagen
 
         label = QLabel("Donde la simulacion se transforma, nosotros ya habremos manejado los cambios")
@@ -1908,7 +6625,19 @@ class AppController: # Controla el flujo de la aplicación
         self.main_window.show()
         
 if __name__ == "__main__":
+    # 3.3 compatibility: GLSL 330 para LitPipeline sin perder el fondo fixed-function
+    fmt = QtGui.QSurfaceFormat()
+    fmt.setVersion(3, 3)
+    fmt.setProfile(QtGui.QSurfaceFormat.CompatibilityProfile)
+    fmt.setDepthBufferSize(24)
+    fmt.setStencilBufferSize(8) # tapas de los cortes anatomicos
+    QtGui.QSurfaceFormat.setDefaultFormat(fmt)
     app = QApplication(sys.argv)
+    if CONFIG.stall_watchdog:
+        watchdog = StallWatchdog(CONFIG.stall_threshold_ms)
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
+    app.aboutToQuit.connect(lambda: GL_LEAKS.report("quit"))
     controller=AppController()
     controller.run()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,67 @@
+# Life | Compilador y empaquetador de assets (life.pak) | MJ
+#
+# Uso (desde la carpeta del proyecto, antes de builder.bat):
+#   python pack_assets.py                      -> compila assets/ y docs/ y arma life.pak
+#   python pack_assets.py --out dist/life.pak --workers 4
+#   python pack_assets.py --force              -> recompila todo, ignorando la cache
+#   python pack_assets.py --strict             -> falla si algun asset no pasa la validacion
+#   python pack_assets.py --list               -> indice de un pack existente
+#   python pack_assets.py --catalog            -> solo compila y escribe assets/catalog.json
+#
+# Cada OBJ se parsea, triangula, suelda, repara (normales, triangulos degenerados), valida y
+# reduce a LODs en un pool de procesos; los GIF se decodifican a cuadros RGB. Lo compilado queda
+# en Documents/Lifeness Simulator/cache/compiled por hash de contenido: un arbol sin cambios no
+# recompila nada. Despues se escribe assets/catalog.json y se arma el pack, que life.py abre con
+# mmap y lee por id recien cuando se usa.
+from __future__ import annotations
+import os
+import sys
+import time
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["LIFE_NO_PACK"] = "1"  # life.py no abre el life.pak que se va a reemplazar (los procesos del pool lo heredan)
+
+import life  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compila assets y docs y los empaqueta en life.pak.")
+    ap.add_argument("--out", default=os.path.join(HERE, "life.pak"))
+    ap.add_argument("--roots", default=",".join(life.PACK_ROOTS), help="carpetas relativas al proyecto, separadas por coma")
+    ap.add_argument("--list", action="store_true", help="muestra el indice del pack en vez de construirlo")
+    ap.add_argument("--catalog", action="store_true", help="solo regenera assets/catalog.json, sin empaquetar")
+    ap.add_argument("--workers", type=int, default=None, help="procesos de compilacion (por defecto, uno por nucleo)")
+    ap.add_argument("--force", action="store_true", help="recompila aunque el hash ya este en la cache")
+    ap.add_argument("--strict", action="store_true", help="sale con error si algun asset tiene problemas de validacion")
+    args = ap.parse_args()
+
+    if args.list:
+        pack = life.AssetPack(args.out)
+        for aid, e in sorted(pack.index.items()):
+            extra = f" v:{e['vertices']} t:{e['triangles']}" if e["kind"] == "mesh" else ""
+            extra = f" {e['width']}x{e['height']} x{e['count']}" if e["kind"] == "frames" else extra
+            print(f"{e['kind']:7s} {e['length'] / 1024:10.1f} KB  {aid}{extra}")
+        return
+    t0 = time.perf_counter()
+    roots = [r.strip() for r in args.roots.split(",") if r.strip()]
+    compiler = life.AssetCompiler(workers=args.workers)
+    compiled = compiler.run(roots, force=args.force)
+    problems = [(aid, p) for aid, item in sorted(compiled.items()) for p in item["problems"]]
+    print(f"{len(compiled)} files, {len(compiler.rebuilt)} compiled on {compiler.workers} processes ({time.perf_counter() - t0:.2f} s)")
+    for aid, problem in problems:
+        print(f"  {aid}: {problem}")
+    if os.path.isdir(life.ASSETS_DIR):
+        n = life.AssetCatalog.build(compiled=compiled)
+        print(f"{n} assets -> {life.CATALOG_FILE}")
+    if not args.catalog:
+        count = life.AssetPack.build(args.out, roots, compiled)
+        print(f"{count} entries -> {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB, {time.perf_counter() - t0:.2f} s)")
+    if args.strict and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()